@@ -1,16 +1,141 @@
+import json
+import threading
 from functools import update_wrapper
-
-from django.http import HttpResponseRedirect, Http404
+from urllib.parse import quote
+
+from django import forms
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import router, transaction
+from django.http import (
+    HttpResponse,
+    HttpResponseNotAllowed,
+    HttpResponseRedirect,
+    Http404,
+    JsonResponse,
+)
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils.encoding import escape_uri_path, iri_to_uri
-from django.utils.translation import gettext_lazy as _
+from django.utils.html import escape
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext_lazy as _, ngettext
 from django.template.loader import render_to_string
-from django.contrib import admin
-from django.contrib.admin.utils import unquote
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.options import IS_POPUP_VAR
+from django.contrib.admin.utils import model_ngettext, unquote
+from django.forms.models import BaseInlineFormSet
 from django.contrib.admin.options import csrf_protect_m
-from django.contrib.admin.views.main import ChangeList
-from django import VERSION
+from django.db.models import ForeignKey
+from django.db.models.constants import LOOKUP_SEP
+
+from .models import get_lookup_value
+
+# per-request state, kept per thread:
+# - changelist_state, of the changelist being rendered: the query string that
+#   move links carry so that moving an object keeps the filters and ordering,
+#   and the move links fragment shared by every row
+# - pending_positions, the order values submitted through the list_editable
+#   changelist being saved, as (pk, position) pairs applied once every row is
+#   saved
+_local = threading.local()
+
+# placeholders substituted with each object's pk in a rendered move links fragment
+_URL_PK_PLACEHOLDER = "__ordered_model_url_pk__"
+_OBJECT_ID_PLACEHOLDER = "__ordered_model_object_id__"
+_GROUP_PLACEHOLDER = "__ordered_model_group__"
+
+
+def _get_changelist_state():
+    return getattr(_local, "changelist_state", None)
+
+
+def _reset_changelist_state(response=None):
+    _local.changelist_state = None
+
+
+def _get_group_key(obj):
+    # identifies the rows of one order_with_respect_to group to the reorder
+    # script, from the values stored on each row so that no query is needed
+    return json.dumps([str(value) for value in obj._get_wrt_values()])
+
+
+def _fill_move_links(fragment, obj):
+    # reverse() quotes its arguments in the same way
+    url_pk = quote(str(obj.pk), safe=RFC3986_SUBDELIMS + "/~:@")
+    return mark_safe(
+        fragment.replace(_URL_PK_PLACEHOLDER, escape(url_pk))
+        .replace(_OBJECT_ID_PLACEHOLDER, escape(obj.pk))
+        .replace(_GROUP_PLACEHOLDER, escape(_get_group_key(obj)))
+    )
+
+
+class OrderedModelActionForm(ActionForm):
+    position = forms.IntegerField(label=_("Position:"), required=False, min_value=0)
+
+
+class OrderedFormSetMixin:
+    """
+    Model formset mixin that keeps the order values submitted for its objects
+    from being saved as they are. They are validated per order_with_respect_to
+    group and left on the forms as ``ordering_position``, to be applied with
+    ``set_positions()`` once the objects are saved.
+    """
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        order_field_name = self.model.order_field_name
+        forms = []
+        groups = {}
+        for form in self.forms:
+            if (
+                not form.has_changed()
+                or order_field_name not in form.changed_data
+                or self._should_delete_form(form)
+            ):
+                continue
+            if form.cleaned_data.get(order_field_name) is None:
+                # a cleared order leaves the object where it is
+                setattr(
+                    form.instance, order_field_name, form.initial.get(order_field_name)
+                )
+                continue
+            position = form.cleaned_data[order_field_name]
+            group = groups.setdefault(
+                frozenset(form.instance._wrt_map().items()), set()
+            )
+            if position in group:
+                raise ValidationError(
+                    _("Position %(position)s is given more than once."),
+                    code="duplicate_position",
+                    params={"position": position},
+                )
+            group.add(position)
+            forms.append(form)
+
+        for form in forms:
+            form.ordering_position = form.cleaned_data[order_field_name]
+            # new objects are appended, existing ones keep their order for now
+            setattr(form.instance, order_field_name, form.initial.get(order_field_name))
+
+    def get_ordering_positions(self):
+        return {
+            form.instance.pk: form.ordering_position
+            for form in self.forms
+            if getattr(form, "ordering_position", None) is not None
+        }
+
+
+class OrderedInlineFormSet(OrderedFormSetMixin, BaseInlineFormSet):
+    def save(self, commit=True):
+        objs = super().save(commit)
+        positions = self.get_ordering_positions()
+        if commit and positions:
+            self.model._default_manager.set_positions(positions)
+        return objs
 
 
 class BaseOrderedModelAdmin:
@@ -20,44 +145,168 @@ class BaseOrderedModelAdmin:
 
     request_query_string = ""
 
+    class Media:
+        js = ["ordered_model/reorder.js"]
+
     def _get_model_info(self):
         return {"app": self.model._meta.app_label, "model": self.model._meta.model_name}
 
-    def _get_changelist(self, request):
-        list_display = self.get_list_display(request)
-        list_display_links = self.get_list_display_links(request, list_display)
+    def _get_query_string(self):
+        state = _get_changelist_state()
+        return self.request_query_string if state is None else state["query_string"]
 
-        args = (
-            request,
-            self.model,
-            list_display,
-            list_display_links,
-            self.list_filter,
-            self.date_hierarchy,
-            self.search_fields,
-            self.list_select_related,
-            self.list_per_page,
-            self.list_max_show_all,
-            self.list_editable,
-            self,
+    def get_changelist_instance(self, request):
+        cl = super().get_changelist_instance(request)
+        _local.changelist_state = {"query_string": cl.get_query_string()}
+        return cl
+
+    @csrf_protect_m
+    def changelist_view(self, request, extra_context=None):
+        rendered = True
+        try:
+            response = super().changelist_view(request, extra_context)
+            # rows are rendered lazily, forget the changelist state once that
+            # is done
+            rendered = getattr(response, "is_rendered", True)
+            if not rendered:
+                response.add_post_render_callback(_reset_changelist_state)
+            return response
+        finally:
+            if rendered:
+                _reset_changelist_state()
+
+    def _move(self, request, obj, direction):
+        """
+        Move ``obj`` in ``direction``: ``up``, ``down``, ``top``, ``bottom``,
+        ``to`` the ``position`` given in the query string, or ``above`` or
+        ``below`` the object whose pk is given as ``target``.
+        """
+        # read the list from the database the move is written to
+        qs = obj.get_ordering_queryset(using=obj._get_write_db())
+        if direction in ("up", "down", "top", "bottom"):
+            getattr(obj, direction)()
+        elif direction == "to":
+            try:
+                position = int(request.GET["position"])
+            except (KeyError, ValueError):
+                raise Http404
+            last = qs.count() - 1
+            obj.to(max(0, min(position, last)))
+        elif direction in ("above", "below"):
+            target = get_object_or_404(qs, pk=unquote(request.GET.get("target", "")))
+            getattr(obj, direction)(target)
+        else:
+            raise Http404
+
+    def _get_move_response(self, request, obj):
+        """
+        Answer a move made from script without a redirect to the changelist:
+        with the new position and the neighbours' pks when JSON is accepted,
+        or with no content for other XMLHttpRequests. Returns None otherwise.
+        """
+        if "application/json" in request.META.get("HTTP_ACCEPT", ""):
+            using = obj._get_write_db()
+            previous, next = obj.previous(using), obj.next(using)
+            return JsonResponse(
+                {
+                    "pk": str(obj.pk),
+                    "position": obj.get_position(using),
+                    "previous": None if previous is None else str(previous.pk),
+                    "next": None if next is None else str(next.pk),
+                }
+            )
+        if request.META.get("HTTP_X_REQUESTED_WITH") == "XMLHttpRequest":
+            return HttpResponse(status=204)
+        return None
+
+    def _get_redirect_query_string(self, request):
+        query_string = request.META.get("QUERY_STRING", "")
+        if "position" in request.GET or "target" in request.GET:
+            params = request.GET.copy()
+            params.pop("position", None)
+            params.pop("target", None)
+            query_string = params.urlencode()
+        return ("?" + iri_to_uri(query_string)) if query_string else ""
+
+    def _reorder(self, request, queryset):
+        """
+        Apply a drag-and-drop result posted to the reorder endpoint, either a
+        ``pk`` and its target ``position``, or the ``pks`` of a list of objects
+        (such as the visible page) in their new order.
+        """
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        try:
+            if request.content_type == "application/json":
+                data = json.loads(request.body)
+            elif "pks" in request.POST:
+                data = {"pks": request.POST.getlist("pks")}
+            else:
+                data = request.POST.dict()
+
+            with transaction.atomic(using=router.db_for_write(self.model)):
+                if "pks" in data:
+                    if not isinstance(data["pks"], list):
+                        raise ValueError("'pks' must be a list.")
+                    positions = queryset.reorder(data["pks"])
+                    return JsonResponse(
+                        {"positions": {str(pk): o for pk, o in positions.items()}}
+                    )
+
+                obj = get_object_or_404(queryset, pk=data["pk"])
+                position = data["position"]
+                if isinstance(position, str):
+                    position = int(position)
+                last = obj.get_ordering_queryset(using=obj._get_write_db()).count() - 1
+                result = obj.to(max(0, min(position, last)))
+        except (KeyError, TypeError, ValueError, ValidationError) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        return JsonResponse(
+            {
+                "positions": {str(obj.pk): result.new_position},
+                "moved": {
+                    "pk": str(obj.pk),
+                    "from": result.old_position,
+                    "to": result.new_position,
+                },
+            }
         )
 
-        if VERSION >= (2, 1):
-            args = args + (self.sortable_by,)
 
-        if VERSION >= (4, 0):
-            args = args + (self.search_help_text,)
+class OrderedModelAdmin(BaseOrderedModelAdmin, admin.ModelAdmin):
+    action_form = OrderedModelActionForm
 
-        return ChangeList(*args)
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        return type(formset.__name__, (OrderedFormSetMixin, formset), {})
 
-    @csrf_protect_m
     def changelist_view(self, request, extra_context=None):
-        cl = self._get_changelist(request)
-        self.request_query_string = cl.get_query_string()
-        return super().changelist_view(request, extra_context)
-
+        if request.method != "POST" or "_save" not in request.POST:
+            return super().changelist_view(request, extra_context)
+        # apply the submitted order values once every edited row is saved
+        previous = getattr(_local, "pending_positions", None)
+        _local.pending_positions = []
+        try:
+            with transaction.atomic(using=router.db_for_write(self.model)):
+                response = super().changelist_view(request, extra_context)
+                positions = dict(_local.pending_positions)
+                if positions:
+                    self.model._default_manager.set_positions(positions)
+        finally:
+            _local.pending_positions = previous
+        return response
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        pending = getattr(_local, "pending_positions", None)
+        position = getattr(form, "ordering_position", None)
+        if pending is not None and position is not None:
+            pending.append((obj.pk, position))
 
-class OrderedModelAdmin(BaseOrderedModelAdmin, admin.ModelAdmin):
     def get_urls(self):
         from django.urls import path
 
@@ -71,74 +320,128 @@ class OrderedModelAdmin(BaseOrderedModelAdmin, admin.ModelAdmin):
         model_info = self._get_model_info()
 
         return [
+            path(
+                "reorder/",
+                wrap(self.reorder_view),
+                name="{app}_{model}_reorder".format(**model_info),
+            ),
             path(
                 "<path:object_id>/move-<direction>/",
                 wrap(self.move_view),
                 name="{app}_{model}_change_order".format(**model_info),
-            )
+            ),
         ] + super().get_urls()
 
+    def reorder_view(self, request):
+        return self._reorder(request, self.get_queryset(request))
+
     def move_view(self, request, object_id, direction):
         obj = get_object_or_404(self.model, pk=unquote(object_id))
-
-        if direction not in ("up", "down", "top", "bottom"):
-            raise Http404
-
-        getattr(obj, direction)()
+        self._move(request, obj, direction)
+        response = self._get_move_response(request, obj)
+        if response is not None:
+            return response
 
         # guts from request.get_full_path(), calculating ../../ and restoring GET arguments
         mangled = "/".join(escape_uri_path(request.path).split("/")[0:-3])
         redir_path = "%s%s%s" % (
             mangled,
             "/" if not mangled.endswith("/") else "",
-            (
-                ("?" + iri_to_uri(request.META.get("QUERY_STRING", "")))
-                if request.META.get("QUERY_STRING", "")
-                else ""
-            ),
+            self._get_redirect_query_string(request),
         )
 
         return HttpResponseRedirect(redir_path)
 
-    def move_up_down_links(self, obj):
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        if (
+            self.actions is None
+            or IS_POPUP_VAR in request.GET
+            or not self.has_change_permission(request)
+        ):
+            return actions
+        for name in ("move_to_top", "move_to_bottom", "move_to_position"):
+            actions[name] = self.get_action(name)
+        return actions
+
+    def _move_selected(self, request, queryset, position):
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            moved = queryset.move_block(queryset.values_list("pk", flat=True), position)
+        self.message_user(
+            request,
+            ngettext(
+                "Moved %(count)d %(items)s.", "Moved %(count)d %(items)s.", len(moved)
+            )
+            % {"count": len(moved), "items": model_ngettext(self.opts, len(moved))},
+            messages.SUCCESS,
+        )
+
+    def move_to_top(self, request, queryset):
+        self._move_selected(request, queryset, 0)
+
+    move_to_top.short_description = _("Move selected %(verbose_name_plural)s to top")
+
+    def move_to_bottom(self, request, queryset):
+        self._move_selected(request, queryset, None)
+
+    move_to_bottom.short_description = _(
+        "Move selected %(verbose_name_plural)s to bottom"
+    )
+
+    def move_to_position(self, request, queryset):
+        try:
+            position = int(request.POST.get("position", ""))
+        except ValueError:
+            position = -1
+        if position < 0:
+            self.message_user(
+                request, _("Enter the position to move the items to."), messages.ERROR
+            )
+            return
+        self._move_selected(request, queryset, position)
+
+    move_to_position.short_description = _(
+        "Move selected %(verbose_name_plural)s to position"
+    )
+
+    def _get_move_links_fragment(self):
+        # the move links of any object, with placeholders in place of its pk
         model_info = self._get_model_info()
+        name = "{admin_name}:{app}_{model}_change_order".format(
+            admin_name=self.admin_site.name, **model_info
+        )
         return render_to_string(
             "ordered_model/admin/order_controls.html",
             {
                 "app_label": model_info["app"],
                 "model_name": model_info["model"],
                 "module_name": model_info["model"],  # for backwards compatibility
-                "object_id": obj.pk,
+                "object_id": _OBJECT_ID_PLACEHOLDER,
+                "group": _GROUP_PLACEHOLDER,
                 "urls": {
-                    "up": reverse(
-                        "{admin_name}:{app}_{model}_change_order".format(
-                            admin_name=self.admin_site.name, **model_info
-                        ),
-                        args=[obj.pk, "up"],
-                    ),
-                    "down": reverse(
-                        "{admin_name}:{app}_{model}_change_order".format(
-                            admin_name=self.admin_site.name, **model_info
-                        ),
-                        args=[obj.pk, "down"],
-                    ),
-                    "top": reverse(
-                        "{admin_name}:{app}_{model}_change_order".format(
-                            admin_name=self.admin_site.name, **model_info
-                        ),
-                        args=[obj.pk, "top"],
-                    ),
-                    "bottom": reverse(
-                        "{admin_name}:{app}_{model}_change_order".format(
-                            admin_name=self.admin_site.name, **model_info
-                        ),
-                        args=[obj.pk, "bottom"],
-                    ),
+                    direction: reverse(name, args=[_URL_PK_PLACEHOLDER, direction])
+                    for direction in ("up", "down", "top", "bottom")
                 },
-                "query_string": self.request_query_string,
+                "reorder_url": reverse(
+                    "{admin_name}:{app}_{model}_reorder".format(
+                        admin_name=self.admin_site.name, **model_info
+                    )
+                ),
+                "query_string": self._get_query_string(),
             },
         )
 
+    def move_up_down_links(self, obj):
+        state = _get_changelist_state()
+        if state is None:
+            fragment = self._get_move_links_fragment()
+        else:
+            # resolved and rendered once per changelist
+            fragment = state.get("move_links")
+            if fragment is None:
+                fragment = state["move_links"] = self._get_move_links_fragment()
+        return _fill_move_links(fragment, obj)
+
     move_up_down_links.short_description = _("Move")
 
 
@@ -156,6 +459,8 @@ class OrderedInlineModelAdminMixin:
 
 
 class OrderedInlineMixin(BaseOrderedModelAdmin):
+    formset = OrderedInlineFormSet
+
     def _get_model_info(self):
         return dict(
             **super()._get_model_info(),
@@ -174,6 +479,11 @@ class OrderedInlineMixin(BaseOrderedModelAdmin):
 
         model_info = self._get_model_info()
         return [
+            path(
+                "<path:admin_id>/{model}/reorder/".format(**model_info),
+                wrap(self.reorder_view),
+                name="{app}_{parent_model}_{model}_reorder_inline".format(**model_info),
+            ),
             path(
                 "<path:admin_id>/{model}/<path:object_id>/move-<direction>/".format(
                     **model_info
@@ -182,45 +492,58 @@ class OrderedInlineMixin(BaseOrderedModelAdmin):
                 name="{app}_{parent_model}_{model}_change_order_inline".format(
                     **model_info
                 ),
-            )
+            ),
         ]
 
+    def reorder_view(self, request, admin_id):
+        return self._reorder(request, self.get_queryset(request))
+
     def move_view(self, request, admin_id, object_id, direction):
         obj = get_object_or_404(self.model, pk=unquote(object_id))
-
-        if direction not in ("up", "down", "top", "bottom"):
-            raise Http404
-
-        getattr(obj, direction)()
+        self._move(request, obj, direction)
+        response = self._get_move_response(request, obj)
+        if response is not None:
+            return response
 
         # guts from request.get_full_path(), calculating ../../ and restoring GET arguments
         mangled = "/".join(escape_uri_path(request.path).split("/")[0:-4] + ["change"])
         redir_path = "%s%s%s" % (
             mangled,
             "/" if not mangled.endswith("/") else "",
-            (
-                ("?" + iri_to_uri(request.META.get("QUERY_STRING", "")))
-                if request.META.get("QUERY_STRING", "")
-                else ""
-            ),
+            self._get_redirect_query_string(request),
         )
 
         return HttpResponseRedirect(redir_path)
 
+    def _get_parent_pk(self, obj):
+        # Find the order_with_respect_to fields which refer to the parent model
+        # of this inline, and use one of them if they aren't None.
+        for name in obj.get_order_with_respect_to():
+            model = type(obj)
+            for part in name.split(LOOKUP_SEP):
+                field = model._meta.get_field(part)
+                if isinstance(field, ForeignKey):
+                    model = field.remote_field.model
+            # Note 'a class is considered a subclass of itself' pydocs
+            if not isinstance(field, ForeignKey) or not issubclass(
+                self.parent_model, model
+            ):
+                continue
+            if LOOKUP_SEP not in name and field.target_field.primary_key:
+                # the parent pk is stored on obj, no need to load the parent
+                value = getattr(obj, field.attname)
+            else:
+                value = get_lookup_value(obj, name, use_fkid=False)
+                value = None if value is None else value.pk
+            if value is not None:
+                return str(value)
+        return None
+
     def move_up_down_links(self, obj):
         if not obj.pk:
             return ""
 
-        # Find the fields which refer to the parent model of this inline, and
-        # use one of them if they aren't None.
-        fields = []
-        for value in obj._get_related_objects():
-            # Note 'a class is considered a subclass of itself' pydocs
-            if issubclass(self.parent_model, type(value)):
-                if value is not None and value.pk is not None:
-                    fields.append(str(value.pk))
-
-        order_obj_name = fields[0] if len(fields) > 0 else None
+        order_obj_name = self._get_parent_pk(obj)
 
         model_info = self._get_model_info()
         if not order_obj_name:
@@ -237,13 +560,20 @@ class OrderedInlineMixin(BaseOrderedModelAdmin):
                 "model_name": model_info["model"],
                 "module_name": model_info["model"],  # backwards compat
                 "object_id": obj.pk,
+                "group": _get_group_key(obj),
                 "urls": {
                     "up": reverse(name, args=[order_obj_name, obj.pk, "up"]),
                     "down": reverse(name, args=[order_obj_name, obj.pk, "down"]),
                     "top": reverse(name, args=[order_obj_name, obj.pk, "top"]),
                     "bottom": reverse(name, args=[order_obj_name, obj.pk, "bottom"]),
                 },
-                "query_string": self.request_query_string,
+                "reorder_url": reverse(
+                    "{admin_name}:{app}_{parent_model}_{model}_reorder_inline".format(
+                        admin_name=self.admin_site.name, **model_info
+                    ),
+                    args=[order_obj_name],
+                ),
+                "query_string": self._get_query_string(),
             },
         )
 
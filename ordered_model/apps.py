@@ -1,5 +1,5 @@
 from django.apps import AppConfig, apps
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class OrderedModelConfig(AppConfig):
@@ -7,10 +7,22 @@ class OrderedModelConfig(AppConfig):
     label = "ordered_model"
 
     def ready(self):
+        from . import versions
         from .models import OrderedModelBase
+        from .signals import post_move
 
         for cls in apps.get_models():
-            if issubclass(cls, OrderedModelBase):
-                post_delete.connect(
-                    cls._on_ordered_model_delete, sender=cls, dispatch_uid=cls.__name__
-                )
+            if not issubclass(cls, OrderedModelBase):
+                continue
+            post_delete.connect(
+                cls._on_ordered_model_delete, sender=cls, dispatch_uid=cls.__name__
+            )
+            model = cls._get_ordering_model()
+            if model.order_version_cache_alias is None:
+                continue
+            uid = "ordered_model_versions_{}".format(model._meta.label)
+            post_move.connect(versions.bump_on_move, sender=model, dispatch_uid=uid)
+            uid = "ordered_model_versions_{}".format(cls._meta.label)
+            pre_save.connect(versions.remember_group, sender=cls, dispatch_uid=uid)
+            post_save.connect(versions.bump_on_save, sender=cls, dispatch_uid=uid)
+            post_delete.connect(versions.bump_on_delete, sender=cls, dispatch_uid=uid)
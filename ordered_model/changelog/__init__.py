@@ -0,0 +1,11 @@
+"""
+An optional app keeping an append-only log of the changes made to ordered
+lists, for consumers syncing them incrementally. Add
+``"ordered_model.changelog"`` to ``INSTALLED_APPS`` and set
+``order_change_log = True`` on the models to log.
+"""
+
+import django
+
+if django.VERSION < (3, 2):
+    default_app_config = "ordered_model.changelog.apps.OrderedModelChangeLogConfig"
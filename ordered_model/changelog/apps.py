@@ -0,0 +1,35 @@
+from django.apps import AppConfig, apps
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+
+class OrderedModelChangeLogConfig(AppConfig):
+    name = "ordered_model.changelog"
+    label = "ordered_model_changelog"
+    default_auto_field = "django.db.models.AutoField"
+
+    def ready(self):
+        from ordered_model.models import OrderedModelBase
+        from ordered_model.signals import post_bulk_create, post_move
+
+        from . import receivers
+
+        for cls in apps.get_models():
+            if not issubclass(cls, OrderedModelBase):
+                continue
+            model = cls._get_ordering_model()
+            if not model.order_change_log:
+                continue
+            # the classes sharing an ordering model through order_class_path
+            # send their moves and bulk inserts as that model, logged once
+            uid = "ordered_model_changelog_{}".format(model._meta.label)
+            post_move.connect(receivers.log_move, sender=model, dispatch_uid=uid)
+            post_bulk_create.connect(
+                receivers.log_bulk_create, sender=model, dispatch_uid=uid
+            )
+            uid = "ordered_model_changelog_{}".format(cls._meta.label)
+            pre_save.connect(receivers.remember_group, sender=cls, dispatch_uid=uid)
+            post_save.connect(receivers.log_save, sender=cls, dispatch_uid=uid)
+            pre_delete.connect(
+                receivers.remember_position, sender=cls, dispatch_uid=uid
+            )
+            post_delete.connect(receivers.log_delete, sender=cls, dispatch_uid=uid)
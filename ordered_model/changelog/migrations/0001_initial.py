@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-19 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderingChange",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("model", models.CharField(max_length=255)),
+                ("group", models.CharField(max_length=32)),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("insert", "insert"),
+                            ("move", "move"),
+                            ("delete", "delete"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                ("data", models.TextField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ("id",),
+                "indexes": [
+                    models.Index(
+                        fields=["model", "group", "id"],
+                        name="ordered_mod_model_3e5606_idx",
+                    )
+                ],
+            },
+        ),
+    ]
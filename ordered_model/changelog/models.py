@@ -0,0 +1,92 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.functional import cached_property
+
+
+def get_group_key(wrt):
+    """Return the key identifying an ``order_with_respect_to`` group."""
+    return hashlib.md5(repr(sorted(wrt.items())).encode()).hexdigest()
+
+
+class OrderingChangeQuerySet(models.QuerySet):
+    def after(self, cursor=None, model=None, wrt=None):
+        """
+        Return the changes logged after the change with the id ``cursor``, in
+        the order they were logged, optionally only those of the ordered lists
+        of ``model`` or of its ``wrt`` group.
+        """
+        qs = self.order_by("id")
+        if cursor is not None:
+            qs = qs.filter(id__gt=cursor)
+        if model is not None:
+            qs = qs.filter(model=model._get_ordering_model()._meta.label)
+        if wrt is not None:
+            qs = qs.filter(group=get_group_key(wrt))
+        return qs
+
+
+class OrderingChange(models.Model):
+    """
+    A change made to an ordered list, logged in the transaction making it.
+
+    ``positions`` maps the pks of the objects inserted, moved or deleted to
+    their ``(old_position, new_position)``, None standing for outside of the
+    list. The other objects whose positions were in one of the ``shifted``
+    ``((start, stop), shift)`` ranges had ``shift`` added to their positions; a
+    ``stop`` of None stands for the end of the list.
+    """
+
+    INSERT = "insert"
+    MOVE = "move"
+    DELETE = "delete"
+    ACTION_CHOICES = [(INSERT, "insert"), (MOVE, "move"), (DELETE, "delete")]
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=255)
+    group = models.CharField(max_length=32)
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    data = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = OrderingChangeQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [models.Index(fields=["model", "group", "id"])]
+
+    def __str__(self):
+        return "{} {} {}".format(self.id, self.model, self.action)
+
+    @classmethod
+    def log(cls, model, action, wrt, positions, shifted, using=None):
+        """Append a change to the log of the ordered lists of ``model``."""
+        data = {
+            "wrt": sorted(wrt.items()),
+            "positions": [[pk, old, new] for pk, (old, new) in positions.items()],
+            "shifted": [[start, stop, shift] for (start, stop), shift in shifted],
+        }
+        return cls.objects.using(using).create(
+            model=model._meta.label,
+            group=get_group_key(wrt),
+            action=action,
+            data=json.dumps(data, cls=DjangoJSONEncoder),
+        )
+
+    @cached_property
+    def _data(self):
+        return json.loads(self.data)
+
+    @property
+    def wrt(self):
+        return dict(self._data["wrt"])
+
+    @property
+    def positions(self):
+        return {pk: (old, new) for pk, old, new in self._data["positions"]}
+
+    @property
+    def shifted(self):
+        return [((start, stop), shift) for start, stop, shift in self._data["shifted"]]
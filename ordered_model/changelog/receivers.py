@@ -0,0 +1,100 @@
+"""
+Receivers logging the changes, connected by ``ready()`` for the models setting
+``order_change_log`` only.
+"""
+
+import threading
+
+from .models import OrderingChange, get_group_key
+
+# the positions already logged of the objects of each group deleted together,
+# Django sending pre_delete for all of them before sending post_delete
+_deleting = threading.local()
+
+
+def log_move(sender, wrt, positions, shifted, using, **kwargs):
+    OrderingChange.log(sender, OrderingChange.MOVE, wrt, positions, shifted, using)
+
+
+def log_bulk_create(sender, wrt, positions, using, **kwargs):
+    OrderingChange.log(
+        sender,
+        OrderingChange.INSERT,
+        wrt,
+        {pk: (None, position) for pk, position in positions.items()},
+        [((min(positions.values()), None), len(positions))],
+        using,
+    )
+
+
+def remember_group(sender, instance, raw=False, using=None, **kwargs):
+    # save() already placed an object changing group at the end of the new
+    # one, its position in the previous group is read from the database
+    if raw or instance._state.adding:
+        return
+    if instance._get_wrt_values() == instance._original_wrt_values:
+        return
+    previous = type(instance)._base_manager.using(using).get(pk=instance.pk)
+    if previous._wrt_map() == instance._wrt_map():
+        return
+    instance._changelog_previous = (previous._wrt_map(), previous.get_position(using))
+
+
+def log_save(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    model = instance._get_ordering_model()
+    previous = instance.__dict__.pop("_changelog_previous", None)
+    if previous is not None:
+        wrt, position = previous
+        _log_removal(model, instance.pk, wrt, position, using)
+    elif not created:
+        return
+    position = instance.get_position(using)
+    OrderingChange.log(
+        model,
+        OrderingChange.INSERT,
+        instance._wrt_map(),
+        {instance.pk: (None, position)},
+        [((position, None), 1)],
+        using,
+    )
+
+
+def remember_position(sender, instance, using=None, **kwargs):
+    model = instance._get_ordering_model()
+    instance._changelog_position = instance.get_position(using)
+    key = (using, model._meta.label, get_group_key(instance._wrt_map()))
+    deleting = _deleting.__dict__.setdefault("groups", {})
+    deleting.setdefault(key, [0, []])[0] += 1
+
+
+def log_delete(sender, instance, using=None, **kwargs):
+    model = instance._get_ordering_model()
+    position = instance.__dict__.pop("_changelog_position", None)
+    if position is None:
+        return
+    wrt = instance._wrt_map()
+    key = (using, model._meta.label, get_group_key(wrt))
+    deleting = _deleting.__dict__.setdefault("groups", {})
+    pending, logged = deleting.get(key, [1, []])
+    # the objects of the group deleted together are logged one after the other,
+    # each at its position once the previous ones were removed
+    _log_removal(
+        model, instance.pk, wrt, position - sum(p < position for p in logged), using
+    )
+    if pending > 1:
+        deleting[key] = [pending - 1, logged + [position]]
+    else:
+        deleting.pop(key, None)
+
+
+def _log_removal(model, pk, wrt, position, using):
+    OrderingChange.log(
+        model,
+        OrderingChange.DELETE,
+        wrt,
+        {pk: (position, None)},
+        [((position + 1, None), -1)],
+        using,
+    )
@@ -3,32 +3,162 @@ from django.db.models.fields.related_descriptors import (
     create_forward_many_to_many_manager,
 )
 from django.utils.functional import cached_property
-from django.db import models
+from django.db import models, router, transaction
+
+from ordered_model.models import OrderedModelBase
 
 # OrderedManyToManyField can be used in place of ManyToManyField and will
-# sort the returned data by the model Meta ordering when traversing child
-# objects
+# sort the returned data by the through model Meta ordering when traversing
+# the relation from either side
 
 
 def create_sorted_forward_many_to_many_manager(superclass, rel, reverse):
     cls = create_forward_many_to_many_manager(superclass, rel, reverse)
 
     class SortedManyRelatedManager(cls):
+        def _get_through_ordering(self):
+            # follow the through model from the related model with the join
+            # already used to filter on the source objects
+            name = self.target_field.related_query_name()
+            ordering = []
+            for field in rel.through._meta.ordering:
+                descending = field.startswith("-")
+                ordering.append(
+                    "{}{}__{}".format(
+                        "-" if descending else "", name, field.lstrip("-")
+                    )
+                )
+            return ordering
+
+        def _order_by_through(self, queryset):
+            ordering = self._get_through_ordering()
+            return queryset.order_by(*ordering) if ordering else queryset
+
+        def _is_ordered_by_source(self):
+            # whether the through rows form one ordered list per source object
+            return issubclass(
+                rel.through, OrderedModelBase
+            ) and rel.through.get_order_with_respect_to() == (self.source_field_name,)
+
+        def _get_target_id(self, obj):
+            if isinstance(obj, self.model):
+                return self.target_field.get_foreign_related_value(obj)[0]
+            if isinstance(obj, models.Model):
+                # rejected by _add_items()
+                return None
+            return self.target_field.get_prep_value(obj)
+
+        def _get_through_pks(self, db, target_ids):
+            return dict(
+                self.through._default_manager.using(db)
+                .filter(
+                    **{
+                        self.source_field_name: self.related_val[0],
+                        "%s__in" % self.target_field_name: target_ids,
+                    }
+                )
+                .values_list(self.target_field_name, "pk")
+            )
+
+        def _get_missing_target_ids(
+            self, source_field_name, target_field_name, db, target_ids
+        ):
+            # create the missing rows in the order the objects were given, so
+            # that bulk_create() appends them in that order
+            missing = super()._get_missing_target_ids(
+                source_field_name, target_field_name, db, target_ids
+            )
+            order = getattr(self, "_target_order", None)
+            if order is None:
+                return missing
+            return sorted(missing, key=lambda pk: order.get(pk, len(order)))
+
+        def add(self, *objs, through_defaults=None, position=None):
+            if not self._is_ordered_by_source():
+                if position is not None:
+                    raise ValueError(
+                        "add() only takes a position when {0!r} is ordered with "
+                        "respect to '{1}'.".format(rel.through, self.source_field_name)
+                    )
+                return super().add(*objs, through_defaults=through_defaults)
+            target_ids = list(dict.fromkeys(self._get_target_id(obj) for obj in objs))
+            db = router.db_for_write(self.through, instance=self.instance)
+            with transaction.atomic(using=db, savepoint=False):
+                if hasattr(cls, "_get_missing_target_ids"):
+                    self._target_order = {pk: i for i, pk in enumerate(target_ids)}
+                    try:
+                        super().add(*objs, through_defaults=through_defaults)
+                    finally:
+                        del self._target_order
+                else:
+                    # Django < 3.0 has no hook to order the created rows, put
+                    # them at the end in the order the objects were given
+                    existing = self._get_through_pks(db, target_ids)
+                    super().add(*objs, through_defaults=through_defaults)
+                    through_pks = self._get_through_pks(db, target_ids)
+                    added = [through_pks[pk] for pk in target_ids if pk not in existing]
+                    if len(added) > 1:
+                        self.through._default_manager.using(db).reorder(added)
+                if position is not None and target_ids:
+                    through_pks = self._get_through_pks(db, target_ids)
+                    self.through._default_manager.using(db).set_positions(
+                        {
+                            through_pks[pk]: position + i
+                            for i, pk in enumerate(target_ids)
+                        }
+                    )
+
+        add.alters_data = True
+
+        def set(self, objs, *, clear=False, through_defaults=None):
+            objs = tuple(objs)
+            if not self._is_ordered_by_source():
+                return super().set(objs, clear=clear, through_defaults=through_defaults)
+            db = router.db_for_write(self.through, instance=self.instance)
+            with transaction.atomic(using=db, savepoint=False):
+                super().set(objs, clear=clear, through_defaults=through_defaults)
+                target_ids = list(
+                    dict.fromkeys(self._get_target_id(obj) for obj in objs)
+                )
+                if target_ids:
+                    through_pks = self._get_through_pks(db, target_ids)
+                    self.through._default_manager.using(db).reorder(
+                        [through_pks[pk] for pk in target_ids]
+                    )
+
+        set.alters_data = True
+
         def get_queryset(self):
             qs = super().get_queryset()
-            m = rel.through._meta
-            if m.ordering:
-                # import pdb; pdb.set_trace()
-                ors = [m.model_name + "__" + field for field in m.ordering]
-                qs = qs.order_by(*ors)
-            return qs
+            if qs._result_cache is not None:
+                # prefetched, and already sorted by get_prefetch_querysets()
+                return qs
+            return self._order_by_through(qs)
+
+        if hasattr(cls, "get_prefetch_querysets"):
+
+            def get_prefetch_querysets(self, instances, querysets=None):
+                ordered = bool(querysets and querysets[0].query.order_by)
+                result = super().get_prefetch_querysets(instances, querysets)
+                if ordered:
+                    return result
+                return (self._order_by_through(result[0]),) + result[1:]
+
+        else:
+
+            def get_prefetch_queryset(self, instances, queryset=None):
+                ordered = queryset is not None and bool(queryset.query.order_by)
+                result = super().get_prefetch_queryset(instances, queryset)
+                if ordered:
+                    return result
+                return (self._order_by_through(result[0]),) + result[1:]
 
     return SortedManyRelatedManager
 
 
 class SortedManyToManyDescriptor(ManyToManyDescriptor):
-    def __init__(self, field):
-        super().__init__(field.remote_field)
+    def __init__(self, field, reverse=False):
+        super().__init__(field.remote_field, reverse=reverse)
 
     @cached_property
     def related_manager_cls(self):
@@ -46,3 +176,12 @@ class OrderedManyToManyField(models.ManyToManyField):
         super().contribute_to_class(cls, name, **kwargs)
         # print(f"contributed to {cls} {name} remote_field={self.remote_field}")
         setattr(cls, self.name, SortedManyToManyDescriptor(self))
+
+    def contribute_to_related_class(self, cls, related):
+        super().contribute_to_related_class(cls, related)
+        if not self.remote_field.hidden and not related.related_model._meta.swapped:
+            setattr(
+                cls,
+                related.get_accessor_name(),
+                SortedManyToManyDescriptor(self, reverse=True),
+            )
@@ -0,0 +1,170 @@
+"""
+Lightweight instrumentation of ordering operations.
+
+Register a callable with ``add_listener()`` and it will be called with an
+``OrderingEvent`` after each ordering operation (``to``, ``swap``,
+``bulk_create``, delete compaction, ...) completes. While no listener is
+registered, operations run unwrapped apart from a single list check.
+
+``StatsCollector`` is a ready-made listener that aggregates the events in
+process and reports latency percentiles per model and operation.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import connections, router
+
+OrderingEvent = namedtuple(
+    "OrderingEvent", ["operation", "model", "wrt", "rows", "queries", "duration"]
+)
+OrderingEvent.__doc__ = """
+An ordering operation that completed.
+
+``operation`` is the method name, ``model`` the model class, ``wrt`` the
+``order_with_respect_to`` mapping of the affected group (``None`` when the
+operation spans groups), ``rows`` the number of rows shifted or written,
+``queries`` the number of queries issued and ``duration`` the wall time in
+seconds.
+"""
+
+_listeners = []
+_local = threading.local()
+
+
+def add_listener(listener):
+    """Call ``listener(event)`` after every ordering operation."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def record_rows(count):
+    """Add ``count`` rows to the ordering operation in progress, if any."""
+    current = getattr(_local, "current", None)
+    if current is not None:
+        current["rows"] += count
+
+
+@contextmanager
+def track(operation, model, wrt=None, using=None):
+    """
+    Measure the block as ordering ``operation`` on ``model``. Operations nested
+    within another one, such as the ``save()`` performed by ``to()``, are
+    accounted to the outermost operation.
+    """
+    if not _listeners or getattr(_local, "current", None) is not None:
+        yield
+        return
+
+    current = _local.current = {"rows": 0, "queries": 0}
+
+    def count_queries(execute, sql, params, many, context):
+        current["queries"] += 1
+        return execute(sql, params, many, context)
+
+    connection = connections[using or router.db_for_write(model)]
+    try:
+        start = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            yield
+        duration = time.perf_counter() - start
+    finally:
+        _local.current = None
+
+    event = OrderingEvent(
+        operation, model, wrt, current["rows"], current["queries"], duration
+    )
+    for listener in list(_listeners):
+        listener(event)
+
+
+def instrumented(operation):
+    """
+    Decorate an ordering method of ``OrderedModelBase`` so that calls are
+    tracked as ``operation``.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not _listeners:
+                return method(self, *args, **kwargs)
+            with track(operation, type(self), self._wrt_map(), self._state.db):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class StatsCollector:
+    """
+    A listener aggregating events per model and operation. Durations of the
+    most recent ``max_samples`` events of each kind are kept for percentiles.
+
+        stats = StatsCollector()
+        add_listener(stats)
+        ...
+        stats.dump()
+    """
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def __call__(self, event):
+        key = (event.model._meta.label, event.operation)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    "count": 0,
+                    "rows": 0,
+                    "queries": 0,
+                    "durations": deque(maxlen=self.max_samples),
+                }
+            stats["count"] += 1
+            stats["rows"] += event.rows
+            stats["queries"] += event.queries
+            stats["durations"].append(event.duration)
+
+    @staticmethod
+    def _percentile(ordered, percentile):
+        # nearest-rank percentile of a sorted, non-empty list
+        index = max(0, -(-len(ordered) * percentile // 100) - 1)
+        return ordered[int(index)]
+
+    def dump(self, percentiles=(50, 90, 99)):
+        """
+        Return ``{model_label: {operation: summary}}`` where each summary holds
+        the event count, the total rows and queries, and the requested
+        duration percentiles in seconds keyed ``"p50"``, ``"p90"``, ...
+        """
+        with self._lock:
+            items = [
+                (key, dict(stats, durations=sorted(stats["durations"])))
+                for key, stats in self._stats.items()
+            ]
+        result = {}
+        for (label, operation), stats in items:
+            durations = stats.pop("durations")
+            for percentile in percentiles:
+                stats["p{}".format(percentile)] = self._percentile(
+                    durations, percentile
+                )
+            stats["max"] = durations[-1]
+            result.setdefault(label, {})[operation] = stats
+        return result
@@ -2,7 +2,7 @@ from django.apps import apps
 from django.core.management import BaseCommand, CommandError
 from django.db import transaction
 
-from ordered_model.models import OrderedModelBase
+from ordered_model.models import BucketedOrderedModelBase, OrderedModelBase
 
 
 class Command(BaseCommand):
@@ -11,6 +11,12 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("model_name", type=str, nargs="*")
         parser.add_argument("--batch_size", type=int, nargs=1, default=None)
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Report the objects whose ordering is wrong without changing them, "
+            "and exit with an error if there are any.",
+        )
 
     def handle(self, *args, **options):
         """
@@ -19,6 +25,8 @@ class Command(BaseCommand):
         """
         self.verbosity = options["verbosity"]
         self.batch_size = options["batch_size"]
+        self.check_only = options["check"]
+        wrong = 0
 
         orderedmodels = [
             m._meta.label for m in apps.get_models() if issubclass(m, OrderedModelBase)
@@ -43,10 +51,15 @@ class Command(BaseCommand):
                     )
                 )
 
-            self.reorder(model)
+            wrong += self.reorder(model)
+            if not self.check_only:
+                model._get_ordering_model().invalidate_order_cache()
+        if self.check_only and wrong:
+            raise CommandError("{} objects have a wrong ordering.".format(wrong))
 
     def reorder(self, model):
         owrt = model.get_order_with_respect_to()
+        wrong = 0
         if owrt:
             rel_kwargs = dict([("{}__isnull".format(k), False) for k in owrt])
             relation_to_list = (
@@ -58,19 +71,32 @@ class Command(BaseCommand):
             for relation_to in relation_to_list:
                 kwargs = dict([(k, v) for k, v in zip(owrt, relation_to)])
                 # print('re-ordering: {}'.format(kwargs))
-                self.reorder_queryset(model.objects.filter(**kwargs))
-        else:
-            self.reorder_queryset(model.objects.all())
+                wrong += self.reorder_queryset(model.objects.filter(**kwargs))
+            return wrong
+        return self.reorder_queryset(model.objects.all())
 
     @transaction.atomic
     def reorder_queryset(self, queryset):
         model = queryset.model
+        if issubclass(model, BucketedOrderedModelBase):
+            if self.check_only:
+                return self.check_buckets(queryset)
+            return self.rebalance_queryset(queryset)
         order_field_name = model.order_field_name
         bulk_update_list = []
 
         for order, obj in enumerate(queryset):
             if getattr(obj, order_field_name) != order:
-                if self.verbosity:
+                if self.check_only and self.verbosity:
+                    self.stdout.write(
+                        "wrong order of {} ({}): {} instead of {}".format(
+                            model._meta.label,
+                            obj.pk,
+                            getattr(obj, order_field_name),
+                            order,
+                        )
+                    )
+                elif self.verbosity:
                     self.stdout.write(
                         "changing order of {} ({}) from {} to {}".format(
                             model._meta.label,
@@ -82,6 +108,53 @@ class Command(BaseCommand):
                 setattr(obj, order_field_name, order)
                 bulk_update_list.append(obj)
 
-        model.objects.bulk_update(
-            bulk_update_list, [order_field_name], batch_size=self.batch_size
-        )
+        if not self.check_only:
+            model.objects.bulk_update(
+                bulk_update_list, [order_field_name], batch_size=self.batch_size
+            )
+        return len(bulk_update_list)
+
+    def check_buckets(self, queryset):
+        # a bucketed list needs not be packed: the orders within each bucket
+        # must count from 0, and no bucket may be over capacity
+        model = queryset.model
+        bucket_field_name = model.bucket_field_name
+        order_field_name = model.order_field_name
+        bucket_sizes = {}
+        wrong = 0
+        for obj in queryset.order_by(bucket_field_name, order_field_name):
+            bucket = getattr(obj, bucket_field_name)
+            order = bucket_sizes.get(bucket, 0)
+            bucket_sizes[bucket] = order + 1
+            if (
+                getattr(obj, order_field_name) != order
+                or order >= model.bucket_capacity
+            ):
+                if self.verbosity:
+                    self.stdout.write(
+                        "wrong bucket and order of {} ({}): {}".format(
+                            model._meta.label,
+                            obj.pk,
+                            (bucket, getattr(obj, order_field_name)),
+                        )
+                    )
+                wrong += 1
+        return wrong
+
+    @transaction.atomic
+    def rebalance_queryset(self, queryset):
+        model = queryset.model
+        updated = queryset.rebalance_buckets(batch_size=self.batch_size)
+        if self.verbosity:
+            for obj in updated:
+                self.stdout.write(
+                    "changing bucket and order of {} ({}) to {}".format(
+                        model._meta.label,
+                        obj.pk,
+                        (
+                            getattr(obj, model.bucket_field_name),
+                            getattr(obj, model.order_field_name),
+                        ),
+                    )
+                )
+        return len(updated)
@@ -1,14 +1,22 @@
-from functools import partial, reduce
+import hashlib
+import random
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import partial, reduce, wraps
 
 from django.core import checks
+from django.core.cache import caches
 from django.core.exceptions import ObjectDoesNotExist, FieldDoesNotExist
-from django.db import models
-from django.db.models import Max, Min, F
+from django.db import connections, models, router, transaction
+from django.db.models import DEFERRED, Case, Count, Max, Min, F, Q, Value, When
 from django.db.models.fields.related import ForeignKey
 from django.db.models.constants import LOOKUP_SEP
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 
+from .instrumentation import instrumented, record_rows, track
+from .signals import get_shifted_ranges, post_bulk_create, post_move, pre_move
+
 
 def get_lookup_value(obj, wrt_field, use_fkid=True):
     # starting with obj, traverse the wrt_field path and return the value of the
@@ -32,6 +40,43 @@ def get_lookup_value(obj, wrt_field, use_fkid=True):
         return None
 
 
+@contextmanager
+def _atomic_block(using):
+    # a transaction under autocommit, so that the rows an operation shifts,
+    # the object it saves and what the receivers of its signals write are
+    # committed together; within one already, they are anyway
+    if connections[using].in_atomic_block:
+        yield
+    else:
+        with transaction.atomic(using=using):
+            yield
+
+
+def _atomic(method):
+    # run an ordering method of a model in _atomic_block() on its write database
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with _atomic_block(self._get_write_db(kwargs.get("using"))):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+MoveResult = namedtuple(
+    "MoveResult", ["wrt", "pk", "old_position", "new_position", "shifted", "shift"]
+)
+MoveResult.__doc__ = """
+The change made to an ordered list by moving one of its objects.
+
+``wrt`` is the ``order_with_respect_to`` mapping of the list, ``pk`` the moved
+object and ``old_position`` and ``new_position`` its positions before and
+after the move. The other objects whose positions were in the half-open range
+``shifted = (start, stop)`` before the move had ``shift`` added to their
+positions: -1 or 1 when a range moved up or down, the distance between the two
+objects for a ``swap()``, and 0 when nothing moved.
+"""
+
+
 class OrderedModelQuerySet(models.QuerySet):
     def _get_order_field_name(self):
         return self.model.order_field_name
@@ -56,6 +101,43 @@ class OrderedModelQuerySet(models.QuerySet):
         order = self.get_max_order()
         return order + 1 if order is not None else 0
 
+    def get_ordered_pks(self, **wrt):
+        """
+        Return the pks of the ``order_with_respect_to`` group given as keyword
+        arguments, in order. When the model sets ``order_cache_alias``, the list
+        is kept in that cache and only queried again after a change.
+        """
+        wrt = self.model._get_ordering_model()._normalize_wrt(wrt)
+        group_qs = self._get_group_queryset(wrt)
+        model = group_qs.model
+        if model.order_cache_alias is None:
+            return list(
+                group_qs.order_by(*self._get_position_field_names()).values_list(
+                    "pk", flat=True
+                )
+            )
+        cache = caches[model.order_cache_alias]
+        key, generation_key = model._get_order_cache_keys(wrt)
+        cached = cache.get_many([key, generation_key])
+        generation = cached.get(generation_key)
+        if generation is not None and key in cached:
+            cached_generation, pks = cached[key]
+            if cached_generation == generation:
+                return list(pks)
+        if generation is None:
+            cache.add(generation_key, random.getrandbits(48), None)
+            generation = cache.get(generation_key)
+        pks = list(
+            group_qs.order_by(*self._get_position_field_names()).values_list(
+                "pk", flat=True
+            )
+        )
+        cache.set(key, (generation, pks))
+        return pks
+
+    def _invalidate_order_cache(self, wrts):
+        self.model._get_ordering_model().invalidate_order_cache(wrts, using=self.db)
+
     def above(self, order, inclusive=False):
         """Filter items above order."""
         lookup = "gte" if inclusive else "gt"
@@ -84,7 +166,9 @@ class OrderedModelQuerySet(models.QuerySet):
         update_kwargs = {order_field_name: F(order_field_name) - 1}
         if extra_kwargs:
             update_kwargs.update(extra_kwargs)
-        return self.update(**update_kwargs)
+        rows = self.update(**update_kwargs)
+        record_rows(rows)
+        return rows
 
     def increase_order(self, **extra_kwargs):
         """Increase `order_field_name` value by 1."""
@@ -92,23 +176,237 @@ class OrderedModelQuerySet(models.QuerySet):
         update_kwargs = {order_field_name: F(order_field_name) + 1}
         if extra_kwargs:
             update_kwargs.update(extra_kwargs)
-        return self.update(**update_kwargs)
+        rows = self.update(**update_kwargs)
+        record_rows(rows)
+        return rows
+
+    def _get_position_field_names(self):
+        return [self._get_order_field_name()]
+
+    def reorder(self, pks, extra_update=None):
+        """
+        Reorder the objects with the given pks, which must belong to the same
+        ``order_with_respect_to`` group, so that they appear in the given order
+        within the positions they already occupy. The change is applied with a
+        single UPDATE. Returns a ``{pk: order}`` mapping of the new order values.
+        """
+        self._for_write = True
+        with _atomic_block(self.db):
+            return self._reorder(pks, extra_update)
+
+    def _get_slot_positions(self, wrt, slots):
+        # {slot: position} of position field tuples of the group
+        return {slot: slot[-1] for slot in slots}
+
+    def _reorder(self, pks, extra_update=None, send_signals=True):
+        pk_field = self.model._meta.pk
+        pks = [pk_field.to_python(pk) for pk in pks]
+        fields = self._get_position_field_names()
+        wrt_names = list(self.model.get_order_with_respect_to())
+        with track("reorder", self.model, using=self.db):
+            rows = list(self.filter(pk__in=pks).values_list("pk", *fields, *wrt_names))
+            current = {row[0]: tuple(row[1 : len(fields) + 1]) for row in rows}
+            if len(current) != len(pks) or len(set(pks)) != len(pks):
+                raise ValueError(
+                    "reorder() needs distinct pks of existing {0!r} objects.".format(
+                        self.model
+                    )
+                )
+            if len({row[len(fields) + 1 :] for row in rows}) > 1:
+                raise ValueError(
+                    "reorder() can only reorder objects with equal {0!s} fields.".format(
+                        " and ".join(["'{}'".format(o) for o in wrt_names])
+                    )
+                )
+
+            slots = dict(zip(pks, sorted(current.values())))
+            changed = [pk for pk in pks if current[pk] != slots[pk]]
+            if changed:
+                wrt = dict(zip(wrt_names, rows[0][len(fields) + 1 :]))
+                model = self.model._get_ordering_model()
+                send_signals = send_signals and model._has_move_listeners()
+                if send_signals:
+                    position_of = self._get_slot_positions(wrt, current.values())
+                    old = {pk: position_of[current[pk]] for pk in changed}
+                    new = {pk: position_of[slots[pk]] for pk in changed}
+                    model._send_pre_move(wrt, changed, self.db)
+                update_kwargs = dict(extra_update or {})
+                for i, field_name in enumerate(fields):
+                    update_kwargs[field_name] = Case(
+                        *[When(pk=pk, then=Value(slots[pk][i])) for pk in changed],
+                        output_field=self.model._meta.get_field(field_name),
+                    )
+                self.filter(pk__in=changed).update(**update_kwargs)
+                record_rows(len(changed))
+                self._invalidate_order_cache([wrt])
+                if send_signals:
+                    model._send_post_move(wrt, old, new, self.db)
+        return {pk: slots[pk][-1] for pk in pks}
+
+    def _get_group_queryset(self, wrt):
+        # the whole ordered list, as OrderedModelBase.get_ordering_queryset()
+        model = self.model._get_ordering_model()
+        return model._meta.default_manager.db_manager(self.db).filter(**wrt)
+
+    def _get_selected_groups(self, pks):
+        # [(wrt mapping, {pk: order} in their current order)] of the given pks
+        order_field_name = self._get_order_field_name()
+        wrt_names = list(self.model.get_order_with_respect_to())
+        groups = {}
+        for row in (
+            self.filter(pk__in=pks)
+            .order_by(*self._get_position_field_names())
+            .values_list("pk", order_field_name, *wrt_names)
+        ):
+            groups.setdefault(row[2:], {})[row[0]] = row[1]
+        return [
+            (dict(zip(wrt_names, values)), orders) for values, orders in groups.items()
+        ]
+
+    def _set_group_positions(self, group_qs, wrt, orders, targets, extra_update=None):
+        # move the objects of one group from their current orders to the target
+        # positions, given as {pk: order} dicts in ascending order, shifting the
+        # other objects of group_qs around them with a single UPDATE. The move
+        # signals are only sent when an object changes position
+        order_field_name = self._get_order_field_name()
+        order_lookup = self._get_order_field_lookup
+        field = self.model._meta.get_field(order_field_name)
+        selected = list(orders.values())
+        slots = sorted(targets.values())
+        if orders == targets:
+            return
+        model = group_qs.model
+        model._send_pre_move(wrt, list(targets), self.db)
+
+        # an unselected object is preceded by `up` selected objects before the
+        # move and by `down` of them after it
+        up = [
+            When(Q(**{order_lookup("gt"): o}), then=Value(i + 1))
+            for i, o in enumerate(selected)
+        ]
+        down = []
+        for i, slot in enumerate(slots):
+            # the first unselected object with at least `slot - i` unselected
+            # objects before it
+            first = slot - i
+            for o in selected:
+                if o <= first:
+                    first += 1
+            down.append(When(Q(**{order_lookup("gte"): first}), then=Value(i + 1)))
+        update_kwargs = dict(extra_update or {})
+        update_kwargs[order_field_name] = Case(
+            *[When(pk=pk, then=Value(order)) for pk, order in targets.items()],
+            default=F(order_field_name)
+            - Case(*reversed(up), default=Value(0), output_field=field)
+            + Case(*reversed(down), default=Value(0), output_field=field),
+            output_field=field,
+        )
+        rows = group_qs.filter(
+            **{
+                order_lookup("gte"): min(selected[0], slots[0]),
+                order_lookup("lte"): max(selected[-1], slots[-1]),
+            }
+        ).update(**update_kwargs)
+        record_rows(rows)
+        model._send_post_move(wrt, orders, targets, self.db)
+
+    def set_positions(self, positions, extra_update=None):
+        """
+        Move objects to the positions of a ``{pk: position}`` mapping within
+        their ``order_with_respect_to`` groups, the other objects keeping their
+        relative order around them. Positions past the end of a group move the
+        objects to the bottom. Each group is shifted with a single UPDATE.
+        Returns a ``{pk: order}`` mapping of the new order values.
+        """
+        self._for_write = True
+        pk_field = self.model._meta.pk
+        positions = {pk_field.to_python(pk): p for pk, p in positions.items()}
+        result = {}
+        with track("set_positions", self.model, using=self.db), _atomic_block(self.db):
+            groups = self._get_selected_groups(list(positions))
+            if sum(len(orders) for wrt, orders in groups) != len(positions):
+                raise ValueError(
+                    "set_positions() needs pks of existing {0!r} objects.".format(
+                        self.model
+                    )
+                )
+            for wrt, orders in groups:
+                requested = sorted(orders, key=positions.__getitem__)
+                values = [positions[pk] for pk in requested]
+                if len(set(values)) != len(values) or values[0] < 0:
+                    raise ValueError(
+                        "set_positions() needs distinct positive positions within each group."
+                    )
+                group_qs = self._get_group_queryset(wrt)
+                last = group_qs.count() - len(requested)
+                targets = {
+                    pk: min(position, last + i)
+                    for i, (pk, position) in enumerate(zip(requested, values))
+                }
+                self._set_group_positions(group_qs, wrt, orders, targets, extra_update)
+                result.update(targets)
+            self._invalidate_order_cache([wrt for wrt, orders in groups])
+        return result
+
+    def move_block(self, pks, position=None, extra_update=None):
+        """
+        Move the objects with the given pks as a block, keeping their relative
+        order, so that the first of them is at ``position`` within its
+        ``order_with_respect_to`` group, or at the bottom if ``position`` is
+        None. Each group is shifted with a single UPDATE. Returns a
+        ``{pk: order}`` mapping of the new order values.
+        """
+        self._for_write = True
+        result = {}
+        with track("move_block", self.model, using=self.db), _atomic_block(self.db):
+            groups = self._get_selected_groups(pks)
+            for wrt, orders in groups:
+                group_qs = self._get_group_queryset(wrt)
+                if position is None or position > 0:
+                    last = group_qs.count() - len(orders)
+                    p = last if position is None else min(position, last)
+                else:
+                    p = 0
+                targets = dict(zip(orders, range(p, p + len(orders))))
+                self._set_group_positions(group_qs, wrt, orders, targets, extra_update)
+                result.update(targets)
+            self._invalidate_order_cache([wrt for wrt, orders in groups])
+        return result
 
     def bulk_create(self, objs, *args, **kwargs):
         order_field_name = self._get_order_field_name()
         order_with_respect_to = self.model.get_order_with_respect_to()
         objs = list(objs)
-        order_with_respect_to_mapping = {}
-        for obj in objs:
-            key = frozenset(obj._wrt_map().items())
-            if key in order_with_respect_to_mapping:
-                order_with_respect_to_mapping[key] += 1
-            else:
-                order_with_respect_to_mapping[key] = self.filter(
-                    **obj._wrt_map()
-                ).get_next_order()
-            setattr(obj, order_field_name, order_with_respect_to_mapping[key])
-        return super().bulk_create(objs, *args, **kwargs)
+        self._for_write = True
+        with track("bulk_create", self.model, using=self.db), _atomic_block(self.db):
+            order_with_respect_to_mapping = {}
+            for obj in objs:
+                key = frozenset(obj._wrt_map().items())
+                if key in order_with_respect_to_mapping:
+                    order_with_respect_to_mapping[key] += 1
+                else:
+                    order_with_respect_to_mapping[key] = self.filter(
+                        **obj._wrt_map()
+                    ).get_next_order()
+                setattr(obj, order_field_name, order_with_respect_to_mapping[key])
+            record_rows(len(objs))
+            sizes = self._get_group_sizes(order_with_respect_to_mapping)
+            objs = super().bulk_create(objs, *args, **kwargs)
+            self._invalidate_order_cache(
+                [dict(key) for key in order_with_respect_to_mapping]
+            )
+            if sizes is not None:
+                self.model._get_ordering_model()._send_post_bulk_create(
+                    objs, sizes, self.db
+                )
+            return objs
+
+    def _get_group_sizes(self, keys):
+        # the sizes of the groups objects are bulk inserted into, only counted
+        # when there are post_bulk_create receivers to send their positions to
+        if not post_bulk_create.has_listeners(self.model._get_ordering_model()):
+            return None
+        return {key: self.filter(**dict(key)).count() for key in keys}
 
 
 class OrderedModelManager(models.Manager.from_queryset(OrderedModelQuerySet)):
@@ -126,6 +424,12 @@ class OrderedModelBase(models.Model):
     [optional]
      - set ``order_with_respect_to`` to limit order to a subset
      - specify ``order_class_path`` in case of polymorphic classes
+     - set ``order_cache_alias`` to keep the ordered pks of each group in
+       that cache, see ``OrderedModelQuerySet.get_ordered_pks()``
+     - set ``order_change_log`` to log the changes made to the ordering in
+       ``ordered_model.changelog.models.OrderingChange``
+     - set ``order_version_cache_alias`` to keep a version of each group in
+       that cache, see ``ordered_model.versions``
     """
 
     objects = OrderedModelManager()
@@ -133,13 +437,16 @@ class OrderedModelBase(models.Model):
     order_field_name = None
     order_with_respect_to = None
     order_class_path = None
+    order_cache_alias = None
+    order_change_log = False
+    order_version_cache_alias = None
 
     class Meta:
         abstract = True
 
     def __init__(self, *args, **kwargs):
         super(OrderedModelBase, self).__init__(*args, **kwargs)
-        self._original_wrt_map = self._wrt_map()
+        self._original_wrt_values = self._get_wrt_values()
 
     def _wrt_map(self):
         d = {}
@@ -147,6 +454,210 @@ class OrderedModelBase(models.Model):
             d[order_wrt_name] = get_lookup_value(self, order_wrt_name, use_fkid=True)
         return d
 
+    @classmethod
+    def _get_wrt_fields(cls):
+        # [(name, first field, rest of the path)] of the order_with_respect_to
+        # paths, looked up once per class
+        cached = cls.__dict__.get("_wrt_fields")
+        if cached is None or cached[0] != cls.order_with_respect_to:
+            fields = []
+            for name in cls.get_order_with_respect_to():
+                first, _, rest = name.partition(LOOKUP_SEP)
+                fields.append((name, cls._meta.get_field(first), rest))
+            cached = (cls.order_with_respect_to, fields)
+            cls._wrt_fields = cached
+        return cached[1]
+
+    def _get_wrt_values(self):
+        # the values of the fields starting the order_with_respect_to paths,
+        # read without following relations so that building an instance, e.g.
+        # for each row of a fixture, stays cheap
+        return tuple(
+            self.__dict__.get(field.attname, DEFERRED)
+            for name, field, rest in self._get_wrt_fields()
+        )
+
+    def _get_original_wrt_map(self, using=None):
+        # the order_with_respect_to mapping of the group this object was in
+        # when it was built or last saved, deeper paths being followed from
+        # the original values of their first field
+        d = {}
+        for (name, field, rest), value in zip(
+            self._get_wrt_fields(), self._original_wrt_values
+        ):
+            if value is DEFERRED:
+                value = (
+                    type(self)
+                    ._base_manager.db_manager(using)
+                    .filter(pk=self.pk)
+                    .values_list(field.attname, flat=True)
+                    .first()
+                )
+            if rest and value is not None:
+                value = (
+                    field.remote_field.model._base_manager.db_manager(using)
+                    .filter(**{field.remote_field.field_name: value})
+                    .values_list(rest, flat=True)
+                    .first()
+                )
+            d[name] = value
+        return d
+
+    def _get_changed_original_wrt_map(self, using=None):
+        # the original order_with_respect_to mapping if this object changed
+        # group, None otherwise. The objects further down deeper paths are
+        # taken as unchanged when the first field of the path is
+        if self._get_wrt_values() == self._original_wrt_values:
+            return None
+        original = self._get_original_wrt_map(using)
+        return None if original == self._wrt_map() else original
+
+    @classmethod
+    def _get_ordering_model(cls):
+        # the model whose objects form the ordered lists, order_class_path
+        # being imported once per class rather than on every call
+        cached = cls.__dict__.get("_ordering_model")
+        if cached is None or cached[0] != cls.order_class_path:
+            path = cls.order_class_path
+            cached = (path, import_string(path) if path else cls)
+            cls._ordering_model = cached
+        return cached[1]
+
+    @classmethod
+    def _normalize_wrt(cls, wrt):
+        # an order_with_respect_to mapping given as lookups, in the shape of
+        # _wrt_map(): "x_id" keys as "x" and model instances as their key
+        names = cls.get_order_with_respect_to()
+        d = {}
+        for key, value in wrt.items():
+            if key not in names and key.endswith("_id") and key[:-3] in names:
+                key = key[:-3]
+            if isinstance(value, models.Model):
+                field = cls._get_wrt_leaf_field(key)
+                if isinstance(field, ForeignKey):
+                    value = getattr(value, field.target_field.attname)
+                else:
+                    value = value.pk
+            d[key] = value
+        if set(d) != set(names):
+            raise ValueError(
+                "Expected the {0!s} fields of {1!r}, got {2!s}.".format(
+                    " and ".join(["'{}'".format(o) for o in names]),
+                    cls,
+                    " and ".join(["'{}'".format(o) for o in wrt]),
+                )
+            )
+        return d
+
+    @classmethod
+    def _get_wrt_leaf_field(cls, name):
+        model = cls
+        for p in name.split(LOOKUP_SEP):
+            field = model._meta.get_field(p)
+            if field.is_relation:
+                model = field.related_model
+        return field
+
+    @classmethod
+    def _get_order_cache_keys(cls, wrt):
+        prefix = "ordered_model:pks:{}".format(cls._meta.label)
+        group = hashlib.md5(repr(sorted(wrt.items())).encode()).hexdigest()
+        return "{}:{}".format(prefix, group), "{}:generation".format(prefix)
+
+    @classmethod
+    def invalidate_order_cache(cls, wrts=None, using=None):
+        """
+        Drop the cached ordered pks of the given ``order_with_respect_to``
+        groups, or of every group when ``wrts`` is None. Inside a transaction,
+        they are dropped again when it commits.
+        """
+        if cls.order_cache_alias is None:
+            return
+        cache = caches[cls.order_cache_alias]
+        if wrts is None:
+            generation_key = cls._get_order_cache_keys({})[1]
+
+            def invalidate():
+                cache.set(generation_key, random.getrandbits(48), None)
+
+        else:
+            keys = [cls._get_order_cache_keys(wrt)[0] for wrt in wrts]
+
+            def invalidate():
+                cache.delete_many(keys)
+
+        invalidate()
+        using = using or router.db_for_write(cls)
+        if connections[using].in_atomic_block:
+            transaction.on_commit(invalidate, using=using)
+
+    @classmethod
+    def _has_move_listeners(cls):
+        return pre_move.has_listeners(cls) or post_move.has_listeners(cls)
+
+    @classmethod
+    def _send_pre_move(cls, wrt, pks, using):
+        if pre_move.has_listeners(cls):
+            pre_move.send(sender=cls, wrt=wrt, pks=pks, using=using)
+
+    @classmethod
+    def _send_post_move(cls, wrt, old, new, using):
+        # old and new are {pk: position} mappings of the moved objects
+        if post_move.has_listeners(cls):
+            post_move.send(
+                sender=cls,
+                wrt=wrt,
+                pks=list(old),
+                positions={pk: (old[pk], new[pk]) for pk in old},
+                shifted=get_shifted_ranges(old, new),
+                using=using,
+            )
+
+    @classmethod
+    def _send_post_bulk_create(cls, objs, sizes, using):
+        # sizes are the {group key: size} of the groups before the insert;
+        # nothing is sent when the database did not set the pks of the objects
+        if any(obj.pk is None for obj in objs):
+            return
+        positions = {}
+        for obj in objs:
+            key = frozenset(obj._wrt_map().items())
+            group = positions.setdefault(key, {})
+            group[obj.pk] = sizes[key] + len(group)
+        for key, group in positions.items():
+            post_bulk_create.send(
+                sender=cls, wrt=dict(key), positions=group, using=using
+            )
+
+    def _invalidate_order_cache(self, *wrts):
+        model = self._get_ordering_model()
+        if model.order_cache_alias is not None:
+            model.invalidate_order_cache(
+                wrts or [self._wrt_map()], using=self._state.db
+            )
+
+    def _get_move_result(self, old_position, new_position):
+        # the result of moving this object, the objects in between shifting
+        if new_position < old_position:
+            shifted, shift = (new_position, old_position), 1
+        elif new_position > old_position:
+            shifted, shift = (old_position + 1, new_position + 1), -1
+        else:
+            shifted, shift = (old_position, old_position), 0
+        return MoveResult(
+            self._wrt_map(), self.pk, old_position, new_position, shifted, shift
+        )
+
+    def _get_swap_result(self, old_position, new_position):
+        return MoveResult(
+            self._wrt_map(),
+            self.pk,
+            old_position,
+            new_position,
+            (new_position, new_position + 1),
+            old_position - new_position,
+        )
+
     def _get_related_objects(self):
         # slow path, for use in the admin which requires the objects
         # expected to generate extra queries
@@ -156,7 +667,7 @@ class OrderedModelBase(models.Model):
         ]
 
     @classmethod
-    def _on_ordered_model_delete(cls, sender=None, instance=None, **kwargs):
+    def _on_ordered_model_delete(cls, sender=None, instance=None, using=None, **kwargs):
         """
         This signal handler makes sure that when an OrderedModelBase is deleted via
         cascade database deletes, or queryset delete that the models keep order.
@@ -165,15 +676,22 @@ class OrderedModelBase(models.Model):
         if getattr(instance, "_was_deleted_via_delete_method", False):
             return
 
-        # upshuffle logic from OrderedModelBase.delete can't be used here because signal
-        # handlers run per instance, but not necessarily in the right order
-        qs = instance.get_ordering_queryset().only("pk", instance.order_field_name)
-        to_update = set()
-        for i, item in enumerate(qs):
-            if getattr(item, instance.order_field_name) != i:
-                setattr(item, instance.order_field_name, i)
-                to_update.add(item)
-        qs.bulk_update(to_update, (instance.order_field_name,))
+        with track(
+            "delete_compaction", type(instance), instance._wrt_map(), instance._state.db
+        ):
+            # upshuffle logic from OrderedModelBase.delete can't be used here because signal
+            # handlers run per instance, but not necessarily in the right order
+            qs = instance.get_ordering_queryset(using=using).only(
+                "pk", instance.order_field_name
+            )
+            to_update = set()
+            for i, item in enumerate(qs):
+                if getattr(item, instance.order_field_name) != i:
+                    setattr(item, instance.order_field_name, i)
+                    to_update.add(item)
+            qs.bulk_update(to_update, (instance.order_field_name,))
+            record_rows(len(to_update))
+        instance._invalidate_order_cache()
 
         setattr(instance, "_was_deleted_via_delete_method", True)
 
@@ -200,55 +718,101 @@ class OrderedModelBase(models.Model):
                 )
             )
 
-    def get_ordering_queryset(self, qs=None, wrt=None):
+    def get_ordering_queryset(self, qs=None, wrt=None, using=None):
+        """
+        Get the queryset of this object's ordered stack. Unless pinned to the
+        ``using`` database, its reads and writes are routed by the database
+        routers with this object as hint.
+        """
         if qs is None:
-            if self.order_class_path:
-                model = import_string(self.order_class_path)
-                qs = model._meta.default_manager.all()
-            else:
-                qs = self._meta.default_manager.all()
+            manager = self._get_ordering_model()._meta.default_manager
+            qs = manager.db_manager(using, hints={"instance": self}).all()
+        elif using is not None:
+            qs = qs.using(using)
         if wrt:
             return qs.filter(**wrt)
         return qs.filter(**self._wrt_map())
 
-    def previous(self):
+    def _get_write_db(self, using=None):
+        # the database changes are written to, which they also read the rows
+        # they shift from, rather than from a possibly lagging replica
+        return using or router.db_for_write(type(self), instance=self)
+
+    def previous(self, using=None):
         """
         Get previous element in this object's ordered stack.
         """
-        return self.get_ordering_queryset().below_instance(self).last()
+        return self.get_ordering_queryset(using=using).below_instance(self).last()
 
-    def next(self):
+    def next(self, using=None):
         """
         Get next element in this object's ordered stack.
         """
-        return self.get_ordering_queryset().above_instance(self).first()
+        return self.get_ordering_queryset(using=using).above_instance(self).first()
+
+    def get_position(self, using=None):
+        """
+        Get the position of this object within its ordered stack.
+        """
+        return getattr(self, self.order_field_name)
 
-    def save(self, *args, **kwargs):
+    @instrumented("save")
+    @_atomic
+    def save(self, *args, trusted_order=False, **kwargs):
         order_field_name = self.order_field_name
-        wrt_changed = self._wrt_map() != self._original_wrt_map
+        if trusted_order and getattr(self, order_field_name) is not None:
+            # the caller vouches for the order and the group, e.g. when
+            # importing rows already ordered: skip the ordering bookkeeping
+            return self._save_trusted(models.Model.save, *args, **kwargs)
+        using = self._get_write_db(kwargs.get("using"))
+        original_wrt = self._get_changed_original_wrt_map(using)
+        wrt_changed = original_wrt is not None
 
         if wrt_changed and getattr(self, order_field_name) is not None:
             # do delete-like upshuffle using original_wrt values!
-            qs = self.get_ordering_queryset(wrt=self._original_wrt_map)
+            qs = self.get_ordering_queryset(wrt=original_wrt, using=using)
             qs.above_instance(self).decrease_order()
 
         if getattr(self, order_field_name) is None or wrt_changed:
-            order = self.get_ordering_queryset().get_next_order()
+            order = self.get_ordering_queryset(using=using).get_next_order()
             setattr(self, order_field_name, order)
         super().save(*args, **kwargs)
 
-        self._original_wrt_map = self._wrt_map()
+        if wrt_changed:
+            self._invalidate_order_cache(original_wrt, self._wrt_map())
+        else:
+            self._invalidate_order_cache()
+        self._original_wrt_values = self._get_wrt_values()
+
+    def _save_trusted(self, save, *args, **kwargs):
+        # save with the order given by the caller, only dropping the cached
+        # lists of the groups the object is in and possibly left
+        wrts = []
+        if self._get_ordering_model().order_cache_alias is not None:
+            wrts.append(self._wrt_map())
+            original_wrt = self._get_changed_original_wrt_map(kwargs.get("using"))
+            if original_wrt is not None:
+                wrts.append(original_wrt)
+        save(self, *args, **kwargs)
+        self._invalidate_order_cache(*wrts)
+        self._original_wrt_values = self._get_wrt_values()
 
+    @instrumented("delete")
+    @_atomic
     def delete(self, *args, extra_update=None, **kwargs):
         # Flag re-ordering performed so that post_delete signal
         # does not duplicate the re-ordering. See signals.py
         self._was_deleted_via_delete_method = True
 
-        qs = self.get_ordering_queryset()
+        qs = self.get_ordering_queryset(using=self._get_write_db(kwargs.get("using")))
         extra_update = {} if extra_update is None else extra_update
         qs.above_instance(self).decrease_order(**extra_update)
-        return super().delete(*args, **kwargs)
+        result = super().delete(*args, **kwargs)
+        self._invalidate_order_cache()
+        return result
 
+    @instrumented("swap")
+    @_atomic
     def swap(self, replacement):
         """
         Swap the position of this object with a replacement object.
@@ -260,27 +824,45 @@ class OrderedModelBase(models.Model):
             getattr(self, order_field_name),
             getattr(replacement, order_field_name),
         )
+        old = {self.pk: order, replacement.pk: replacement_order}
+        model = self._get_ordering_model()
+        model._send_pre_move(self._wrt_map(), list(old), self._state.db)
         setattr(self, order_field_name, replacement_order)
         setattr(replacement, order_field_name, order)
         self.save()
         replacement.save()
+        new = {self.pk: replacement_order, replacement.pk: order}
+        model._send_post_move(self._wrt_map(), old, new, self._state.db)
+        return self._get_swap_result(order, replacement_order)
 
+    @instrumented("up")
+    @_atomic
     def up(self):
         """
         Move this object up one position.
         """
-        previous = self.previous()
+        using = self._get_write_db()
+        previous = self.previous(using=using)
         if previous:
-            self.swap(previous)
+            return self.swap(previous)
+        position = self.get_position(using=using)
+        return self._get_move_result(position, position)
 
+    @instrumented("down")
+    @_atomic
     def down(self):
         """
         Move this object down one position.
         """
-        _next = self.next()
+        using = self._get_write_db()
+        _next = self.next(using=using)
         if _next:
-            self.swap(_next)
+            return self.swap(_next)
+        position = self.get_position(using=using)
+        return self._get_move_result(position, position)
 
+    @instrumented("to")
+    @_atomic
     def to(self, order, extra_update=None):
         """
         Move object to a certain position, updating all affected objects to move accordingly up or down.
@@ -293,12 +875,15 @@ class OrderedModelBase(models.Model):
             )
 
         order_field_name = self.order_field_name
-        if order is None or getattr(self, order_field_name) == order:
+        old_order = getattr(self, order_field_name)
+        if order is None or old_order == order:
             # object is already at desired position
-            return
-        qs = self.get_ordering_queryset()
+            return self._get_move_result(old_order, old_order)
+        model = self._get_ordering_model()
+        model._send_pre_move(self._wrt_map(), [self.pk], self._state.db)
+        qs = self.get_ordering_queryset(using=self._get_write_db())
         extra_update = {} if extra_update is None else extra_update
-        if getattr(self, order_field_name) > order:
+        if old_order > order:
             qs.below_instance(self).above(order, inclusive=True).increase_order(
                 **extra_update
             )
@@ -308,7 +893,13 @@ class OrderedModelBase(models.Model):
             )
         setattr(self, order_field_name, order)
         self.save()
+        model._send_post_move(
+            self._wrt_map(), {self.pk: old_order}, {self.pk: order}, self._state.db
+        )
+        return self._get_move_result(old_order, order)
 
+    @instrumented("above")
+    @_atomic
     def above(self, ref, extra_update=None):
         """
         Move this object above the referenced object.
@@ -316,13 +907,16 @@ class OrderedModelBase(models.Model):
         self._validate_ordering_reference(ref)
         order_field_name = self.order_field_name
         if getattr(self, order_field_name) == getattr(ref, order_field_name):
-            return
+            return self._get_move_result(self.get_position(), self.get_position())
         if getattr(self, order_field_name) > getattr(ref, order_field_name):
             o = getattr(ref, order_field_name)
         else:
-            o = self.get_ordering_queryset().below_instance(ref).get_max_order() or 0
-        self.to(o, extra_update=extra_update)
+            qs = self.get_ordering_queryset(using=self._get_write_db())
+            o = qs.below_instance(ref).get_max_order() or 0
+        return self.to(o, extra_update=extra_update)
 
+    @instrumented("below")
+    @_atomic
     def below(self, ref, extra_update=None):
         """
         Move this object below the referenced object.
@@ -330,26 +924,31 @@ class OrderedModelBase(models.Model):
         self._validate_ordering_reference(ref)
         order_field_name = self.order_field_name
         if getattr(self, order_field_name) == getattr(ref, order_field_name):
-            return
+            return self._get_move_result(self.get_position(), self.get_position())
         if getattr(self, order_field_name) > getattr(ref, order_field_name):
-            o = self.get_ordering_queryset().above_instance(ref).get_min_order() or 0
+            qs = self.get_ordering_queryset(using=self._get_write_db())
+            o = qs.above_instance(ref).get_min_order() or 0
         else:
             o = getattr(ref, order_field_name)
-        self.to(o, extra_update=extra_update)
+        return self.to(o, extra_update=extra_update)
 
+    @instrumented("top")
+    @_atomic
     def top(self, extra_update=None):
         """
         Move this object to the top of the ordered stack.
         """
-        o = self.get_ordering_queryset().get_min_order()
-        self.to(o, extra_update=extra_update)
+        o = self.get_ordering_queryset(using=self._get_write_db()).get_min_order()
+        return self.to(o, extra_update=extra_update)
 
+    @instrumented("bottom")
+    @_atomic
     def bottom(self, extra_update=None):
         """
         Move this object to the bottom of the ordered stack.
         """
-        o = self.get_ordering_queryset().get_max_order()
-        self.to(o, extra_update=extra_update)
+        o = self.get_ordering_queryset(using=self._get_write_db()).get_max_order()
+        return self.to(o, extra_update=extra_update)
 
     @classmethod
     def check(cls, **kwargs):
@@ -439,6 +1038,35 @@ class OrderedModelBase(models.Model):
         except ValueError:
             # already handled by type checks for E002
             pass
+
+        if cls.order_class_path:
+            try:
+                model = cls._get_ordering_model()
+            except ImportError as e:
+                errors.append(
+                    checks.Error(
+                        "OrderedModelBase subclass order_class_path '{0}' cannot be imported: {1}".format(
+                            cls.order_class_path, e
+                        ),
+                        obj=str(cls.__qualname__),
+                        id="ordered_model.E010",
+                    )
+                )
+            else:
+                if not (
+                    isinstance(model, type)
+                    and issubclass(model, OrderedModelBase)
+                    and issubclass(cls, model)
+                ):
+                    errors.append(
+                        checks.Error(
+                            "OrderedModelBase subclass order_class_path '{0}' is not an ordered model the subclass inherits from.".format(
+                                cls.order_class_path
+                            ),
+                            obj=str(cls.__qualname__),
+                            id="ordered_model.E011",
+                        )
+                    )
         return errors
 
 
@@ -454,3 +1082,629 @@ class OrderedModel(OrderedModelBase):
     class Meta:
         abstract = True
         ordering = ("order",)
+
+
+class BucketedOrderedModelQuerySet(OrderedModelQuerySet):
+    def _get_bucket_field_name(self):
+        return self.model.bucket_field_name
+
+    def _get_position_field_names(self):
+        return [self._get_bucket_field_name(), self._get_order_field_name()]
+
+    def get_max_bucket(self):
+        bucket_field_name = self._get_bucket_field_name()
+        return self.aggregate(Max(bucket_field_name)).get(
+            LOOKUP_SEP.join([bucket_field_name, "max"])
+        )
+
+    def get_bucket_sizes(self):
+        """Return a list of ``(bucket, size)`` pairs, in bucket order."""
+        bucket_field_name = self._get_bucket_field_name()
+        return list(
+            self.order_by(bucket_field_name)
+            .values_list(bucket_field_name)
+            .annotate(size=Count("pk"))
+        )
+
+    def get_tail_slot(self):
+        """Return the ``(bucket, order)`` pair of an item appended to this queryset."""
+        bucket = self.get_max_bucket()
+        if bucket is None:
+            return 0, 0
+        order = self.filter(**{self._get_bucket_field_name(): bucket}).get_max_order()
+        return self.model._get_slot_after(bucket, order)
+
+    def rebalance_buckets(self, batch_size=None):
+        """
+        Repack the items of this queryset (a single ordered list) into evenly
+        filled buckets, keeping their relative order. Returns the updated items.
+        """
+        bucket_field_name = self._get_bucket_field_name()
+        order_field_name = self._get_order_field_name()
+        self._for_write = True
+        to_update = []
+        for position, obj in enumerate(
+            self.order_by(bucket_field_name, order_field_name)
+        ):
+            bucket, order = self.model.get_packed_slot(position)
+            if (getattr(obj, bucket_field_name), getattr(obj, order_field_name)) != (
+                bucket,
+                order,
+            ):
+                setattr(obj, bucket_field_name, bucket)
+                setattr(obj, order_field_name, order)
+                to_update.append(obj)
+        self.bulk_update(
+            to_update, [bucket_field_name, order_field_name], batch_size=batch_size
+        )
+        return to_update
+
+    def _set_group_positions(self, group_qs, wrt, orders, targets, extra_update=None):
+        # positions are logical: the objects are moved one at a time with
+        # _move_to(), which only shifts the items of the buckets involved, in
+        # the ascending order of their targets so that each keeps its place
+        fields = self._get_position_field_names()
+        objs = {obj.pk: obj for obj in group_qs.filter(pk__in=list(targets))}
+        slots = {pk: tuple(getattr(obj, f) for f in fields) for pk, obj in objs.items()}
+        position_of = self._count_slot_positions(group_qs, slots.values())
+        old = {pk: position_of[slot] for pk, slot in slots.items()}
+        if old == targets:
+            return
+        model = group_qs.model
+        model._send_pre_move(wrt, list(targets), self.db)
+
+        moves = [(pk, targets[pk]) for pk in sorted(targets, key=targets.get)]
+        if not self._moves_keep_places(old, moves):
+            # an object would shift one already placed when taken out of the
+            # list: move them all to the bottom first, from where they leave
+            # the earlier ones in place
+            moves = [(pk, None) for pk, position in moves] + moves
+        for i, (pk, position) in enumerate(moves):
+            obj = objs[pk]
+            if i:
+                # the earlier moves may have shifted it
+                obj.refresh_from_db(fields=fields)
+                current = obj.get_position(using=self.db)
+            else:
+                current = old[pk]
+            obj._move_to(position, current, extra_update, send_signals=False)
+        model._send_post_move(wrt, old, targets, self.db)
+
+    @staticmethod
+    def _moves_keep_places(positions, moves):
+        # whether moving the objects to the (pk, position) pairs in turn leaves
+        # each at its position
+        positions = dict(positions)
+        for pk, target in moves:
+            position = positions[pk]
+            for other, p in positions.items():
+                if position < p <= target:
+                    positions[other] = p - 1
+                elif target <= p < position:
+                    positions[other] = p + 1
+            positions[pk] = target
+        return all(positions[pk] == target for pk, target in moves)
+
+    def _count_slot_positions(self, group_qs, slots):
+        # {slot: position} of (bucket, order) slots of group_qs, counting the
+        # items before each with a single query rather than loading the group
+        slots = list(slots)
+        if not slots:
+            return {}
+        bucket_field_name, order_field_name = self._get_position_field_names()
+        filters = [
+            Q(**{LOOKUP_SEP.join([bucket_field_name, "lt"]): bucket})
+            | Q(
+                **{
+                    bucket_field_name: bucket,
+                    LOOKUP_SEP.join([order_field_name, "lt"]): order,
+                }
+            )
+            for bucket, order in slots
+        ]
+        counts = group_qs.filter(reduce(lambda a, b: a | b, filters)).aggregate(
+            **{"p{}".format(i): Count("pk", filter=f) for i, f in enumerate(filters)}
+        )
+        return {slot: counts["p{}".format(i)] for i, slot in enumerate(slots)}
+
+    def _get_slot_positions(self, wrt, slots):
+        return self._count_slot_positions(self._get_group_queryset(wrt), slots)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        bucket_field_name = self._get_bucket_field_name()
+        order_field_name = self._get_order_field_name()
+        objs = list(objs)
+        self._for_write = True
+        with track("bulk_create", self.model, using=self.db), _atomic_block(self.db):
+            tail_slots = {}
+            for obj in objs:
+                key = frozenset(obj._wrt_map().items())
+                if key in tail_slots:
+                    tail_slots[key] = self.model._get_slot_after(*tail_slots[key])
+                else:
+                    tail_slots[key] = self.filter(**obj._wrt_map()).get_tail_slot()
+                setattr(obj, bucket_field_name, tail_slots[key][0])
+                setattr(obj, order_field_name, tail_slots[key][1])
+            record_rows(len(objs))
+            sizes = self._get_group_sizes(tail_slots)
+            # skip OrderedModelQuerySet.bulk_create, which assigns a flat order
+            objs = models.QuerySet.bulk_create(self, objs, *args, **kwargs)
+            self._invalidate_order_cache([dict(key) for key in tail_slots])
+            if sizes is not None:
+                self.model._get_ordering_model()._send_post_bulk_create(
+                    objs, sizes, self.db
+                )
+            return objs
+
+
+class BucketedOrderedModelManager(
+    OrderedModelManager.from_queryset(BucketedOrderedModelQuerySet)
+):
+    pass
+
+
+class BucketedOrderedModelBase(OrderedModelBase):
+    """
+    An abstract model for very large ordered lists. Each list is split into
+    buckets of at most ``bucket_capacity`` items; an item's place is given by a
+    bucket index and its position within that bucket, so a move only shifts
+    rows within one bucket.
+    Usage (See ``BucketedOrderedModel``):
+     - create a model subclassing ``BucketedOrderedModelBase``
+     - add indexed ``PositiveIntegerField`` fields for the bucket and order
+     - set ``bucket_field_name`` and ``order_field_name`` to their names
+     - use both in ``Meta.ordering``, bucket first
+    [optional]
+     - set ``bucket_capacity`` to the maximum number of items per bucket
+     - set ``bucket_spacing`` to the gap left between bucket indices, so that
+       splitting a bucket rarely requires renumbering the whole list
+    """
+
+    objects = BucketedOrderedModelManager()
+
+    bucket_field_name = None
+    bucket_capacity = 1000
+    bucket_spacing = 1024
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_packed_slot(cls, position):
+        """
+        Return the ``(bucket, order)`` pair for ``position`` when a list is
+        packed from scratch. Buckets are filled to half their capacity, leaving
+        room for later inserts.
+        """
+        bucket, order = divmod(position, max(1, cls.bucket_capacity // 2))
+        return bucket * cls.bucket_spacing, order
+
+    @classmethod
+    def _get_slot_after(cls, bucket, order):
+        if order + 1 < cls.bucket_capacity:
+            return bucket, order + 1
+        return bucket + cls.bucket_spacing, 0
+
+    def _get_bucket_queryset(self, qs=None, bucket=None):
+        if qs is None:
+            qs = self.get_ordering_queryset()
+        if bucket is None:
+            bucket = getattr(self, self.bucket_field_name)
+        return qs.filter(**{self.bucket_field_name: bucket})
+
+    @classmethod
+    def _on_ordered_model_delete(cls, sender=None, instance=None, using=None, **kwargs):
+        if getattr(instance, "_was_deleted_via_delete_method", False):
+            return
+
+        bucket_field_name = instance.bucket_field_name
+        order_field_name = instance.order_field_name
+        with track(
+            "delete_compaction", type(instance), instance._wrt_map(), instance._state.db
+        ):
+            qs = instance.get_ordering_queryset(using=using).order_by(
+                bucket_field_name, order_field_name
+            )
+            to_update = set()
+            bucket_sizes = {}
+            for item in qs:
+                bucket = getattr(item, bucket_field_name)
+                order = bucket_sizes.get(bucket, 0)
+                bucket_sizes[bucket] = order + 1
+                if getattr(item, order_field_name) != order:
+                    setattr(item, order_field_name, order)
+                    to_update.add(item)
+            qs.bulk_update(to_update, (order_field_name,))
+            record_rows(len(to_update))
+        instance._invalidate_order_cache()
+
+        setattr(instance, "_was_deleted_via_delete_method", True)
+
+    def _get_position_filter(self, lookup):
+        # items before ("lt") or after ("gt") this object in its ordered list
+        bucket = getattr(self, self.bucket_field_name)
+        return Q(**{LOOKUP_SEP.join([self.bucket_field_name, lookup]): bucket}) | Q(
+            **{
+                self.bucket_field_name: bucket,
+                LOOKUP_SEP.join([self.order_field_name, lookup]): getattr(
+                    self, self.order_field_name
+                ),
+            }
+        )
+
+    def get_position(self, using=None):
+        """
+        Get the position of this object within its whole ordered list.
+        """
+        return (
+            self.get_ordering_queryset(using=using)
+            .filter(self._get_position_filter("lt"))
+            .count()
+        )
+
+    def _get_positions(self, objs, using=None):
+        # the positions of objs with one count, of the items before the last
+        filters = [obj._get_position_filter("lt") for obj in objs]
+        counts = (
+            self.get_ordering_queryset(using=using)
+            .filter(reduce(lambda a, b: a | b, filters))
+            .aggregate(
+                **{
+                    "p{}".format(i): Count("pk", filter=f)
+                    for i, f in enumerate(filters)
+                }
+            )
+        )
+        return [counts["p{}".format(i)] for i in range(len(objs))]
+
+    def _get_next_bucket(self, qs, bucket):
+        return (
+            qs.filter(**{LOOKUP_SEP.join([self.bucket_field_name, "gt"]): bucket})
+            .order_by(self.bucket_field_name)
+            .values_list(self.bucket_field_name, flat=True)
+            .first()
+        )
+
+    def previous(self, using=None):
+        """
+        Get previous element in this object's ordered list.
+        """
+        return (
+            self.get_ordering_queryset(using=using)
+            .filter(self._get_position_filter("lt"))
+            .order_by(self.bucket_field_name, self.order_field_name)
+            .last()
+        )
+
+    def next(self, using=None):
+        """
+        Get next element in this object's ordered list.
+        """
+        return (
+            self.get_ordering_queryset(using=using)
+            .filter(self._get_position_filter("gt"))
+            .order_by(self.bucket_field_name, self.order_field_name)
+            .first()
+        )
+
+    @instrumented("save")
+    @_atomic
+    def save(self, *args, trusted_order=False, **kwargs):
+        bucket_field_name = self.bucket_field_name
+        order_field_name = self.order_field_name
+        unplaced = (
+            getattr(self, bucket_field_name) is None
+            or getattr(self, order_field_name) is None
+        )
+        if trusted_order and not unplaced:
+            return self._save_trusted(models.Model.save, *args, **kwargs)
+        using = self._get_write_db(kwargs.get("using"))
+        original_wrt = self._get_changed_original_wrt_map(using)
+        wrt_changed = original_wrt is not None
+
+        if wrt_changed and not unplaced:
+            # close the gap left in the bucket of the original list
+            qs = self.get_ordering_queryset(wrt=original_wrt, using=using)
+            self._get_bucket_queryset(qs).above_instance(self).decrease_order()
+
+        if unplaced or wrt_changed:
+            bucket, order = self.get_ordering_queryset(using=using).get_tail_slot()
+            setattr(self, bucket_field_name, bucket)
+            setattr(self, order_field_name, order)
+        # skip OrderedModelBase.save, which assigns a flat order
+        models.Model.save(self, *args, **kwargs)
+
+        if wrt_changed:
+            self._invalidate_order_cache(original_wrt, self._wrt_map())
+        else:
+            self._invalidate_order_cache()
+        self._original_wrt_values = self._get_wrt_values()
+
+    @instrumented("delete")
+    @_atomic
+    def delete(self, *args, extra_update=None, **kwargs):
+        # Flag re-ordering performed so that post_delete signal
+        # does not duplicate the re-ordering.
+        self._was_deleted_via_delete_method = True
+
+        extra_update = {} if extra_update is None else extra_update
+        qs = self.get_ordering_queryset(using=self._get_write_db(kwargs.get("using")))
+        self._get_bucket_queryset(qs).above_instance(self).decrease_order(
+            **extra_update
+        )
+        result = models.Model.delete(self, *args, **kwargs)
+        self._invalidate_order_cache()
+        return result
+
+    @instrumented("swap")
+    @_atomic
+    def swap(self, replacement):
+        """
+        Swap the position of this object with a replacement object.
+        """
+        self._validate_ordering_reference(replacement)
+
+        position, replacement_position = self._get_positions(
+            [self, replacement], using=self._get_write_db()
+        )
+        old = {self.pk: position, replacement.pk: replacement_position}
+        model = self._get_ordering_model()
+        model._send_pre_move(self._wrt_map(), list(old), self._state.db)
+        for field_name in (self.bucket_field_name, self.order_field_name):
+            value, replacement_value = (
+                getattr(self, field_name),
+                getattr(replacement, field_name),
+            )
+            setattr(self, field_name, replacement_value)
+            setattr(replacement, field_name, value)
+        self.save()
+        replacement.save()
+        new = {self.pk: replacement_position, replacement.pk: position}
+        model._send_post_move(self._wrt_map(), old, new, self._state.db)
+        return self._get_swap_result(position, replacement_position)
+
+    @instrumented("to")
+    @_atomic
+    def to(self, position, extra_update=None):
+        """
+        Move object to a certain position within the whole ordered list. Only
+        items of the source and target buckets are shifted; the target bucket
+        is split when it overflows, and a nearly empty source bucket is merged
+        with its successor.
+        """
+        if not isinstance(position, int):
+            raise TypeError(
+                "Order value must be set using an 'int', not using a '{0}'.".format(
+                    type(position).__name__
+                )
+            )
+        current = self.get_position(using=self._get_write_db())
+        return self._move_to(max(0, position), current, extra_update)
+
+    def _move_to(self, position, current, extra_update=None, send_signals=True):
+        # move from the current position to position, or to the end of the
+        # list when position is None; the target slot and the sizes of the
+        # buckets involved are read with queries bounded by the position and
+        # the bucket capacity rather than by the size of the list
+        bucket_field_name = self.bucket_field_name
+        order_field_name = self.order_field_name
+        bucket = getattr(self, bucket_field_name)
+        order = getattr(self, order_field_name)
+        qs = self.get_ordering_queryset(using=self._get_write_db())
+        if position == current:
+            # object is already at desired position
+            return self._get_move_result(current, position)
+
+        # the target slot is the one of the item at position once this object
+        # is taken out of the list, or the one after the last item
+        fields = (bucket_field_name, order_field_name)
+        others = qs.exclude(pk=self.pk).order_by(*fields).values_list(*fields)
+        slot = None
+        if position is not None and current - order <= position < current:
+            # earlier in this object's bucket, which starts at current - order
+            slot = bucket, position - current + order
+        elif position is not None:
+            slot = next(iter(others[position : position + 1]), None)
+        if slot is None:
+            position = current + qs.filter(self._get_position_filter("gt")).count()
+            if position == current:
+                return self._get_move_result(current, position)
+            target_bucket, target_order = others.reverse().first()
+            target_order += 1
+        else:
+            target_bucket, target_order = slot
+        if target_bucket == bucket and target_order > order:
+            target_order -= 1
+
+        model = self._get_ordering_model()
+        if send_signals:
+            model._send_pre_move(self._wrt_map(), [self.pk], self._state.db)
+        extra_update = {} if extra_update is None else extra_update
+
+        if target_bucket == bucket:
+            bucket_qs = self._get_bucket_queryset(qs)
+            if order > target_order:
+                bucket_qs.below_instance(self).above(
+                    target_order, inclusive=True
+                ).increase_order(**extra_update)
+            else:
+                bucket_qs.above_instance(self).below(
+                    target_order, inclusive=True
+                ).decrease_order(**extra_update)
+            setattr(self, order_field_name, target_order)
+            self.save()
+            if send_signals:
+                model._send_post_move(
+                    self._wrt_map(),
+                    {self.pk: current},
+                    {self.pk: position},
+                    self._state.db,
+                )
+            return self._get_move_result(current, position)
+
+        sizes = dict(
+            qs.filter(
+                **{LOOKUP_SEP.join([bucket_field_name, "in"]): [bucket, target_bucket]}
+            )
+            .order_by(bucket_field_name)
+            .values_list(bucket_field_name)
+            .annotate(size=Count("pk"))
+        )
+        # the sizes once this object is taken out of its bucket
+        source_size, target_size = sizes[bucket] - 1, sizes.get(target_bucket, 0)
+        self._get_bucket_queryset(qs).above_instance(self).decrease_order(
+            **extra_update
+        )
+        self._get_bucket_queryset(qs, target_bucket).above(
+            target_order, inclusive=True
+        ).increase_order(**extra_update)
+        setattr(self, bucket_field_name, target_bucket)
+        setattr(self, order_field_name, target_order)
+        self.save()
+        restructured = False
+
+        # merge a nearly empty source bucket with its successor
+        if 0 < source_size < self.bucket_capacity // 4:
+            successor = self._get_next_bucket(qs, bucket)
+            if successor is not None and successor != target_bucket:
+                successor_qs = self._get_bucket_queryset(qs, successor)
+                if source_size + successor_qs.count() <= self.bucket_capacity // 2:
+                    successor_qs.update(
+                        **{
+                            bucket_field_name: bucket,
+                            order_field_name: F(order_field_name) + source_size,
+                        }
+                    )
+
+        # split an overflowing target bucket in two
+        if target_size + 1 > self.bucket_capacity:
+            following = self._get_next_bucket(qs, target_bucket)
+            self._split_bucket(qs, target_bucket, target_size + 1, following)
+            restructured = True
+
+        if restructured:
+            self.refresh_from_db(fields=[bucket_field_name, order_field_name])
+        if send_signals:
+            model._send_post_move(
+                self._wrt_map(), {self.pk: current}, {self.pk: position}, self._state.db
+            )
+        return self._get_move_result(current, position)
+
+    def _split_bucket(self, qs, bucket, size, following):
+        if following is None:
+            new_bucket = bucket + self.bucket_spacing
+        else:
+            new_bucket = (bucket + following) // 2
+        if new_bucket == bucket:
+            # no free bucket index left between the two, repack the whole list
+            qs.rebalance_buckets()
+            return
+        half = size // 2
+        self._get_bucket_queryset(qs, bucket).above(half, inclusive=True).update(
+            **{
+                self.bucket_field_name: new_bucket,
+                self.order_field_name: F(self.order_field_name) - half,
+            }
+        )
+
+    @instrumented("above")
+    @_atomic
+    def above(self, ref, extra_update=None):
+        """
+        Move this object above the referenced object.
+        """
+        self._validate_ordering_reference(ref)
+        position, ref_position = self._get_positions(
+            [self, ref], using=self._get_write_db()
+        )
+        if position == ref_position:
+            return self._get_move_result(position, position)
+        if position < ref_position:
+            ref_position -= 1
+        return self._move_to(ref_position, position, extra_update)
+
+    @instrumented("below")
+    @_atomic
+    def below(self, ref, extra_update=None):
+        """
+        Move this object below the referenced object.
+        """
+        self._validate_ordering_reference(ref)
+        position, ref_position = self._get_positions(
+            [self, ref], using=self._get_write_db()
+        )
+        if position == ref_position:
+            return self._get_move_result(position, position)
+        if position > ref_position:
+            ref_position += 1
+        return self._move_to(ref_position, position, extra_update)
+
+    @instrumented("top")
+    @_atomic
+    def top(self, extra_update=None):
+        """
+        Move this object to the top of the ordered list.
+        """
+        return self.to(0, extra_update=extra_update)
+
+    @instrumented("bottom")
+    @_atomic
+    def bottom(self, extra_update=None):
+        """
+        Move this object to the bottom of the ordered list.
+        """
+        current = self.get_position(using=self._get_write_db())
+        return self._move_to(None, current, extra_update)
+
+    @classmethod
+    def check(cls, **kwargs):
+        errors = super().check(**kwargs)
+
+        if not cls.bucket_field_name:
+            errors.append(
+                checks.Error(
+                    "BucketedOrderedModelBase subclass needs bucket_field_name specified.",
+                    obj=str(cls.__qualname__),
+                    id="ordered_model.E007",
+                )
+            )
+        else:
+            ordering = [
+                o.lstrip("-") if isinstance(o, str) else o
+                for o in (getattr(cls._meta, "ordering", None) or ())
+            ]
+            fields = [cls.bucket_field_name, cls.order_field_name]
+            if ordering[-2:] != fields:
+                errors.append(
+                    checks.Error(
+                        "BucketedOrderedModelBase subclass Meta.ordering must end with the bucket and order fields.",
+                        hint="Use Meta.ordering = (..., {0!r}, {1!r}).".format(*fields),
+                        obj=str(cls.__qualname__),
+                        id="ordered_model.E008",
+                    )
+                )
+        if not isinstance(cls.bucket_capacity, int) or cls.bucket_capacity < 2:
+            errors.append(
+                checks.Error(
+                    "BucketedOrderedModelBase subclass bucket_capacity must be an int of at least 2.",
+                    obj=str(cls.__qualname__),
+                    id="ordered_model.E009",
+                )
+            )
+        return errors
+
+
+class BucketedOrderedModel(BucketedOrderedModelBase):
+    """
+    An abstract model for very large ordered lists, split into buckets.
+    Provides ``bucket`` and ``order`` fields.
+    """
+
+    bucket = models.PositiveIntegerField(_("bucket"), editable=False, db_index=True)
+    order = models.PositiveIntegerField(_("order"), editable=False, db_index=True)
+    bucket_field_name = "bucket"
+    order_field_name = "order"
+
+    class Meta:
+        abstract = True
+        ordering = ("bucket", "order")
@@ -1,4 +1,10 @@
-from rest_framework import serializers, fields
+from django.core import exceptions
+from django.db import router, transaction
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils import model_meta
+
+from .models import BucketedOrderedModelBase
 
 
 class OrderedModelSerializer(serializers.ModelSerializer):
@@ -45,15 +51,12 @@ class OrderedModelSerializer(serializers.ModelSerializer):
 
         return order_field_name
 
-    def get_fields(self):
-        # make sure that DRF considers the ordering field writable
-        order_field = self.get_order_field()
-        d = super().get_fields()
-        for name, field in d.items():
-            if name == order_field:
-                if field.read_only:
-                    d[name] = fields.IntegerField()
-        return d
+    def get_extra_kwargs(self):
+        # make sure that DRF builds the ordering field writable, although the
+        # model field is not editable
+        extra_kwargs = super().get_extra_kwargs()
+        extra_kwargs.setdefault(self.get_order_field(), {})["read_only"] = False
+        return extra_kwargs
 
     def update(self, instance, validated_data):
         """
@@ -84,7 +87,9 @@ class OrderedModelSerializer(serializers.ModelSerializer):
         Create a new instance.
 
         If the `order_field_name` attribute is passed in the validated data,
-        the instance will be created at the specified order.
+        the instance will be created at the specified order: a slot is opened
+        at that position, clamped to the group, and the instance inserted into
+        it.
 
         Returns:
             Model: The created instance.
@@ -95,9 +100,168 @@ class OrderedModelSerializer(serializers.ModelSerializer):
         if order_field in validated_data:
             order = validated_data.pop(order_field)
 
-        instance = super().create(validated_data)
+        if order is None:
+            return super().create(validated_data)
 
-        if order is not None:
+        ModelClass = self.Meta.model  # pylint: disable=no-member,invalid-name
+        if issubclass(ModelClass, BucketedOrderedModelBase):
+            # positions are logical, move the instance once it is appended
+            instance = super().create(validated_data)
             instance.to(order)
+            return instance
 
-        return instance
+        using = router.db_for_write(ModelClass)
+        with transaction.atomic(using=using):
+            relations = model_meta.get_field_info(ModelClass).relations
+            qs = ModelClass(
+                **{
+                    name: value
+                    for name, value in validated_data.items()
+                    if name not in relations or not relations[name].to_many
+                }
+            ).get_ordering_queryset(using=using)
+            next_order = qs.get_next_order()
+            order = max(0, min(order, next_order))
+            if order < next_order:
+                qs.above(order, inclusive=True).increase_order()
+            validated_data[order_field] = order
+            return super().create(validated_data)
+
+
+class OrderedModelListSerializer(serializers.ListSerializer):
+    """
+    A ListSerializer to reorder a batch of objects of an `OrderedModelSerializer`
+    at once. Enable it with `list_serializer_class` on the serializer's Meta:
+
+        class ItemSerializer(OrderedModelSerializer):
+            class Meta:
+                model = Item
+                fields = "__all__"
+                list_serializer_class = OrderedModelListSerializer
+
+    and pass the queryset the objects are looked up in as the instance:
+
+        serializer = ItemSerializer(Item.objects.all(), data=data, many=True)
+
+    Each item of the data identifies its object by `pk` or by the name of the
+    primary key field. The objects are loaded with a single query, and the
+    order values of all the items are applied with `set_positions()` in one
+    transaction, with a single UPDATE per `order_with_respect_to` group, rather
+    than with one `to()` call per object.
+    """
+
+    def get_item_pk(self, data):
+        pk_name = self.child.Meta.model._meta.pk.name
+        return data.get("pk", data.get(pk_name)) if isinstance(data, dict) else None
+
+    def to_internal_value(self, data):
+        if self.instance is None or not isinstance(data, list):
+            return super().to_internal_value(data)
+
+        pk_field = self.child.Meta.model._meta.pk
+        pks = []
+        for item in data:
+            try:
+                pks.append(pk_field.to_python(self.get_item_pk(item)))
+            except exceptions.ValidationError:
+                pass
+        queryset = self.instance
+        if not hasattr(queryset, "filter"):
+            queryset = self.child.Meta.model._default_manager.filter(
+                pk__in=[obj.pk for obj in queryset]
+            )
+        self._objects = {obj.pk: obj for obj in queryset.filter(pk__in=pks)}
+
+        # validate each item against its own object, rather than through the
+        # run_child_validation() hook which DRF only calls from 3.15
+        if not self.allow_empty and not data:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [self.error_messages["empty"]]},
+                code="empty",
+            )
+        ret = []
+        errors = []
+        for item in data:
+            try:
+                validated = self.run_child_validation(item)
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+            else:
+                ret.append(validated)
+                errors.append({})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return ret
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return self.child.run_validation(data)
+
+        try:
+            pk = self.child.Meta.model._meta.pk.to_python(self.get_item_pk(data))
+        except exceptions.ValidationError:
+            pk = None
+        if pk not in self._objects:
+            raise serializers.ValidationError({"pk": ["Object does not exist."]})
+
+        instance = self.child.instance
+        self.child.instance = self._objects[pk]
+        self.child.initial_data = data
+        try:
+            attrs = self.child.run_validation(data)
+        finally:
+            self.child.instance = instance
+        attrs["pk"] = pk
+        return attrs
+
+    def validate(self, attrs):
+        if self.instance is not None:
+            pks = [item["pk"] for item in attrs]
+            if len(set(pks)) != len(pks):
+                raise serializers.ValidationError("Each object can only be given once.")
+        return attrs
+
+    def update(self, instance, validated_data):
+        """
+        Update the objects of `instance` from the validated items and move them
+        to the order values given.
+
+        Returns:
+            list: The updated instances, in the order of the items, with their
+                reconciled order values.
+        """
+        ModelClass = self.child.Meta.model  # pylint: disable=invalid-name
+        order_field = self.child.get_order_field()
+
+        positions = {}
+        updated = []
+        using = router.db_for_write(ModelClass)
+        with transaction.atomic(using=using):
+            for attrs in validated_data:
+                attrs = dict(attrs)
+                obj = self._objects[attrs.pop("pk")]
+                attrs.pop(ModelClass._meta.pk.name, None)
+                order = attrs.pop(order_field, None)
+                if order is not None:
+                    positions[obj.pk] = order
+                if attrs:
+                    obj = self.child.update(obj, attrs)
+                updated.append(obj)
+
+            if positions:
+                try:
+                    orders = ModelClass._default_manager.set_positions(positions)
+                except ValueError as e:
+                    raise serializers.ValidationError({order_field: [str(e)]})
+                # the objects not given an order may have been shifted
+                others = [obj.pk for obj in updated if obj.pk not in orders]
+                if others:
+                    orders.update(
+                        ModelClass._base_manager.using(using)
+                        .filter(pk__in=others)
+                        .values_list("pk", order_field)
+                    )
+                for obj in updated:
+                    setattr(obj, order_field, orders[obj.pk])
+
+        return updated
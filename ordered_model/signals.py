@@ -0,0 +1,91 @@
+"""
+Signals sent by ordering operations, once per operation and
+``order_with_respect_to`` group rather than once per shifted row.
+
+``pre_move`` is sent before the rows of a group change, with:
+
+``sender``
+    The model of the ordered list.
+``wrt``
+    The ``order_with_respect_to`` mapping of the group.
+``pks``
+    The pks of the objects being moved.
+``using``
+    The database alias.
+
+``post_move`` is sent once they changed, with the same arguments and:
+
+``positions``
+    A ``{pk: (old_position, new_position)}`` mapping of the moved objects.
+``shifted``
+    A list of ``((start, stop), shift)`` pairs: the other objects whose
+    positions were in the half-open range ``start`` to ``stop`` before the
+    operation had ``shift`` added to their positions.
+
+``to()`` (and the methods moving an object through it), ``swap()``,
+``OrderedModelQuerySet.reorder()``, ``set_positions()`` and ``move_block()``
+send them.
+
+``post_bulk_create`` is sent by ``bulk_create()`` once the objects of a group
+were inserted at its end, with ``sender``, ``wrt`` and ``using`` as above and:
+
+``positions``
+    A ``{pk: position}`` mapping of the inserted objects.
+"""
+
+from django.dispatch import Signal
+
+pre_move = Signal()
+post_move = Signal()
+post_bulk_create = Signal()
+
+
+def get_shifted_ranges(old, new):
+    """
+    Return the ``shifted`` ranges of the other objects of a group, when the
+    objects of the ``{pk: position}`` mapping ``old`` move to those of ``new``.
+    """
+    if not old:
+        return []
+    selected, targets = sorted(old.values()), sorted(new.values())
+    start = min(selected[0], targets[0])
+    stop = max(selected[-1], targets[-1]) + 1
+
+    def runs(taken):
+        # half-open runs of the positions from start to stop not in taken
+        result = []
+        position = start
+        for t in taken:
+            if t > position:
+                result.append((position, t))
+            position = max(position, t + 1)
+        if position < stop:
+            result.append((position, stop))
+        return result
+
+    # the other objects keep their relative order: the n-th of them before the
+    # move takes the n-th position left free by the moved objects
+    ranges = []
+    old_runs, new_runs = runs(selected), runs(targets)
+    i = j = 0
+    old_position = old_runs[0][0] if old_runs else None
+    new_position = new_runs[0][0] if new_runs else None
+    while i < len(old_runs):
+        length = min(old_runs[i][1] - old_position, new_runs[j][1] - new_position)
+        shift = new_position - old_position
+        end = old_position + length
+        if shift and ranges and ranges[-1] == ((ranges[-1][0][0], old_position), shift):
+            ranges[-1] = ((ranges[-1][0][0], end), shift)
+        elif shift:
+            ranges.append(((old_position, end), shift))
+        old_position = end
+        new_position += length
+        if old_position == old_runs[i][1]:
+            i += 1
+            if i < len(old_runs):
+                old_position = old_runs[i][0]
+        if new_position == new_runs[j][1]:
+            j += 1
+            if j < len(new_runs):
+                new_position = new_runs[j][0]
+    return ranges
@@ -0,0 +1,169 @@
+/*
+ * Reordering of the rows of an ordered model changelist or inline in place.
+ * Rows rendering `move_up_down_links` can be dragged among the rows of their
+ * `order_with_respect_to` group; when dropped, the pks of the rows of that group
+ * in their new order are posted to the reorder endpoint and saved with a single
+ * request. The move links are followed in the
+ * background and the row is moved next to its new neighbours, falling back to
+ * a reload when they are not on the page.
+ */
+(function () {
+    "use strict";
+
+    function getCookie(name) {
+        var match = document.cookie.match("(^|;)\\s*" + name + "=([^;]*)");
+        return match ? decodeURIComponent(match[2]) : null;
+    }
+
+    function getCSRFToken() {
+        var input = document.querySelector("input[name=csrfmiddlewaretoken]");
+        return input ? input.value : getCookie("csrftoken");
+    }
+
+    function getRow(controls) {
+        return controls.closest("tr, .inline-related");
+    }
+
+    function getRows(container, url, group) {
+        // the rows of the list, or only those of one group when given
+        var rows = [];
+        container
+            .querySelectorAll(".ordered-model-controls[data-reorder-url]")
+            .forEach(function (controls) {
+                if (
+                    controls.dataset.reorderUrl === url &&
+                    (group === undefined || controls.dataset.group === group)
+                ) {
+                    rows.push({ row: getRow(controls), pk: controls.dataset.objectId });
+                }
+            });
+        return rows;
+    }
+
+    function restripe(rows) {
+        rows.forEach(function (item, index) {
+            if (item.row.tagName === "TR") {
+                item.row.classList.remove("row1", "row2");
+                item.row.classList.add(index % 2 ? "row2" : "row1");
+            }
+        });
+    }
+
+    function save(container, url, group) {
+        var rows = getRows(container, url, group);
+        var request = new XMLHttpRequest();
+        request.open("POST", url);
+        request.setRequestHeader("Content-Type", "application/json");
+        request.setRequestHeader("X-CSRFToken", getCSRFToken());
+        request.setRequestHeader("X-Requested-With", "XMLHttpRequest");
+        request.onload = function () {
+            if (request.status === 200) {
+                restripe(getRows(container, url));
+            } else {
+                var error;
+                try {
+                    error = JSON.parse(request.responseText).error;
+                } catch (e) {
+                    error = request.statusText;
+                }
+                window.alert(error);
+                window.location.reload();
+            }
+        };
+        request.send(JSON.stringify({ pks: rows.map(function (item) { return item.pk; }) }));
+    }
+
+    function move(controls, link) {
+        var url = controls.dataset.reorderUrl;
+        var request = new XMLHttpRequest();
+        request.open("GET", link.href);
+        request.setRequestHeader("Accept", "application/json");
+        request.setRequestHeader("X-Requested-With", "XMLHttpRequest");
+        request.onload = function () {
+            if (request.status !== 200) {
+                window.location.reload();
+                return;
+            }
+            var result = JSON.parse(request.responseText);
+            var row = getRow(controls);
+            var container = row.parentNode;
+            var rows = getRows(container, url);
+            var neighbours = {};
+            rows.forEach(function (item) {
+                neighbours[item.pk] = item.row;
+            });
+            if (result.previous !== null && neighbours[result.previous]) {
+                container.insertBefore(row, neighbours[result.previous].nextSibling);
+            } else if (result.next !== null && neighbours[result.next]) {
+                container.insertBefore(row, neighbours[result.next]);
+            } else if (result.previous !== null || result.next !== null) {
+                window.location.reload();
+                return;
+            }
+            restripe(getRows(container, url));
+        };
+        request.send();
+    }
+
+    function init() {
+        var dragged = null;
+
+        document
+            .querySelectorAll(".ordered-model-controls[data-reorder-url]")
+            .forEach(function (controls) {
+                var row = getRow(controls);
+                if (!row) {
+                    return;
+                }
+                var url = controls.dataset.reorderUrl;
+                var group = controls.dataset.group;
+                controls.querySelectorAll("a").forEach(function (link) {
+                    link.addEventListener("click", function (event) {
+                        event.preventDefault();
+                        move(controls, link);
+                    });
+                });
+                row.draggable = true;
+                row.style.cursor = "move";
+
+                row.addEventListener("dragstart", function (event) {
+                    dragged = { row: row, url: url, group: group };
+                    event.dataTransfer.effectAllowed = "move";
+                    event.dataTransfer.setData("text/plain", controls.dataset.objectId);
+                });
+                row.addEventListener("dragover", function (event) {
+                    // only within the group the dragged row belongs to
+                    if (
+                        !dragged ||
+                        dragged.url !== url ||
+                        dragged.group !== group ||
+                        dragged.row === row
+                    ) {
+                        return;
+                    }
+                    event.preventDefault();
+                    var rect = row.getBoundingClientRect();
+                    var after = event.clientY > rect.top + rect.height / 2;
+                    row.parentNode.insertBefore(
+                        dragged.row,
+                        after ? row.nextSibling : row
+                    );
+                });
+                row.addEventListener("drop", function (event) {
+                    event.preventDefault();
+                });
+                row.addEventListener("dragend", function () {
+                    if (dragged && dragged.row === row) {
+                        save(row.parentNode, url, group);
+                    }
+                    dragged = null;
+                });
+            });
+    }
+
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", init);
+    } else {
+        init();
+    }
+})();
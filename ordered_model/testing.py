@@ -0,0 +1,110 @@
+"""
+Test helpers to keep the queries issued by ordering operations within budget.
+
+    from ordered_model.testing import assertOrderingQueries
+
+    with assertOrderingQueries(Item, max=2):
+        item.to(0)
+
+With pytest, add ``pytest_plugins = ["ordered_model.testing"]`` to a
+``conftest.py`` to use the ``ordering_queries`` fixture, which records the
+ordering operations of the whole test.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from . import instrumentation
+
+
+class OrderingQueriesContext:
+    """
+    Record the ordering operations performed while active, optionally limited
+    to those on ``model`` and its subclasses. Only queries issued by
+    ``OrderedModelBase`` and ``OrderedModelQuerySet`` ordering methods are
+    counted.
+    """
+
+    def __init__(self, model=None):
+        self.model = model
+        self.events = []
+
+    def __enter__(self):
+        instrumentation.add_listener(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        instrumentation.remove_listener(self)
+
+    def __call__(self, event):
+        if self.model is None or issubclass(event.model, self.model):
+            self.events.append(event)
+
+    @property
+    def queries(self):
+        return sum(event.queries for event in self.events)
+
+    @property
+    def rows(self):
+        return sum(event.rows for event in self.events)
+
+    def by_operation(self):
+        """
+        Return ``{operation: {"calls": ..., "queries": ..., "rows": ...}}`` in
+        the order the operations were first performed.
+        """
+        breakdown = OrderedDict()
+        for event in self.events:
+            stats = breakdown.setdefault(
+                event.operation, {"calls": 0, "queries": 0, "rows": 0}
+            )
+            stats["calls"] += 1
+            stats["queries"] += event.queries
+            stats["rows"] += event.rows
+        return breakdown
+
+    def describe(self):
+        return "\n".join(
+            "  {}: {} call(s), {} queries, {} rows".format(
+                operation, stats["calls"], stats["queries"], stats["rows"]
+            )
+            for operation, stats in self.by_operation().items()
+        )
+
+
+@contextmanager
+def assertOrderingQueries(model=None, max=None, rows=None):
+    """
+    Fail with an ``AssertionError`` if the ordering operations performed in the
+    block, on ``model`` if given, issue more than ``max`` queries or shift more
+    than ``rows`` rows.
+    """
+    with OrderingQueriesContext(model) as context:
+        yield context
+
+    if max is not None and context.queries > max:
+        raise AssertionError(
+            "{} ordering queries executed, at most {} expected\n{}".format(
+                context.queries, max, context.describe()
+            )
+        )
+    if rows is not None and context.rows > rows:
+        raise AssertionError(
+            "{} rows shifted by ordering operations, at most {} expected\n{}".format(
+                context.rows, rows, context.describe()
+            )
+        )
+
+
+try:
+    import pytest
+except ImportError:  # pragma: no cover
+    pytest = None
+
+if pytest is not None:
+
+    @pytest.fixture
+    def ordering_queries():
+        """An ``OrderingQueriesContext`` recording for the duration of the test."""
+        with OrderingQueriesContext() as context:
+            yield context
@@ -0,0 +1,105 @@
+"""
+Versions of the ``order_with_respect_to`` groups of the models setting
+``order_version_cache_alias``, kept in that cache and changed by every save,
+delete and move of their objects. ``ordered_model.viewsets`` sends them as the
+``ETag`` of the objects.
+
+The receivers are connected by ``ready()`` for these models only.
+"""
+
+import hashlib
+import random
+import threading
+from contextlib import contextmanager
+
+from django.core.cache import caches
+
+# the first version each group got during claimed_versions(), a move only
+# being accepted if it got the version following its If-Match
+_claims = threading.local()
+
+
+def get_group_key(model, wrt):
+    """
+    Return an opaque key identifying the ordered list of ``model`` objects with
+    the ``order_with_respect_to`` mapping ``wrt``.
+    """
+    label = model._get_ordering_model()._meta.label
+    return hashlib.md5(repr((label, sorted(wrt.items()))).encode()).hexdigest()[:16]
+
+
+def get_version_key(group):
+    return "ordered_model:version:{}".format(group)
+
+
+def _get_cache(model):
+    return caches[model._get_ordering_model().order_version_cache_alias]
+
+
+def get_version(model, group):
+    cache = _get_cache(model)
+    key = get_version_key(group)
+    # start at a random version, so that tags issued before the version was
+    # evicted from the cache do not match
+    cache.add(key, random.getrandbits(48), None)
+    return cache.get(key)
+
+
+def get_versions(model, groups):
+    """Return the {group: version} of the given groups found in the cache."""
+    current = _get_cache(model).get_many([get_version_key(group) for group in groups])
+    return {
+        group: current[get_version_key(group)]
+        for group in groups
+        if get_version_key(group) in current
+    }
+
+
+def bump_versions(model, wrts):
+    """
+    Change the version of the given ``order_with_respect_to`` groups of
+    ``model``, so that the tags issued for them no longer match.
+    """
+    cache = _get_cache(model)
+    claims = getattr(_claims, "versions", None)
+    for wrt in wrts:
+        group = get_group_key(model, wrt)
+        try:
+            version = cache.incr(get_version_key(group))
+        except ValueError:
+            # no tag was issued since the version left the cache
+            continue
+        if claims is not None:
+            claims.setdefault(group, version)
+
+
+@contextmanager
+def claimed_versions():
+    """Collect the {group: first version} bumped in this thread meanwhile."""
+    _claims.versions = {}
+    try:
+        yield _claims.versions
+    finally:
+        _claims.versions = None
+
+
+def remember_group(sender, instance, raw=False, using=None, **kwargs):
+    # the objects of the group an object leaves are shifted too
+    if not instance._state.adding:
+        instance._versions_previous_wrt = instance._get_changed_original_wrt_map(using)
+
+
+def bump_on_save(sender, instance, **kwargs):
+    wrts = [instance._wrt_map()]
+    previous = instance.__dict__.pop("_versions_previous_wrt", None)
+    if previous is not None:
+        wrts.append(previous)
+    bump_versions(sender, wrts)
+
+
+def bump_on_delete(sender, instance, **kwargs):
+    bump_versions(sender, [instance._wrt_map()])
+
+
+def bump_on_move(sender, wrt, **kwargs):
+    bump_versions(sender, [wrt])
@@ -0,0 +1,140 @@
+"""
+A Django Rest Framework viewset mixin to move ordered objects, with optimistic
+concurrency control per ``order_with_respect_to`` group.
+
+Each group of a model setting ``order_version_cache_alias`` has a version kept
+in that cache, exposed as the ``ETag`` of the objects of the group and changed
+by every save, delete and move of its objects, see ``ordered_model.versions``.
+A move sent with a stale ``If-Match`` is rejected with 412 before the database
+is queried.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import router, transaction
+from rest_framework import exceptions
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from . import versions
+
+MOVE_DIRECTIONS = ("up", "down", "top", "bottom", "to", "above", "below")
+
+
+class PreconditionFailed(exceptions.APIException):
+    status_code = 412
+    default_detail = "The ordering of this list has changed, reload it and retry."
+    default_code = "precondition_failed"
+
+
+class OrderedModelViewSetMixin:
+    """
+    Add a ``POST /{pk}/move/`` action to a viewset of an ordered model, taking
+    a ``direction`` among ``up``, ``down``, ``top``, ``bottom``, ``to`` (with a
+    ``position``), ``above`` and ``below`` (with the ``target`` pk):
+
+        class ItemViewSet(OrderedModelViewSetMixin, viewsets.ModelViewSet):
+            queryset = Item.objects.all()
+            serializer_class = ItemSerializer
+
+    Retrieving an object and moving it return the version of its group as the
+    ``ETag``; send it back as ``If-Match`` to only move the object if its group
+    did not change since. The model must set ``order_version_cache_alias``.
+    """
+
+    def get_ordering_model(self):
+        model = self.get_queryset().model._get_ordering_model()
+        if model.order_version_cache_alias is None:
+            raise ImproperlyConfigured(
+                "{} needs {} to set order_version_cache_alias.".format(
+                    type(self).__name__, model._meta.label
+                )
+            )
+        return model
+
+    def get_etag(self, obj):
+        group = versions.get_group_key(type(obj), obj._wrt_map())
+        version = versions.get_version(self.get_ordering_model(), group)
+        return '"{}-{}"'.format(group, version)
+
+    def _get_if_match(self, request):
+        # None without If-Match, "*" for any version, or {group: version}
+        header = request.META.get("HTTP_IF_MATCH")
+        if header is None:
+            return None
+        tags = {}
+        for tag in header.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return "*"
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            group, _, version = tag.strip('"').rpartition("-")
+            if group and version.isdigit():
+                tags[group] = int(version)
+        return tags
+
+    def _check_if_match(self, tags):
+        current = versions.get_versions(self.get_ordering_model(), list(tags))
+        if not any(current.get(group) == version for group, version in tags.items()):
+            raise PreconditionFailed
+
+    def get_move_argument(self, obj, direction, data):
+        """
+        Validate the move ``data`` and return the argument of the ``direction``
+        method of ``obj``: the position, the target object or None.
+        """
+        if direction in ("up", "down", "top", "bottom"):
+            return None
+        qs = obj.get_ordering_queryset(using=obj._get_write_db())
+        if direction == "to":
+            try:
+                position = int(data["position"])
+            except (KeyError, TypeError, ValueError):
+                raise exceptions.ValidationError(
+                    {"position": ["A valid integer is required."]}
+                )
+            return max(0, min(position, qs.count() - 1))
+        if data.get("target") is None:
+            raise exceptions.ValidationError({"target": ["This field is required."]})
+        return get_object_or_404(qs, pk=data["target"])
+
+    def perform_move(self, obj, direction, argument):
+        if argument is None:
+            getattr(obj, direction)()
+        else:
+            getattr(obj, direction)(argument)
+
+    @action(detail=True, methods=["post"])
+    def move(self, request, *args, **kwargs):
+        direction = request.data.get("direction")
+        if direction not in MOVE_DIRECTIONS:
+            raise exceptions.ValidationError(
+                {"direction": ["Must be one of {}.".format(", ".join(MOVE_DIRECTIONS))]}
+            )
+        tags = self._get_if_match(request)
+        if tags not in (None, "*"):
+            self._check_if_match(tags)
+
+        obj = self.get_object()
+        argument = self.get_move_argument(obj, direction, request.data)
+        group = versions.get_group_key(type(obj), obj._wrt_map())
+        with versions.claimed_versions() as claimed, transaction.atomic(
+            using=router.db_for_write(type(obj))
+        ):
+            self.perform_move(obj, direction, argument)
+            # only one of concurrent requests with the same tag gets the next
+            # version, the move of the others is rolled back
+            if (
+                tags not in (None, "*")
+                and group in claimed
+                and claimed[group] != tags.get(group, -1) + 1
+            ):
+                raise PreconditionFailed
+        serializer = self.get_serializer(obj)
+        return Response(serializer.data, headers={"ETag": self.get_etag(obj)})
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data, headers={"ETag": self.get_etag(instance)})
@@ -19,6 +19,8 @@ setup(
     url="http://github.com/django-ordered-model/django-ordered-model",
     packages=[
         "ordered_model",
+        "ordered_model.changelog",
+        "ordered_model.changelog.migrations",
         "ordered_model.management",
         "ordered_model.management.commands",
     ],
@@ -46,6 +48,7 @@ setup(
             "static/ordered_model/arrow-down.gif",
             "static/ordered_model/arrow-top.gif",
             "static/ordered_model/arrow-bottom.gif",
+            "static/ordered_model/reorder.js",
             "locale/de/LC_MESSAGES/django.po",
             "locale/de/LC_MESSAGES/django.mo",
             "locale/pl/LC_MESSAGES/django.po",
@@ -15,6 +15,8 @@ from .models import (
     Topping,
     CustomPKGroupItem,
     CustomPKGroup,
+    Book,
+    Chapter,
 )
 
 
@@ -64,8 +66,26 @@ class CustomPKGroupAdmin(OrderedInlineModelAdminMixin, admin.ModelAdmin):
     inlines = (CustomPKGroupItemInline,)
 
 
+class ChapterAdmin(OrderedModelAdmin):
+    list_display = ("name", "book", "position", "move_up_down_links")
+    list_editable = ("position",)
+
+
+class ChapterInline(OrderedTabularInline):
+    model = Chapter
+    fields = ("name", "position", "move_up_down_links")
+    readonly_fields = ("move_up_down_links",)
+    extra = 1
+
+
+class BookAdmin(OrderedInlineModelAdminMixin, admin.ModelAdmin):
+    inlines = (ChapterInline,)
+
+
 admin.site.register(Item, ItemAdmin)
 admin.site.register(Pizza, PizzaAdmin)
 admin.site.register(PizzaProxy, PizzaProxyAdmin)
 admin.site.register(Topping)
 admin.site.register(CustomPKGroup, CustomPKGroupAdmin)
+admin.site.register(Book, BookAdmin)
+admin.site.register(Chapter, ChapterAdmin)
@@ -0,0 +1,351 @@
+"""
+Benchmarks of ordering operations at scale.
+
+Run from the repository root, against SQLite by default or against the
+PostgreSQL database given by ``BENCHMARK_DATABASE_URL``:
+
+    python -m tests.benchmark --output before.json
+    python -m tests.benchmark --output after.json --compare before.json
+
+Results are written as JSON, one entry per benchmark and parameter set, with
+timings in seconds and the number of queries of the last repetition.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS = {}
+
+
+def benchmark(name, **params):
+    """Register a benchmark, called once per combination of ``params``."""
+
+    def decorator(func):
+        BENCHMARKS[name] = (func, params)
+        return func
+
+    return decorator
+
+
+class Timer:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.timings = []
+        self.queries = None
+        # set by benchmarks processing many items per measurement
+        self.items = None
+
+    def measure(self, func, *args, **kwargs):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            func(*args, **kwargs)
+            self.timings.append(time.perf_counter() - start)
+        self.queries = len(captured)
+
+
+def create_items(model, count, **fields):
+    return model.objects.bulk_create(
+        [model(name=str(i), **fields) for i in range(count)], batch_size=5000
+    )
+
+
+@benchmark("to", size=[1000, 10000, 100000])
+def bench_to(timer, size):
+    """Move the first item of a group to the end and back, shifting every row."""
+    from tests.models import Item
+
+    create_items(Item, size)
+    first = Item.objects.get(order=0)
+    for i in range(timer.repeat):
+        timer.measure(first.to, size - 1 if i % 2 == 0 else 0)
+
+
+@benchmark("to_bucketed", size=[1000, 10000, 100000])
+def bench_to_bucketed(timer, size):
+    """The same moves on a bucketed list."""
+    from tests.models import Playlist, PlaylistEntry
+
+    create_items(PlaylistEntry, size, playlist=Playlist.objects.create())
+    first = PlaylistEntry.objects.get(bucket=0, order=0)
+    for i in range(timer.repeat):
+        timer.measure(first.to, size - 1 if i % 2 == 0 else 0)
+
+
+@benchmark("bulk_create", groups=[10, 100, 1000])
+def bench_bulk_create(timer, groups):
+    """Create ten items in each of many groups with a single bulk_create."""
+    from tests.models import Pizza, PizzaToppingsThroughModel, Topping
+
+    pizzas = Pizza.objects.bulk_create([Pizza(name=str(i)) for i in range(groups)])
+    topping = Topping.objects.create(name="cheese")
+    for i in range(timer.repeat):
+        objs = [
+            PizzaToppingsThroughModel(pizza=pizza, topping=topping)
+            for pizza in pizzas
+            for j in range(10)
+        ]
+        timer.measure(PizzaToppingsThroughModel.objects.bulk_create, objs)
+
+
+@benchmark("cascade_delete", size=[1000, 10000])
+def bench_cascade_delete(timer, size):
+    """Delete a parent whose ordered child must be compacted out of the list."""
+    from tests.models import CascadedOrderedModel, CascadedParentModel
+
+    parents = CascadedParentModel.objects.bulk_create(
+        [CascadedParentModel() for i in range(size)]
+    )
+    CascadedOrderedModel.objects.bulk_create(
+        [CascadedOrderedModel(parent=parent) for parent in parents]
+    )
+    for i in range(timer.repeat):
+        timer.measure(parents[i].delete)
+
+
+@benchmark("reorder_model", size=[1000, 10000, 100000])
+def bench_reorder_model(timer, size):
+    """Run reorder_model over a list whose every order value is wrong."""
+    from django.core.management import call_command
+    from django.db.models import F
+
+    from tests.models import Item
+
+    create_items(Item, size)
+    for i in range(timer.repeat):
+        Item.objects.update(order=F("order") + 1)
+        timer.measure(call_command, "reorder_model", "tests.Item", verbosity=0)
+
+
+@benchmark("admin_changelist", size=[100, 10000])
+def bench_admin_changelist(timer, size):
+    """Render the admin changelist of Items, including the move links."""
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    from tests.models import Item
+
+    create_items(Item, size)
+    client = Client()
+    client.force_login(User.objects.create_superuser("admin", "a@example.com", "x"))
+    for i in range(timer.repeat):
+        timer.measure(client.get, "/admin/tests/item/")
+
+
+@benchmark("admin_move_links", rows=[100, 500])
+def bench_admin_move_links(timer, rows):
+    """Render the move links column of a changelist page."""
+    from django.contrib import admin
+    from django.contrib.auth.models import User
+    from django.test import RequestFactory
+
+    from tests.models import Item
+
+    items = create_items(Item, rows)
+    request = RequestFactory().get("/admin/tests/item/")
+    request.user = User.objects.create_superuser("admin", "a@example.com", "x")
+    model_admin = admin.site._registry[Item]
+    timer.items = rows
+
+    def render_column():
+        model_admin.get_changelist_instance(request)
+        for item in items:
+            model_admin.move_up_down_links(item)
+
+    for i in range(timer.repeat):
+        timer.measure(render_column)
+
+
+@benchmark("drf_create_with_order", size=[100, 10000])
+def bench_drf_create_with_order(timer, size):
+    """POST a new item at the top of a list through OrderedModelSerializer."""
+    from rest_framework.test import APIClient
+
+    from tests.models import CustomItem
+
+    CustomItem.objects.bulk_create(
+        [CustomItem(pkid=str(i), name=str(i)) for i in range(size)]
+    )
+    client = APIClient()
+    for i in range(timer.repeat):
+        data = {"pkid": "new-{}".format(i), "name": "new", "order": 0}
+        timer.measure(client.post, "/api/items/", data, format="json")
+
+
+@benchmark("drf_serialize_nested", size=[1000, 10000])
+def bench_drf_serialize_nested(timer, size):
+    """Serialize ordered objects nested in their parents, one serializer each."""
+    from rest_framework import serializers
+
+    from ordered_model.serializers import OrderedModelSerializer
+    from tests.models import Pizza, PizzaToppingsThroughModel, Topping
+
+    class ToppingEntrySerializer(OrderedModelSerializer):
+        class Meta:
+            model = PizzaToppingsThroughModel
+            fields = ("id", "topping", "order")
+
+    class PizzaSerializer(serializers.ModelSerializer):
+        toppings = serializers.SerializerMethodField()
+
+        class Meta:
+            model = Pizza
+            fields = ("id", "name", "toppings")
+
+        def get_toppings(self, pizza):
+            return [
+                ToppingEntrySerializer(entry).data
+                for entry in pizza.pizzatoppingsthroughmodel_set.all()
+            ]
+
+    pizzas = Pizza.objects.bulk_create([Pizza(name=str(i)) for i in range(10)])
+    topping = Topping.objects.create(name="cheese")
+    PizzaToppingsThroughModel.objects.bulk_create(
+        [
+            PizzaToppingsThroughModel(pizza=pizza, topping=topping)
+            for pizza in pizzas
+            for i in range(size // len(pizzas))
+        ]
+    )
+    timer.items = size
+
+    def serialize():
+        queryset = Pizza.objects.prefetch_related("pizzatoppingsthroughmodel_set")
+        return PizzaSerializer(queryset, many=True).data
+
+    for i in range(timer.repeat):
+        timer.measure(serialize)
+
+
+def run(name, params, repeat):
+    from django.db import transaction
+
+    func = BENCHMARKS[name][0]
+    timer = Timer(repeat)
+    # every run starts from, and leaves behind, an empty database
+    with transaction.atomic():
+        func(timer, **params)
+        transaction.set_rollback(True)
+    return {
+        "name": name,
+        "params": params,
+        "repeat": repeat,
+        "min": min(timer.timings),
+        "median": statistics.median(timer.timings),
+        "mean": statistics.mean(timer.timings),
+        "max": max(timer.timings),
+        "queries": timer.queries,
+        **(
+            {"median_per_item": statistics.median(timer.timings) / timer.items}
+            if timer.items
+            else {}
+        ),
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    def key(result):
+        return result["name"], json.dumps(result["params"], sort_keys=True)
+
+    previous = {key(result): result for result in baseline["results"]}
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        print(
+            "{:<24} {:<20} {:>10.5f}s -> {:>10.5f}s  x{:.2f}  queries {} -> {}".format(
+                result["name"],
+                json.dumps(result["params"]),
+                old["median"],
+                result["median"],
+                result["median"] / old["median"] if old["median"] else float("inf"),
+                old["queries"],
+                result["queries"],
+            )
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        default=None,
+        help="skip parameter sets larger than this",
+    )
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings_benchmark")
+    import django
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    django.setup()
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+
+    results = []
+    try:
+        for name in args.names or BENCHMARKS:
+            param_name, values = next(iter(BENCHMARKS[name][1].items()))
+            for value in values:
+                if args.max_size is not None and value > args.max_size:
+                    continue
+                result = run(name, {param_name: value}, args.repeat)
+                results.append(result)
+                print(
+                    "{:<24} {:<20} median {:.5f}s, {} queries".format(
+                        name,
+                        json.dumps(result["params"]),
+                        result["median"],
+                        result["queries"],
+                    ),
+                    file=sys.stderr,
+                )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    report = {
+        "commit": get_commit(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 from rest_framework import routers, serializers, viewsets
-from ordered_model.serializers import OrderedModelSerializer
+from ordered_model.serializers import (
+    OrderedModelListSerializer,
+    OrderedModelSerializer,
+)
+from ordered_model.viewsets import OrderedModelViewSetMixin
 from tests.models import CustomItem, CustomOrderFieldModel
 
 
@@ -7,9 +11,10 @@ class ItemSerializer(OrderedModelSerializer):
     class Meta:
         model = CustomItem
         fields = "__all__"
+        list_serializer_class = OrderedModelListSerializer
 
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(OrderedModelViewSetMixin, viewsets.ModelViewSet):
     queryset = CustomItem.objects.all()
     serializer_class = ItemSerializer
 
@@ -20,7 +25,7 @@ class CustomOrderFieldModelSerializer(OrderedModelSerializer):
         fields = "__all__"
 
 
-class CustomOrderFieldModelViewSet(viewsets.ModelViewSet):
+class CustomOrderFieldModelViewSet(OrderedModelViewSetMixin, viewsets.ModelViewSet):
     queryset = CustomOrderFieldModel.objects.all()
     serializer_class = CustomOrderFieldModelSerializer
 
@@ -1,6 +1,10 @@
 from django.db import models
 
-from ordered_model.models import OrderedModel, OrderedModelBase
+from ordered_model.models import (
+    BucketedOrderedModel,
+    OrderedModel,
+    OrderedModelBase,
+)
 from ordered_model.fields import OrderedManyToManyField
 import uuid
 
@@ -40,6 +44,7 @@ class CustomItem(OrderedModel):
     pkid = models.CharField(max_length=100, primary_key=True)
     name = models.CharField(max_length=100)
     modified = models.DateTimeField(null=True, blank=True)
+    order_version_cache_alias = "default"
 
 
 # test ordering over custom ordering field (ie. not OrderedModel.order)
@@ -47,6 +52,7 @@ class CustomOrderFieldModel(OrderedModelBase):
     sort_order = models.PositiveIntegerField(editable=False, db_index=True)
     name = models.CharField(max_length=100)
     order_field_name = "sort_order"
+    order_version_cache_alias = "default"
 
     class Meta:
         ordering = ("sort_order",)
@@ -199,3 +205,70 @@ class ParentModel(OrderedModel):
 
 class ChildModel(ParentModel):
     age = models.IntegerField()
+
+
+# test bucketed ordering, with tiny buckets to exercise splits and merges
+class Playlist(models.Model):
+    pass
+
+
+class PlaylistEntry(BucketedOrderedModel):
+    playlist = models.ForeignKey(
+        Playlist, on_delete=models.CASCADE, related_name="entries"
+    )
+    name = models.CharField(max_length=100)
+    order_with_respect_to = "playlist"
+    bucket_capacity = 8
+    bucket_spacing = 2
+
+    class Meta:
+        ordering = ("playlist", "bucket", "order")
+        indexes = [models.Index(fields=["playlist", "bucket", "order"])]
+
+
+# test the ordering change log
+class LoggedItem(OrderedModel):
+    name = models.CharField(max_length=100)
+    order_change_log = True
+
+
+class LoggedQuestion(OrderedModel):
+    order_class_path = __module__ + ".LoggedQuestion"
+    order_change_log = True
+    question = models.TextField(max_length=100)
+
+    class Meta:
+        ordering = ("order",)
+
+
+class LoggedOpenQuestion(LoggedQuestion):
+    answer = models.TextField(max_length=100)
+
+
+class LoggedEntry(BucketedOrderedModel):
+    playlist = models.ForeignKey(
+        Playlist, on_delete=models.CASCADE, related_name="logged_entries"
+    )
+    order_with_respect_to = "playlist"
+    order_change_log = True
+    bucket_capacity = 8
+    bucket_spacing = 2
+
+    class Meta:
+        ordering = ("playlist", "bucket", "order")
+
+
+# test editing the order through list_editable and inlines
+class Book(models.Model):
+    name = models.CharField(max_length=100)
+
+
+class Chapter(OrderedModelBase):
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="chapters")
+    name = models.CharField(max_length=100)
+    position = models.PositiveIntegerField(blank=True, db_index=True)
+    order_field_name = "position"
+    order_with_respect_to = "book"
+
+    class Meta:
+        ordering = ("book", "position")
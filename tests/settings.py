@@ -1,7 +1,11 @@
 import django
 import os
 
-DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": "db.sqlite3"}}
+DATABASES = {
+    "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": "db.sqlite3"},
+    # a replica the read routing tests send reads to, left empty
+    "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": "replica.sqlite3"},
+}
 ROOT_URLCONF = "tests.urls"
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -11,6 +15,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.sessions",
     "ordered_model",
+    "ordered_model.changelog",
     "rest_framework",
     "tests",
 ]
@@ -1,30 +1,55 @@
+import random
 import uuid
 from io import StringIO
+from unittest import mock
 
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.models import User
-from django.core.management import call_command
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
 from django.core import checks
 from django.db import models
+from django.db.models import Prefetch
 from django.db.models.signals import post_delete
+from django.template.loader import render_to_string
+from django.utils.html import escape
 from django.dispatch import Signal
 from django.utils.timezone import now
 from django.urls import reverse
-from django.test import TestCase, SimpleTestCase
-from django.test.utils import isolate_apps, override_system_checks
+from django.test import TestCase, SimpleTestCase, TransactionTestCase
+from django.test.utils import isolate_apps, override_settings, override_system_checks
 from django import VERSION
 
 
 from rest_framework.test import APIRequestFactory, APITestCase
 from rest_framework import status
-from tests.drf import ItemViewSet, router
+from rest_framework.exceptions import ValidationError
+from tests.admin import PizzaToppingTabularInline
+from tests.drf import ItemSerializer, ItemViewSet, router
 from tests.utils import assertNumQueries
 
-from ordered_model.models import OrderedModel, OrderedModelManager, OrderedModelQuerySet
+from ordered_model import instrumentation
+from ordered_model.admin import _get_changelist_state
+from ordered_model.changelog.models import OrderingChange
+from ordered_model.signals import post_move, pre_move
+from ordered_model.testing import assertOrderingQueries
+from ordered_model.models import (
+    BucketedOrderedModel,
+    MoveResult,
+    OrderedModel,
+    OrderedModelManager,
+    OrderedModelQuerySet,
+)
 
 
 from tests.models import (
     Answer,
     Item,
+    LoggedEntry,
+    LoggedItem,
+    LoggedOpenQuestion,
+    LoggedQuestion,
     Question,
     CustomItem,
     CustomOrderFieldModel,
@@ -50,6 +75,10 @@ from tests.models import (
     Foobar,
     ChildModel,
     ParentModel,
+    Playlist,
+    PlaylistEntry,
+    Book,
+    Chapter,
 )
 
 
@@ -73,6 +102,28 @@ class ModelTestCase(TestCase):
         Item.objects.create(name="Wurble")
         self.assertNames(["1", "2", "3", "4", "Wurble"])
 
+    def test_trusted_order(self):
+        item = Item(name="Wurble", order=4)
+        with mock.patch.object(Item, "_wrt_map") as wrt_map:
+            with assertNumQueries(self, 1):
+                item.save(trusted_order=True)
+        wrt_map.assert_not_called()
+        self.assertNames(["1", "2", "3", "4", "Wurble"])
+        # without an order, the object is still placed at the end
+        Item(name="Blurble").save(trusted_order=True)
+        self.assertNames(["1", "2", "3", "4", "Wurble", "Blurble"])
+
+    def test_building_does_not_follow_wrt_paths(self):
+        group = ItemGroup.objects.create(user=TestUser.objects.create())
+        GroupedItem.objects.create(group=group)
+        with mock.patch("ordered_model.models.get_lookup_value") as lookup:
+            with assertNumQueries(self, 1):
+                item = GroupedItem.objects.get()
+            GroupedItem(group_id=group.pk, order=1)
+        lookup.assert_not_called()
+        item.save()
+        self.assertEqual(item.order, 0)
+
     def test_previous(self):
         self.assertEqual(Item.objects.get(pk=4).previous(), Item.objects.get(pk=3))
 
@@ -193,6 +244,17 @@ class OrderWithRespectToTests(TestCase):
             ],
         )
 
+    def test_trusted_order_after_change_of_group(self):
+        q2 = self.q2_a1.question
+        q2.answers.create(user=self.q2_a1.user)
+        self.q1_a2.question = q2
+        self.q1_a2.order = 3
+        self.q1_a2.save(trusted_order=True)
+        self.q1_a2.save()
+        self.assertEqual(list(q2.answers.values_list("order", flat=True)), [0, 1, 2, 3])
+        self.q1_a2.refresh_from_db()
+        self.assertEqual(self.q1_a2.order, 3)
+
     def test_previous(self):
         self.assertEqual(self.q1_a2.previous(), self.q1_a1)
 
@@ -220,6 +282,26 @@ class OrderWithRespectToTests(TestCase):
             ],
         )
 
+    def test_move_results(self):
+        q1_a3 = self.q1_a1.question.answers.create(user=self.q1_a1.user)
+        wrt = {"question": self.q1_a1.question_id, "user": self.q1_a1.user_id}
+        self.assertEqual(q1_a3.to(0), MoveResult(wrt, q1_a3.pk, 2, 0, (0, 2), 1))
+        self.q1_a1.refresh_from_db()
+        self.assertEqual(
+            self.q1_a1.bottom(), MoveResult(wrt, self.q1_a1.pk, 1, 2, (2, 3), -1)
+        )
+        self.assertEqual(
+            self.q1_a1.to(2), MoveResult(wrt, self.q1_a1.pk, 2, 2, (2, 2), 0)
+        )
+        self.q1_a2.refresh_from_db()
+        self.assertEqual(
+            q1_a3.swap(self.q1_a1), MoveResult(wrt, q1_a3.pk, 0, 2, (2, 3), -2)
+        )
+        self.assertEqual(
+            self.q1_a2.above(q1_a3), MoveResult(wrt, self.q1_a2.pk, 1, 1, (1, 1), 0)
+        )
+        self.assertEqual(q1_a3.up(), MoveResult(wrt, q1_a3.pk, 2, 1, (1, 2), 1))
+
     def test_up(self):
         self.q1_a2.up()
         self.assertSequenceEqual(
@@ -342,6 +424,248 @@ class OrderWithRespectToReorderTests(TestCase):
         )
 
 
+class OrderCacheTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(Answer, "order_cache_alias", "default")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        caches["default"].clear()
+        self.q1 = Question.objects.create()
+        self.u0 = TestUser.objects.create()
+        self.u1 = TestUser.objects.create()
+        self.u0_a = [self.q1.answers.create(user=self.u0) for i in range(3)]
+        self.u1_a = [self.q1.answers.create(user=self.u1) for i in range(2)]
+
+    def get_ordered_pks(self, user):
+        return Answer.objects.get_ordered_pks(question=self.q1.pk, user=user.pk)
+
+    def test_get_ordered_pks_is_cached(self):
+        a0, a1, a2 = self.u0_a
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_ordered_pks(self.u0), [a0.pk, a1.pk, a2.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_ordered_pks(self.u0), [a0.pk, a1.pk, a2.pk])
+
+    def test_wrt_spellings_share_a_group(self):
+        a0, a1, a2 = self.u0_a
+        self.assertEqual(
+            Answer.objects.get_ordered_pks(question=self.q1, user=self.u0),
+            [a0.pk, a1.pk, a2.pk],
+        )
+        a1.up()
+        self.assertEqual(
+            Answer.objects.get_ordered_pks(question=self.q1, user=self.u0),
+            [a1.pk, a0.pk, a2.pk],
+        )
+        self.assertEqual(
+            Answer.objects.get_ordered_pks(question_id=self.q1.pk, user=self.u0),
+            [a1.pk, a0.pk, a2.pk],
+        )
+        with self.assertRaises(ValueError):
+            Answer.objects.get_ordered_pks(question=self.q1)
+
+    def test_without_cache_alias(self):
+        with mock.patch.object(Answer, "order_cache_alias", None):
+            self.get_ordered_pks(self.u0)
+            with self.assertNumQueries(1):
+                self.get_ordered_pks(self.u0)
+
+    def test_trusted_save_invalidates_its_groups(self):
+        a0, a1, a2 = self.u0_a
+        self.get_ordered_pks(self.u0)
+        self.get_ordered_pks(self.u1)
+        a2.user = self.u1
+        a2.save(trusted_order=True)
+        self.assertEqual(self.get_ordered_pks(self.u0), [a0.pk, a1.pk])
+        self.assertEqual(
+            self.get_ordered_pks(self.u1), [self.u1_a[0].pk, self.u1_a[1].pk, a2.pk]
+        )
+
+    def test_move_invalidates_its_group(self):
+        a0, a1, a2 = self.u0_a
+        self.get_ordered_pks(self.u0)
+        self.get_ordered_pks(self.u1)
+        a2.to(0)
+        self.assertEqual(self.get_ordered_pks(self.u0), [a2.pk, a0.pk, a1.pk])
+        a0.refresh_from_db()
+        a1.refresh_from_db()
+        a0.swap(a1)
+        self.assertEqual(self.get_ordered_pks(self.u0), [a2.pk, a1.pk, a0.pk])
+        # the other group is still cached
+        with self.assertNumQueries(0):
+            self.get_ordered_pks(self.u1)
+
+    def test_changes_invalidate(self):
+        a0, a1, a2 = self.u0_a
+        self.get_ordered_pks(self.u0)
+        a1.delete()
+        self.assertEqual(self.get_ordered_pks(self.u0), [a0.pk, a2.pk])
+        Answer.objects.bulk_create([Answer(question=self.q1, user=self.u0)])
+        # not every database sets the pks of bulk created objects
+        a3 = Answer.objects.filter(user=self.u0).latest("pk")
+        self.assertEqual(self.get_ordered_pks(self.u0), [a0.pk, a2.pk, a3.pk])
+        Answer.objects.reorder([a3.pk, a0.pk])
+        self.assertEqual(self.get_ordered_pks(self.u0), [a3.pk, a2.pk, a0.pk])
+        Answer.objects.set_positions({a0.pk: 0})
+        self.assertEqual(self.get_ordered_pks(self.u0), [a0.pk, a3.pk, a2.pk])
+
+    def test_queryset_delete_invalidates(self):
+        items = [Item.objects.create(name=str(i)) for i in range(3)]
+        with mock.patch.object(Item, "order_cache_alias", "default"):
+            Item.objects.get_ordered_pks()
+            Item.objects.filter(pk=items[1].pk).delete()
+            self.assertEqual(Item.objects.get_ordered_pks(), [items[0].pk, items[2].pk])
+
+    def test_changing_group_invalidates_both(self):
+        a0, a1, a2 = self.u0_a
+        b0, b1 = self.u1_a
+        self.get_ordered_pks(self.u0)
+        self.get_ordered_pks(self.u1)
+        a1.user = self.u1
+        a1.save()
+        self.assertEqual(self.get_ordered_pks(self.u0), [a0.pk, a2.pk])
+        self.assertEqual(self.get_ordered_pks(self.u1), [b0.pk, b1.pk, a1.pk])
+
+    def test_reorder_model_invalidates_every_group(self):
+        self.get_ordered_pks(self.u0)
+        self.get_ordered_pks(self.u1)
+        call_command("reorder_model", "tests.Answer", verbosity=0)
+        with self.assertNumQueries(2):
+            self.get_ordered_pks(self.u0)
+            self.get_ordered_pks(self.u1)
+
+
+class QuerySetReorderTests(TestCase):
+    def setUp(self):
+        self.q1 = Question.objects.create()
+        self.u0 = TestUser.objects.create()
+        self.u1 = TestUser.objects.create()
+        self.u0_a = [self.q1.answers.create(user=self.u0) for i in range(4)]
+        self.u1_a = [self.q1.answers.create(user=self.u1) for i in range(2)]
+
+    def test_reorder(self):
+        a0, a1, a2, a3 = self.u0_a
+        with assertNumQueries(self, 2):
+            positions = Answer.objects.reorder([a2.pk, a0.pk, a1.pk])
+        self.assertEqual(positions, {a2.pk: 0, a0.pk: 1, a1.pk: 2})
+        self.assertSequenceEqual(
+            Answer.objects.filter(user=self.u0).values_list("pk", flat=True),
+            [a2.pk, a0.pk, a1.pk, a3.pk],
+        )
+        # the other group is untouched
+        self.assertSequenceEqual(
+            Answer.objects.filter(user=self.u1).values_list("order", flat=True),
+            [0, 1],
+        )
+
+    def test_reorder_keeps_occupied_positions(self):
+        a0, a1, a2, a3 = self.u0_a
+        positions = Answer.objects.reorder([str(a3.pk), str(a1.pk)])
+        self.assertEqual(positions, {a3.pk: 1, a1.pk: 3})
+        self.assertSequenceEqual(
+            Answer.objects.filter(user=self.u0).values_list("pk", flat=True),
+            [a0.pk, a3.pk, a2.pk, a1.pk],
+        )
+
+    def test_reorder_unchanged(self):
+        with assertNumQueries(self, 1):
+            Answer.objects.reorder([a.pk for a in self.u0_a])
+
+    def test_reorder_invalid(self):
+        a0, a1, a2, a3 = self.u0_a
+        with self.assertRaises(ValueError):
+            Answer.objects.reorder([a0.pk, a1.pk, 12345])
+        with self.assertRaises(ValueError):
+            Answer.objects.reorder([a0.pk, a1.pk, a0.pk])
+        with self.assertRaises(ValueError):
+            Answer.objects.reorder([a0.pk, self.u1_a[0].pk])
+
+
+class QuerySetMoveBlockTests(TestCase):
+    def setUp(self):
+        self.items = [Item.objects.create(name=str(i)) for i in range(8)]
+
+    def assertNames(self, names):
+        self.assertEqual(
+            list(Item.objects.values_list("name", "order")),
+            [(name, order) for order, name in enumerate(names)],
+        )
+
+    def pks(self, *names):
+        return [self.items[int(name)].pk for name in names]
+
+    def test_move_block_to_top(self):
+        with assertNumQueries(self, 2):
+            positions = Item.objects.move_block(self.pks("5", "2", "6"), 0)
+        self.assertEqual(positions, dict(zip(self.pks("2", "5", "6"), [0, 1, 2])))
+        self.assertNames(["2", "5", "6", "0", "1", "3", "4", "7"])
+
+    def test_move_block_to_bottom(self):
+        with assertNumQueries(self, 3):
+            Item.objects.move_block(self.pks("1", "4"))
+        self.assertNames(["0", "2", "3", "5", "6", "7", "1", "4"])
+
+    def test_move_block_to_position(self):
+        Item.objects.move_block(self.pks("0", "7"), 3)
+        self.assertNames(["1", "2", "3", "0", "7", "4", "5", "6"])
+        Item.objects.move_block(self.pks("3", "4", "5"), 1)
+        self.assertNames(["1", "3", "4", "5", "2", "0", "7", "6"])
+        # clamped to the bottom
+        Item.objects.move_block(self.pks("1"), 100)
+        self.assertNames(["3", "4", "5", "2", "0", "7", "6", "1"])
+
+    def test_move_block_in_place(self):
+        with assertNumQueries(self, 2):
+            Item.objects.move_block(self.pks("2", "3"), 2)
+        self.assertNames([str(i) for i in range(8)])
+
+    def test_move_block_per_group(self):
+        question = Question.objects.create()
+        u0, u1 = TestUser.objects.create(), TestUser.objects.create()
+        u0_a = [question.answers.create(user=u0) for i in range(3)]
+        u1_a = [question.answers.create(user=u1) for i in range(3)]
+        Answer.objects.move_block([u0_a[2].pk, u1_a[1].pk, u1_a[2].pk], 0)
+        self.assertSequenceEqual(
+            Answer.objects.values_list("pk", "order"),
+            [
+                (u0_a[2].pk, 0),
+                (u0_a[0].pk, 1),
+                (u0_a[1].pk, 2),
+                (u1_a[1].pk, 0),
+                (u1_a[2].pk, 1),
+                (u1_a[0].pk, 2),
+            ],
+        )
+
+
+class QuerySetSetPositionsTests(TestCase):
+    def setUp(self):
+        self.items = [Item.objects.create(name=str(i)) for i in range(8)]
+
+    def assertNames(self, names):
+        self.assertEqual(
+            list(Item.objects.values_list("name", "order")),
+            [(name, order) for order, name in enumerate(names)],
+        )
+
+    def test_set_positions(self):
+        with assertNumQueries(self, 3):
+            positions = Item.objects.set_positions(
+                {self.items[6].pk: 1, self.items[1].pk: 5, self.items[2].pk: 20}
+            )
+        self.assertEqual(
+            positions, {self.items[6].pk: 1, self.items[1].pk: 5, self.items[2].pk: 7}
+        )
+        self.assertNames(["0", "6", "3", "4", "5", "1", "7", "2"])
+
+    def test_set_positions_invalid(self):
+        with self.assertRaises(ValueError):
+            Item.objects.set_positions({self.items[0].pk: 1, self.items[1].pk: 1})
+        with self.assertRaises(ValueError):
+            Item.objects.set_positions({12345: 1})
+        self.assertNames([str(i) for i in range(8)])
+
+
 class CustomPKTest(TestCase):
     def setUp(self):
         self.item1 = CustomItem.objects.create(pkid=str(uuid.uuid4()), name="1")
@@ -601,6 +925,230 @@ class OrderedModelAdminTest(TestCase):
         self.assertIn("/admin/tests/item/1/move-top/", str(res.content))
         self.assertIn("/admin/tests/item/1/move-bottom/", str(res.content))
 
+    def test_changelist_built_once(self):
+        init = ChangeList.__init__
+        calls = []
+
+        def counting_init(cl, *args, **kwargs):
+            calls.append(cl)
+            init(cl, *args, **kwargs)
+
+        with mock.patch.object(ChangeList, "__init__", counting_init):
+            res = self.client.get("/admin/tests/item/", {"o": "-2", "q": "item"})
+        self.assertEqual(len(calls), 1)
+        self.assertContains(res, "/admin/tests/item/1/move-up/?o=-2&amp;q=item")
+        self.assertEqual(admin.site._registry[Item].request_query_string, "")
+
+        # the query string does not leak into later requests
+        res = self.client.get("/admin/tests/item/")
+        self.assertContains(res, '<a href="/admin/tests/item/1/move-up/?">')
+
+    def test_move_links_rendered_once_per_changelist(self):
+        with mock.patch(
+            "ordered_model.admin.render_to_string", wraps=render_to_string
+        ) as render:
+            res = self.client.get("/admin/tests/item/")
+        self.assertEqual(render.call_count, 1)
+        for pk in (1, 2, 3):
+            self.assertContains(
+                res, '<a href="/admin/tests/item/{}/move-down/?">'.format(pk)
+            )
+
+    def test_changelist_state_reset_on_error(self):
+        def changelist_view(self, request, extra_context=None):
+            self.get_changelist_instance(request)
+            raise RuntimeError
+
+        with mock.patch.object(admin.ModelAdmin, "changelist_view", changelist_view):
+            with self.assertRaises(RuntimeError):
+                self.client.get("/admin/tests/item/")
+        self.assertIsNone(_get_changelist_state())
+
+    def test_move_links_quote_pk(self):
+        item = Item(pk="a b&c/d")
+        links = admin.site._registry[Item].move_up_down_links(item)
+        url = reverse("admin:tests_item_change_order", args=[item.pk, "bottom"])
+        self.assertIn('<a href="{}">'.format(escape(url)), links)
+        self.assertIn("/a%20b&amp;c/d/move-bottom/", links)
+
+    def test_reorder_view(self):
+        res = self.client.post(
+            "/admin/tests/item/reorder/",
+            {"pks": [3, 1, 2]},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {"positions": {"3": 0, "1": 1, "2": 2}})
+        self.assertSequenceEqual(
+            Item.objects.values_list("name", flat=True), ["item3", "item1", "item2"]
+        )
+
+    def test_reorder_view_position(self):
+        res = self.client.post(
+            "/admin/tests/item/reorder/",
+            {"pk": 1, "position": 2},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.json(),
+            {"positions": {"1": 2}, "moved": {"pk": "1", "from": 0, "to": 2}},
+        )
+        self.assertSequenceEqual(
+            Item.objects.values_list("name", flat=True), ["item2", "item3", "item1"]
+        )
+
+        # form encoded
+        res = self.client.post("/admin/tests/item/reorder/", {"pks": ["1", "2"]})
+        self.assertEqual(res.json(), {"positions": {"1": 0, "2": 2}})
+
+    def test_reorder_view_position_out_of_range(self):
+        for position, names, moved in (
+            (50, ["item2", "item3", "item1"], {"pk": "1", "from": 0, "to": 2}),
+            (-3, ["item1", "item2", "item3"], {"pk": "1", "from": 2, "to": 0}),
+        ):
+            res = self.client.post(
+                "/admin/tests/item/reorder/",
+                {"pk": 1, "position": position},
+                content_type="application/json",
+            )
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.json()["moved"], moved)
+            self.assertSequenceEqual(Item.objects.values_list("name", flat=True), names)
+        self.assertSequenceEqual(
+            Item.objects.values_list("order", flat=True), [0, 1, 2]
+        )
+
+    def test_reorder_view_invalid(self):
+        res = self.client.get("/admin/tests/item/reorder/")
+        self.assertEqual(res.status_code, 405)
+        for data in (
+            {"pks": [1, 1]},
+            {"pks": 1},
+            {"pk": 1},
+            {"pk": 1, "position": "x"},
+        ):
+            res = self.client.post(
+                "/admin/tests/item/reorder/", data, content_type="application/json"
+            )
+            self.assertEqual(res.status_code, 400)
+            self.assertIn("error", res.json())
+        res = self.client.post(
+            "/admin/tests/item/reorder/",
+            {"pk": 99, "position": 0},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 404)
+        self.assertSequenceEqual(
+            Item.objects.values_list("name", flat=True), ["item1", "item2", "item3"]
+        )
+
+    def test_reorder_view_permission(self):
+        User.objects.create_user("staff", "s@example.com", "staff", is_staff=True)
+        self.client.login(username="staff", password="staff")
+        res = self.client.post(
+            "/admin/tests/item/reorder/",
+            {"pks": [3, 1, 2]},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 403)
+
+    def test_move_links_reorder_url(self):
+        res = self.client.get("/admin/tests/item/")
+        self.assertContains(
+            res,
+            '<span class="ordered-model-controls" data-object-id="1" '
+            'data-reorder-url="/admin/tests/item/reorder/" data-group="[]">',
+        )
+        self.assertContains(res, "ordered_model/reorder.js")
+
+    def test_move_to_position(self):
+        res = self.client.get("/admin/tests/item/1/move-to/", {"position": 2, "o": 1})
+        self.assertRedirects(res, "/admin/tests/item/?o=1")
+        self.assertSequenceEqual(
+            Item.objects.values_list("name", flat=True), ["item2", "item3", "item1"]
+        )
+        # clamped to the list
+        self.client.get("/admin/tests/item/1/move-to/", {"position": -5})
+        self.assertEqual(Item.objects.get(name="item1").order, 0)
+        res = self.client.get("/admin/tests/item/1/move-to/", {"position": "x"})
+        self.assertEqual(res.status_code, 404)
+
+    def test_move_above_below(self):
+        res = self.client.get("/admin/tests/item/3/move-above/", {"target": 1})
+        self.assertRedirects(res, "/admin/tests/item/")
+        self.assertSequenceEqual(
+            Item.objects.values_list("name", flat=True), ["item3", "item1", "item2"]
+        )
+        self.client.get("/admin/tests/item/3/move-below/", {"target": 2})
+        self.assertSequenceEqual(
+            Item.objects.values_list("name", flat=True), ["item1", "item2", "item3"]
+        )
+        res = self.client.get("/admin/tests/item/3/move-below/", {"target": 99})
+        self.assertEqual(res.status_code, 404)
+
+    def test_move_actions(self):
+        res = self.client.get("/admin/tests/item/")
+        self.assertContains(res, '<option value="move_to_position">')
+        self.assertContains(res, 'name="position"')
+
+        res = self.client.post(
+            "/admin/tests/item/",
+            {"action": "move_to_top", "_selected_action": [2, 3]},
+            follow=True,
+        )
+        self.assertContains(res, "Moved 2 items.")
+        self.assertSequenceEqual(
+            Item.objects.values_list("name", flat=True), ["item2", "item3", "item1"]
+        )
+
+        self.client.post(
+            "/admin/tests/item/",
+            {"action": "move_to_bottom", "_selected_action": [2]},
+        )
+        self.assertSequenceEqual(
+            Item.objects.values_list("name", flat=True), ["item3", "item1", "item2"]
+        )
+
+        self.client.post(
+            "/admin/tests/item/",
+            {"action": "move_to_position", "_selected_action": [2], "position": 1},
+        )
+        self.assertSequenceEqual(
+            Item.objects.values_list("name", flat=True), ["item3", "item2", "item1"]
+        )
+
+        res = self.client.post(
+            "/admin/tests/item/",
+            {"action": "move_to_position", "_selected_action": [2], "position": ""},
+            follow=True,
+        )
+        self.assertContains(res, "Enter the position to move the items to.")
+
+    def test_move_json(self):
+        # session and user, the move, and the neighbours; no changelist
+        with assertNumQueries(self, 8):
+            res = self.client.get(
+                "/admin/tests/item/1/move-down/", HTTP_ACCEPT="application/json"
+            )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.json(), {"pk": "1", "position": 1, "previous": "2", "next": "3"}
+        )
+        res = self.client.get(
+            "/admin/tests/item/1/move-bottom/",
+            HTTP_ACCEPT="application/json, text/javascript",
+        )
+        self.assertEqual(
+            res.json(), {"pk": "1", "position": 2, "previous": "3", "next": None}
+        )
+
+        res = self.client.get(
+            "/admin/tests/item/1/move-top/", HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+        self.assertEqual(res.status_code, 204)
+        self.assertEqual(Item.objects.get(name="item1").order, 0)
+
     def test_move_invalid_direction(self):
         res = self.client.get("/admin/tests/item/1/move-middle/")
         self.assertEqual(res.status_code, 404)
@@ -678,6 +1226,62 @@ class OrderedModelAdminTest(TestCase):
         self.assertEqual(self.pizza_to_pineapple.order, 0)
         self.assertEqual(res.status_code, 200)
 
+    def test_move_up_down_links_ordered_inline_queries(self):
+        inline = PizzaToppingTabularInline(Pizza, admin.site)
+        obj = PizzaToppingsThroughModel.objects.get(pk=self.pizza_to_ham.pk)
+        with assertNumQueries(self, 0):
+            links = inline.move_up_down_links(obj)
+        self.assertIn(
+            '<a href="/admin/tests/pizza/{}/pizzatoppingsthroughmodel/{}/move-up/">'.format(
+                self.pizza.id, obj.id
+            ),
+            links,
+        )
+
+    def test_reorder_view_ordered_inline(self):
+        url = "/admin/tests/pizza/{}/pizzatoppingsthroughmodel/reorder/".format(
+            self.pizza.id
+        )
+        res = self.client.get("/admin/tests/pizza/{}/change/".format(self.pizza.id))
+        self.assertContains(res, 'data-reorder-url="{}"'.format(url))
+
+        res = self.client.post(
+            url,
+            {"pks": [self.pizza_to_pineapple.pk, self.pizza_to_ham.pk]},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.pizza_to_ham.refresh_from_db()
+        self.pizza_to_pineapple.refresh_from_db()
+        self.assertEqual(self.pizza_to_ham.order, 1)
+        self.assertEqual(self.pizza_to_pineapple.order, 0)
+
+        res = self.client.post(
+            url,
+            {"pk": self.pizza_to_pineapple.pk, "position": 50},
+            content_type="application/json",
+        )
+        self.assertEqual(res.json()["moved"]["to"], 1)
+        self.pizza_to_pineapple.refresh_from_db()
+        self.assertEqual(self.pizza_to_pineapple.order, 1)
+
+    def test_move_ordered_inline_json(self):
+        res = self.client.get(
+            "/admin/tests/pizza/{}/pizzatoppingsthroughmodel/{}/move-up/".format(
+                self.pizza.id, self.pizza_to_pineapple.id
+            ),
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(
+            res.json(),
+            {
+                "pk": str(self.pizza_to_pineapple.pk),
+                "position": 0,
+                "previous": None,
+                "next": str(self.pizza_to_ham.pk),
+            },
+        )
+
     def test_move_up_down_proxy_stacked_inline(self):
         res = self.client.get("/admin/tests/pizzaproxy/")
         self.assertContains(
@@ -695,6 +1299,121 @@ class OrderedModelAdminTest(TestCase):
         )
 
 
+class OrderedFormSetAdminTest(TestCase):
+    def setUp(self):
+        User.objects.create_superuser("admin", "a@example.com", "admin")
+        self.assertTrue(self.client.login(username="admin", password="admin"))
+        self.book = Book.objects.create(name="book")
+        self.other_book = Book.objects.create(name="other")
+        self.chapters = [
+            Chapter.objects.create(book=self.book, name=str(i)) for i in range(4)
+        ]
+        self.other = Chapter.objects.create(book=self.other_book, name="other")
+
+    def assertChapters(self, book, names):
+        self.assertEqual(
+            list(book.chapters.values_list("name", "position")),
+            [(name, position) for position, name in enumerate(names)],
+        )
+
+    def changelist_data(self, positions):
+        chapters = list(Chapter.objects.all())
+        data = {
+            "form-TOTAL_FORMS": len(chapters),
+            "form-INITIAL_FORMS": len(chapters),
+            "_save": "Save",
+        }
+        for i, chapter in enumerate(chapters):
+            data["form-{}-id".format(i)] = chapter.pk
+            data["form-{}-position".format(i)] = positions.get(
+                chapter.name, chapter.position
+            )
+        return data
+
+    def test_list_editable(self):
+        res = self.client.post(
+            "/admin/tests/chapter/", self.changelist_data({"0": 2, "3": 0})
+        )
+        self.assertRedirects(res, "/admin/tests/chapter/")
+        self.assertChapters(self.book, ["3", "1", "0", "2"])
+        self.assertChapters(self.other_book, ["other"])
+
+    def test_list_editable_cleared_position(self):
+        res = self.client.post(
+            "/admin/tests/chapter/", self.changelist_data({"1": "", "3": 0})
+        )
+        self.assertRedirects(res, "/admin/tests/chapter/")
+        self.assertChapters(self.book, ["3", "0", "1", "2"])
+
+    def test_reorder_rows_of_a_group(self):
+        # the script posts the rows of the dragged row's group, told apart by
+        # their data-group
+        res = self.client.get("/admin/tests/chapter/")
+        group = escape('["{}"]'.format(self.book.pk))
+        self.assertContains(res, 'data-group="{}"'.format(group), count=4)
+        self.assertContains(
+            res, 'data-group="{}"'.format(escape('["{}"]'.format(self.other_book.pk)))
+        )
+        res = self.client.post(
+            "/admin/tests/chapter/reorder/",
+            {"pks": [c.pk for c in reversed(self.chapters)]},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertChapters(self.book, ["3", "2", "1", "0"])
+        self.assertChapters(self.other_book, ["other"])
+
+    def test_list_editable_duplicate_positions(self):
+        res = self.client.post(
+            "/admin/tests/chapter/", self.changelist_data({"0": 1, "3": 1})
+        )
+        self.assertContains(res, "Position 1 is given more than once.")
+        self.assertChapters(self.book, ["0", "1", "2", "3"])
+
+        # the same position in different groups
+        res = self.client.post(
+            "/admin/tests/chapter/", self.changelist_data({"0": 3, "other": 0})
+        )
+        self.assertRedirects(res, "/admin/tests/chapter/")
+        self.assertChapters(self.book, ["1", "2", "3", "0"])
+
+    def inline_data(self, positions, new=None):
+        data = {
+            "name": self.book.name,
+            "chapters-TOTAL_FORMS": len(self.chapters) + (1 if new else 0),
+            "chapters-INITIAL_FORMS": len(self.chapters),
+            "chapters-MIN_NUM_FORMS": 0,
+            "chapters-MAX_NUM_FORMS": 1000,
+        }
+        for i, chapter in enumerate(self.chapters):
+            data["chapters-{}-id".format(i)] = chapter.pk
+            data["chapters-{}-book".format(i)] = self.book.pk
+            data["chapters-{}-name".format(i)] = chapter.name
+            data["chapters-{}-position".format(i)] = positions.get(
+                chapter.name, chapter.position
+            )
+        if new:
+            i = len(self.chapters)
+            data["chapters-{}-book".format(i)] = self.book.pk
+            data["chapters-{}-name".format(i)] = new[0]
+            data["chapters-{}-position".format(i)] = new[1]
+        return data
+
+    def test_inline(self):
+        url = "/admin/tests/book/{}/change/".format(self.book.pk)
+        res = self.client.post(url, self.inline_data({"2": 0}, new=("new", 1)))
+        self.assertRedirects(res, "/admin/tests/book/")
+        self.assertChapters(self.book, ["2", "new", "0", "1", "3"])
+
+        self.chapters = list(self.book.chapters.all())
+        res = self.client.post(url, self.inline_data({"new": 9}))
+        self.assertRedirects(res, "/admin/tests/book/")
+        self.assertChapters(self.book, ["2", "0", "1", "3", "new"])
+
+        res = self.client.post(url, self.inline_data({"0": 0, "1": 0}))
+        self.assertContains(res, "Position 0 is given more than once.")
+
+
 class OrderWithRespectToTestsManyToMany(TestCase):
     def setUp(self):
         self.t1 = Topping.objects.create(name="tomatoe")
@@ -939,6 +1658,94 @@ class OrderWithRespectToTestsOrderedManyToManyField(TestCase):
         l1 = self.p1.toppings.all().values_list("name", flat=True)
         self.assertEqual(list(l1), ["anchovy", "tomatoe", "mozarella"])
 
+    def test_prefetch_related_keeps_through_order(self):
+        self.p1_t3.top()  # anchovy, tomatoe, mozarella
+        p2 = PizzaOM2M.objects.create(name="Marinara")
+        PizzaOM2MToppingsThroughModel.objects.create(pizza=p2, topping=self.t2)
+        PizzaOM2MToppingsThroughModel.objects.create(pizza=p2, topping=self.t1)
+        with self.assertNumQueries(2):
+            pizzas = list(PizzaOM2M.objects.order_by("pk").prefetch_related("toppings"))
+            names = [[t.name for t in pizza.toppings.all()] for pizza in pizzas]
+        self.assertEqual(
+            names, [["anchovy", "tomatoe", "mozarella"], ["mozarella", "tomatoe"]]
+        )
+
+    def assertToppings(self, pizza, toppings):
+        self.assertEqual(list(pizza.toppings.all()), toppings)
+        self.assertEqual(
+            list(
+                PizzaOM2MToppingsThroughModel.objects.filter(pizza=pizza).values_list(
+                    "order", flat=True
+                )
+            ),
+            list(range(len(toppings))),
+        )
+
+    def test_add_keeps_given_order(self):
+        p2 = PizzaOM2M.objects.create(name="Marinara")
+        # missing targets, then one grouped MAX and one INSERT; before Django
+        # 3.0 the created rows are reordered after the INSERT
+        with self.assertNumQueries(3 if VERSION >= (3, 0) else 7):
+            p2.toppings.add(self.t3, self.t1, self.t2)
+        self.assertToppings(p2, [self.t3, self.t1, self.t2])
+
+    def test_add_at_position(self):
+        t4 = Topping.objects.create(name="basil")
+        self.p1.toppings.add(t4, self.t3, position=1)
+        self.assertToppings(self.p1, [self.t1, t4, self.t3, self.t2])
+        self.p1.toppings.add(self.t1, position=10)
+        self.assertToppings(self.p1, [t4, self.t3, self.t2, self.t1])
+
+    def test_set_keeps_given_order(self):
+        t4 = Topping.objects.create(name="basil")
+        self.p1.toppings.set([self.t3, t4, self.t1])
+        self.assertToppings(self.p1, [self.t3, t4, self.t1])
+        self.p1.toppings.set([self.t1.pk, self.t3.pk], clear=True)
+        self.assertToppings(self.p1, [self.t1, self.t3])
+
+    def test_reverse_follows_through_ordering(self):
+        p2 = PizzaOM2M.objects.create(name="Marinara")
+        PizzaOM2MToppingsThroughModel.objects.create(pizza=p2, topping=self.t1)
+        queryset = self.t1.pizzaom2m_set.all()
+        self.assertEqual(
+            queryset.query.order_by,
+            (
+                "pizzaom2mtoppingsthroughmodel__pizza",
+                "pizzaom2mtoppingsthroughmodel__order",
+            ),
+        )
+        self.assertEqual(list(queryset), [self.p1, p2])
+        self.assertEqual(list(self.t1.pizzaom2m_set.all().reverse()), [p2, self.p1])
+
+    def test_reverse_prefetch_related(self):
+        p2 = PizzaOM2M.objects.create(name="Marinara")
+        PizzaOM2MToppingsThroughModel.objects.create(pizza=p2, topping=self.t1)
+        with self.assertNumQueries(2):
+            toppings = list(
+                Topping.objects.filter(pk__in=[self.t1.pk, self.t2.pk])
+                .order_by("pk")
+                .prefetch_related("pizzaom2m_set")
+            )
+            pizzas = [list(topping.pizzaom2m_set.all()) for topping in toppings]
+        self.assertEqual(pizzas, [[self.p1, p2], [self.p1]])
+
+    def test_reverse_add_position(self):
+        p2 = PizzaOM2M.objects.create(name="Marinara")
+        with self.assertRaises(ValueError):
+            self.t1.pizzaom2m_set.add(p2, position=0)
+        self.t1.pizzaom2m_set.add(p2)
+        self.assertToppings(p2, [self.t1])
+
+    def test_prefetch_related_explicit_ordering(self):
+        self.p1_t3.top()
+        queryset = Topping.objects.order_by("name")
+        with self.assertNumQueries(2):
+            pizza = PizzaOM2M.objects.prefetch_related(
+                Prefetch("toppings", queryset=queryset)
+            ).get(pk=self.p1.pk)
+            names = [t.name for t in pizza.toppings.all()]
+        self.assertEqual(names, ["anchovy", "mozarella", "tomatoe"])
+
 
 class MultiOrderWithRespectToTests(TestCase):
     def setUp(self):
@@ -1012,6 +1819,17 @@ class OrderWithRespectToRelatedModelFieldTests(TestCase):
             [(i2.pk, 0), (self.u1_g2_i1.pk, 1), (self.u1_g1_i1.pk, 2)],
         )
 
+    def test_change_of_group(self):
+        self.u1_g1_i1.group = self.u2_g1
+        self.u1_g1_i1.save()
+        self.assertEqual(self.u1_g1_i1.order, 2)
+        self.u1_g2_i1.refresh_from_db()
+        self.assertEqual(self.u1_g2_i1.order, 0)
+        # another group of the same user keeps the order
+        self.u2_g2_i1.group = self.u2_g1
+        self.u2_g2_i1.save()
+        self.assertEqual(self.u2_g2_i1.order, 0)
+
     def test_swap_fails_between_users(self):
         with self.assertRaises(ValueError):
             self.u1_g1_i1.swap(self.u2_g1_i1)
@@ -1094,6 +1912,15 @@ class PolymorphicOrderGenerationTests(TestCase):
         o1 = OpenQuestion.objects.create()
         self.assertIsInstance(o1, OpenQuestion)
 
+    def test_order_class_path_is_imported_once(self):
+        OpenQuestion.objects.create()
+        with mock.patch("ordered_model.models.import_string") as import_string:
+            o2 = OpenQuestion.objects.create()
+            o2.up()
+            o2.previous()
+        import_string.assert_not_called()
+        self.assertIs(OpenQuestion._get_ordering_model(), BaseQuestion)
+
 
 class BulkCreateTests(TestCase):
     def test(self):
@@ -1405,6 +2232,45 @@ class ReorderModelTestCase(TestCase):
                 batch_size="2",
             )
 
+    def test_check(self):
+        """
+        Test that 'reorder_model --check' reports a wrong ordering without
+        changing it, and passes once the model is reordered.
+        """
+        group = ItemGroup.objects.create(user=TestUser.objects.create())
+        GroupedItem.objects.create(group=group, order=0)
+        GroupedItem.objects.create(group=group, order=2)
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, "1 objects have a wrong ordering."):
+            call_command("reorder_model", "tests.GroupedItem", check=True, stdout=out)
+        self.assertIn(
+            "wrong order of tests.GroupedItem (2): 2 instead of 1", out.getvalue()
+        )
+        self.assertSequenceEqual(
+            GroupedItem.objects.values_list("order", flat=True), [0, 2]
+        )
+
+        call_command("reorder_model", "tests.GroupedItem", verbosity=0)
+        call_command("reorder_model", "tests.GroupedItem", check=True, stdout=out)
+
+    def test_check_bucketed(self):
+        """
+        Test that 'reorder_model --check' accepts bucketed lists which are not
+        packed, but reports gaps within buckets.
+        """
+        playlist = Playlist.objects.create()
+        entries = [playlist.entries.create(name=str(i)) for i in range(12)]
+        entries[1].to(6)
+        call_command(
+            "reorder_model", "tests.PlaylistEntry", check=True, stdout=StringIO()
+        )
+
+        PlaylistEntry.objects.filter(pk=entries[0].pk).update(order=5)
+        with self.assertRaises(CommandError):
+            call_command(
+                "reorder_model", "tests.PlaylistEntry", check=True, stdout=StringIO()
+            )
+
 
 class DRFTestCase(APITestCase):
     fixtures = ["test_items.json"]
@@ -1433,6 +2299,51 @@ class DRFTestCase(APITestCase):
             response.data, {"pkid": "b", "name": "2", "modified": None, "order": 2}
         )
 
+    def test_create_inserts_at_position(self):
+        serializer = ItemSerializer(data={"pkid": "c", "name": "3", "order": 1})
+        self.assertTrue(serializer.is_valid())
+        # MAX, the shift and the INSERT, within a savepoint
+        with assertNumQueries(self, 5):
+            serializer.save()
+        self.assertEqual(serializer.data["order"], 1)
+        self.assertEqual(
+            list(CustomItem.objects.values_list("pkid", "order")),
+            [("a", 0), ("c", 1), ("b", 2)],
+        )
+
+    def test_create_clamps_position(self):
+        response = self.client.post(
+            reverse("customitem-list"),
+            {"pkid": "c", "name": "3", "order": 10},
+            format="json",
+        )
+        self.assertEqual(response.data["order"], 2)
+        response = self.client.post(
+            reverse("customitem-list"),
+            {"pkid": "d", "name": "4", "order": -3},
+            format="json",
+        )
+        self.assertEqual(response.data["order"], 0)
+        self.assertEqual(
+            list(CustomItem.objects.values_list("pkid", "order")),
+            [("d", 0), ("a", 1), ("b", 2), ("c", 3)],
+        )
+
+    def test_order_field_writable(self):
+        class Serializer(ItemSerializer):
+            class Meta(ItemSerializer.Meta):
+                read_only_fields = ("order",)
+
+        self.assertFalse(Serializer().fields["order"].read_only)
+        # the order field is looked up by each serializer, which may depend
+        # on its context
+        with mock.patch.object(
+            Serializer, "get_order_field", return_value="order"
+        ) as get_order_field:
+            for item in CustomItem.objects.all():
+                self.assertIn("order", Serializer(item).data)
+        self.assertEqual(get_order_field.call_count, CustomItem.objects.count())
+
     def test_patch_shuffles_down(self):
         self.item3 = CustomItem.objects.create(pkid="c", name="3")
 
@@ -1487,6 +2398,200 @@ class DRFTestCase(APITestCase):
         self.assertEqual(CustomItem.objects.get(pkid="a").order, 1)
 
 
+class DRFMoveTestCase(APITestCase):
+    def setUp(self):
+        for pkid in "abcd":
+            CustomItem.objects.create(pkid=pkid, name=pkid)
+
+    def assertOrder(self, pkids):
+        self.assertEqual(
+            "".join(CustomItem.objects.values_list("pkid", flat=True)), pkids
+        )
+
+    def move(self, pk, data, etag=None):
+        return self.client.post(
+            reverse("customitem-move", kwargs={"pk": pk}),
+            data,
+            format="json",
+            **({"HTTP_IF_MATCH": etag} if etag else {}),
+        )
+
+    def test_move(self):
+        res = self.move("a", {"direction": "down"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["order"], 1)
+        self.assertOrder("bacd")
+        self.move("d", {"direction": "top"})
+        self.assertOrder("dbac")
+        self.move("d", {"direction": "to", "position": 2})
+        self.assertOrder("badc")
+        self.move("c", {"direction": "above", "target": "b"})
+        self.assertOrder("cbad")
+        self.move("c", {"direction": "below", "target": "a"})
+        self.assertOrder("bacd")
+
+    def test_move_invalid(self):
+        for data in (
+            {"direction": "sideways"},
+            {"direction": "to", "position": "x"},
+            {"direction": "above"},
+        ):
+            self.assertEqual(self.move("a", data).status_code, 400)
+        res = self.move("a", {"direction": "above", "target": "zz"})
+        self.assertEqual(res.status_code, 404)
+        self.assertOrder("abcd")
+
+    def test_move_invalid_target(self):
+        item = CustomOrderFieldModel.objects.create(name="a")
+        res = self.client.post(
+            reverse("customorderfieldmodel-move", kwargs={"pk": item.pk}),
+            {"direction": "below", "target": "x"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 404)
+
+    def test_move_invalid_keeps_version(self):
+        etag = self.client.get(reverse("customitem-detail", kwargs={"pk": "a"}))["ETag"]
+        for data in (
+            {"direction": "to", "position": "x"},
+            {"direction": "above", "target": "zz"},
+        ):
+            self.assertIn(self.move("a", data, etag).status_code, (400, 404))
+        res = self.move("a", {"direction": "to", "position": 2}, etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertOrder("bcad")
+
+    def test_move_if_match(self):
+        etag = self.client.get(reverse("customitem-detail", kwargs={"pk": "a"}))["ETag"]
+        res = self.move("a", {"direction": "bottom"}, etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertOrder("bcda")
+
+        # a stale version is rejected before any query
+        with assertNumQueries(self, 0):
+            res = self.move("b", {"direction": "bottom"}, etag)
+        self.assertEqual(res.status_code, 412)
+        self.assertOrder("bcda")
+
+        res = self.move("b", {"direction": "bottom"}, "W/" + etag)
+        self.assertEqual(res.status_code, 412)
+        # a concurrent request claimed the next version after the check
+        with mock.patch.object(ItemViewSet, "_check_if_match"):
+            res = self.move("b", {"direction": "bottom"}, etag)
+        self.assertEqual(res.status_code, 412)
+        # and its move was rolled back
+        self.assertOrder("bcda")
+        res = self.move("b", {"direction": "bottom"}, "*")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # writes through the viewset change the version
+        etag = res["ETag"]
+        self.client.patch(
+            reverse("customitem-detail", kwargs={"pk": "c"}),
+            {"name": "x"},
+            format="json",
+        )
+        self.assertEqual(self.move("c", {"direction": "up"}, etag).status_code, 412)
+
+    def test_move_if_match_changed_elsewhere(self):
+        def get_etag():
+            return self.client.get(reverse("customitem-detail", kwargs={"pk": "a"}))[
+                "ETag"
+            ]
+
+        # moves, creates and deletes made without the viewset change the version
+        for change in (
+            lambda: CustomItem.objects.set_positions({"d": 0}),
+            lambda: CustomItem.objects.get(pkid="b").to(0),
+            lambda: CustomItem.objects.create(pkid="e", name="e"),
+            lambda: CustomItem.objects.get(pkid="e").delete(),
+        ):
+            etag = get_etag()
+            change()
+            res = self.move("a", {"direction": "up"}, etag)
+            self.assertEqual(res.status_code, 412)
+
+        # a move leaving the group as it is does not
+        etag = get_etag()
+        CustomItem.objects.get(pkid="c").to(CustomItem.objects.get(pkid="c").order)
+        res = self.move("a", {"direction": "up"}, etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.move("a", {"direction": "up"}, res["ETag"]).status_code, 200
+        )
+
+
+class DRFBulkReorderTestCase(APITestCase):
+    def setUp(self):
+        for pkid in "abcdef":
+            CustomItem.objects.create(pkid=pkid, name=pkid)
+
+    def assertOrder(self, pkids):
+        self.assertEqual(
+            "".join(CustomItem.objects.values_list("pkid", flat=True)), pkids
+        )
+
+    def test_bulk_reorder(self):
+        serializer = ItemSerializer(
+            CustomItem.objects.all(),
+            data=[
+                {"pk": "e", "order": 0},
+                {"pkid": "a", "order": 3, "name": "x"},
+                {"pk": "b", "order": 99},
+            ],
+            many=True,
+            partial=True,
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        # load, rename a, shift the group
+        with assertNumQueries(self, 6):
+            serializer.save()
+        self.assertOrder("ecdafb")
+        self.assertEqual(
+            [(item["pkid"], item["name"], item["order"]) for item in serializer.data],
+            [("e", "e", 0), ("a", "x", 3), ("b", "b", 5)],
+        )
+
+    def test_bulk_reorder_refreshes_other_items(self):
+        serializer = ItemSerializer(
+            CustomItem.objects.all(),
+            data=[{"pkid": "d", "order": 0}, {"pkid": "a", "name": "renamed"}],
+            many=True,
+            partial=True,
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertOrder("dabcef")
+        self.assertEqual(
+            [(item["pkid"], item["name"], item["order"]) for item in serializer.data],
+            [("d", "d", 0), ("a", "renamed", 1)],
+        )
+
+    def test_bulk_reorder_invalid(self):
+        for data in (
+            [{"pk": "a", "order": 1}, {"pk": "zz", "order": 0}],
+            [{"pk": "a", "order": 1}, {"pk": "a", "order": 0}],
+            [{"order": 1}],
+        ):
+            serializer = ItemSerializer(
+                CustomItem.objects.all(), data=data, many=True, partial=True
+            )
+            self.assertFalse(serializer.is_valid())
+
+        serializer = ItemSerializer(
+            CustomItem.objects.all(),
+            data=[{"pk": "a", "order": 1, "name": "x"}, {"pk": "b", "order": 1}],
+            many=True,
+            partial=True,
+        )
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        self.assertOrder("abcdef")
+        self.assertEqual(CustomItem.objects.get(pk="a").name, "a")
+
+
 @isolate_apps("tests", attr_name="apps")
 @override_system_checks([checks.model_checks.check_all_models])
 class ChecksTest(SimpleTestCase):
@@ -1668,6 +2773,51 @@ class ChecksTest(SimpleTestCase):
             [],
         )
 
+    def test_bucketed_ordering(self):
+        class TestModel(BucketedOrderedModel):
+            class Meta:
+                ordering = ("order",)
+
+        self.assertEqual(
+            checks.run_checks(app_configs=self.apps.get_app_configs()),
+            [
+                checks.Error(
+                    msg="BucketedOrderedModelBase subclass Meta.ordering must end with the bucket and order fields.",
+                    hint="Use Meta.ordering = (..., 'bucket', 'order').",
+                    obj="ChecksTest.test_bucketed_ordering.<locals>.TestModel",
+                    id="ordered_model.E008",
+                )
+            ],
+        )
+
+    def test_bad_order_class_path(self):
+        class TestModel(OrderedModel):
+            order_class_path = "tests.models.Missing"
+
+        class TestOtherModel(OrderedModel):
+            order_class_path = "tests.models.Item"
+
+        errors = checks.run_checks(app_configs=self.apps.get_app_configs())
+        self.assertEqual(
+            [e.id for e in errors], ["ordered_model.E010", "ordered_model.E011"]
+        )
+        self.assertEqual(
+            errors[0].obj, "ChecksTest.test_bad_order_class_path.<locals>.TestModel"
+        )
+        self.assertTrue(
+            errors[0].msg.startswith(
+                "OrderedModelBase subclass order_class_path 'tests.models.Missing' cannot be imported:"
+            )
+        )
+        self.assertEqual(
+            errors[1],
+            checks.Error(
+                msg="OrderedModelBase subclass order_class_path 'tests.models.Item' is not an ordered model the subclass inherits from.",
+                obj="ChecksTest.test_bad_order_class_path.<locals>.TestOtherModel",
+                id="ordered_model.E011",
+            ),
+        )
+
 
 class TestCascadedDelete(TestCase):
     def test_that_model_when_deleted_by_cascade_still_maintains_ordering(self):
@@ -1759,3 +2909,682 @@ class ParentChildModelTests(TestCase):
         assert child2.order == 0
         assert child3.order == 1
         assert child4.order == 2
+
+
+class BucketedOrderingTests(TestCase):
+    def setUp(self):
+        self.playlist = Playlist.objects.create()
+        for i in range(10):
+            PlaylistEntry.objects.create(playlist=self.playlist, name=str(i))
+
+    def assertNames(self, names):
+        self.assertEqual(
+            list(self.playlist.entries.values_list("name", flat=True)), names
+        )
+
+    def assertLayout(self, layout):
+        self.assertEqual(
+            list(self.playlist.entries.values_list("bucket", "order")), layout
+        )
+
+    def entry(self, name):
+        return PlaylistEntry.objects.get(name=name)
+
+    def test_saved_order(self):
+        self.assertLayout([(0, i) for i in range(8)] + [(2, 0), (2, 1)])
+        other = PlaylistEntry.objects.create(playlist=Playlist.objects.create())
+        self.assertEqual((other.bucket, other.order), (0, 0))
+
+    def test_move_results(self):
+        wrt = {"playlist": self.playlist.pk}
+        entry = self.entry("9")
+        self.assertEqual(entry.to(2), MoveResult(wrt, entry.pk, 9, 2, (2, 9), 1))
+        self.assertEqual(
+            entry.swap(self.entry("0")), MoveResult(wrt, entry.pk, 2, 0, (0, 1), 2)
+        )
+        self.assertEqual(entry.bottom(), MoveResult(wrt, entry.pk, 0, 9, (1, 10), -1))
+
+    def test_position(self):
+        self.assertEqual(self.entry("9").get_position(), 9)
+        self.assertEqual(self.entry("3").previous().name, "2")
+        self.assertEqual(self.entry("7").next().name, "8")
+        self.assertIsNone(self.entry("9").next())
+
+    def test_to_within_bucket(self):
+        with assertNumQueries(self, 4):
+            self.entry("6").to(1)
+        self.assertNames(["0", "6", "1", "2", "3", "4", "5", "7", "8", "9"])
+        # the other bucket is untouched
+        self.assertLayout([(0, i) for i in range(8)] + [(2, 0), (2, 1)])
+
+    def test_to_splits_full_bucket(self):
+        self.entry("9").to(0)
+        self.assertNames(["9", "0", "1", "2", "3", "4", "5", "6", "7", "8"])
+        self.assertLayout(
+            [(0, i) for i in range(4)] + [(1, i) for i in range(5)] + [(2, 0)]
+        )
+
+    def test_to_merges_nearly_empty_bucket(self):
+        playlist = Playlist.objects.create()
+        entries = [
+            PlaylistEntry.objects.create(playlist=playlist, name="m%d" % i)
+            for i in range(11)
+        ]
+        # buckets hold 8 and 3 entries, empty the second down to one entry
+        entries[8].to(0)
+        self.assertEqual(PlaylistEntry.objects.get(name="m10").bucket, 2)
+        entries[9].to(0)
+        self.assertEqual(
+            list(playlist.entries.values_list("name", flat=True)),
+            ["m9", "m8"] + ["m%d" % i for i in range(8)] + ["m10"],
+        )
+
+    def test_split_without_free_bucket_index_rebalances(self):
+        self.entry("9").to(0)
+        for name in ("8", "7", "6", "5", "4"):
+            self.entry(name).to(0)
+        self.assertNames(["4", "5", "6", "7", "8", "9", "0", "1", "2", "3"])
+        self.assertLayout(
+            [(0, i) for i in range(4)] + [(2, i) for i in range(4)] + [(4, 0), (4, 1)]
+        )
+
+    def test_up_down_swap(self):
+        self.entry("8").up()
+        self.entry("0").down()
+        self.assertNames(["1", "0", "2", "3", "4", "5", "6", "8", "7", "9"])
+        self.entry("1").swap(self.entry("9"))
+        self.assertNames(["9", "0", "2", "3", "4", "5", "6", "8", "7", "1"])
+
+    def test_top_bottom(self):
+        self.entry("8").top()
+        self.entry("1").bottom()
+        self.assertNames(["8", "0", "2", "3", "4", "5", "6", "7", "9", "1"])
+
+    def test_above_below(self):
+        self.entry("9").above(self.entry("2"))
+        self.assertNames(["0", "1", "9", "2", "3", "4", "5", "6", "7", "8"])
+        self.entry("0").below(self.entry("8"))
+        self.assertNames(["1", "9", "2", "3", "4", "5", "6", "7", "8", "0"])
+
+    def test_delete(self):
+        self.entry("2").delete()
+        self.assertNames(["0", "1", "3", "4", "5", "6", "7", "8", "9"])
+        self.assertLayout([(0, i) for i in range(7)] + [(2, 0), (2, 1)])
+
+    def test_cascaded_delete(self):
+        PlaylistEntry.objects.filter(name__in=["1", "2"]).delete()
+        self.assertNames(["0", "3", "4", "5", "6", "7", "8", "9"])
+        self.assertLayout([(0, i) for i in range(6)] + [(2, 0), (2, 1)])
+
+    def test_change_playlist(self):
+        playlist = Playlist.objects.create()
+        PlaylistEntry.objects.create(playlist=playlist, name="other")
+        entry = self.entry("3")
+        entry.playlist = playlist
+        entry.save()
+        self.assertEqual((entry.bucket, entry.order), (0, 1))
+        self.assertLayout([(0, i) for i in range(7)] + [(2, 0), (2, 1)])
+
+    def test_bulk_create(self):
+        playlist = Playlist.objects.create()
+        PlaylistEntry.objects.bulk_create(
+            [PlaylistEntry(playlist=playlist, name="b%d" % i) for i in range(9)]
+            + [PlaylistEntry(playlist=self.playlist, name="10")]
+        )
+        self.assertEqual(
+            list(playlist.entries.values_list("bucket", "order")),
+            [(0, i) for i in range(8)] + [(2, 0)],
+        )
+        self.assertEqual(self.entry("10").get_position(), 10)
+
+    def test_reorder(self):
+        pks = [self.entry(name).pk for name in ("9", "7", "0")]
+        with assertNumQueries(self, 2):
+            positions = PlaylistEntry.objects.reorder(pks)
+        self.assertEqual(positions, dict(zip(pks, [0, 7, 1])))
+        self.assertNames(["9", "1", "2", "3", "4", "5", "6", "7", "8", "0"])
+        self.assertLayout([(0, i) for i in range(8)] + [(2, 0), (2, 1)])
+
+    def test_move_block(self):
+        pks = [self.entry(name).pk for name in ("9", "1", "8")]
+        positions = PlaylistEntry.objects.move_block(pks, 2)
+        self.assertEqual(positions, dict(zip(pks, [4, 2, 3])))
+        self.assertNames(["0", "2", "1", "8", "9", "3", "4", "5", "6", "7"])
+        PlaylistEntry.objects.move_block(pks)
+        self.assertNames(["0", "2", "3", "4", "5", "6", "7", "1", "8", "9"])
+
+    def test_random_moves(self):
+        # moves across buckets splitting and merging them keep the list whole
+        PlaylistEntry.objects.bulk_create(
+            [PlaylistEntry(playlist=self.playlist, name=str(i)) for i in range(10, 30)]
+        )
+        names = [str(i) for i in range(30)]
+        rng = random.Random(0)
+        for i in range(100):
+            name = rng.choice(names)
+            ref = rng.choice([n for n in names if n != name])
+            method = rng.choice(
+                ["to", "above", "below", "bottom", "swap", "set_positions"]
+            )
+            entry = self.entry(name)
+            if method == "set_positions":
+                picked = rng.sample(names, 3)
+                positions = dict(zip(picked, rng.sample(range(30), 3)))
+                others = [n for n in names if n not in positions]
+                placed = {p: n for n, p in positions.items()}
+                names[:] = [
+                    placed[p] if p in placed else others.pop(0) for p in range(30)
+                ]
+                PlaylistEntry.objects.set_positions(
+                    {self.entry(n).pk: p for n, p in positions.items()}
+                )
+                self.assertNames(names)
+                continue
+            if method == "swap":
+                index, ref_index = names.index(name), names.index(ref)
+                names[index], names[ref_index] = ref, name
+                result = entry.swap(self.entry(ref))
+            elif method == "to":
+                position = rng.randrange(-1, 32)
+                names.remove(name)
+                names.insert(max(0, position), name)
+                result = entry.to(position)
+            elif method == "bottom":
+                names.remove(name)
+                names.append(name)
+                result = entry.bottom()
+            else:
+                names.remove(name)
+                names.insert(names.index(ref) + (method == "below"), name)
+                result = getattr(entry, method)(self.entry(ref))
+            self.assertEqual(result.new_position, names.index(name))
+            self.assertNames(names)
+
+    def test_set_positions_shifts_buckets_only(self):
+        PlaylistEntry.objects.bulk_create(
+            [PlaylistEntry(playlist=self.playlist, name=str(i)) for i in range(10, 40)]
+        )
+        events = []
+        instrumentation.add_listener(events.append)
+        self.addCleanup(instrumentation.remove_listener, events.append)
+        PlaylistEntry.objects.set_positions({self.entry("39").pk: 0})
+        PlaylistEntry.objects.move_block([self.entry("38").pk, self.entry("2").pk], 1)
+        # only the items of the source and target buckets are shifted
+        self.assertLess(max(event.rows for event in events), 20)
+        self.assertNames(["39", "2", "38", "0", "1"] + [str(i) for i in range(3, 38)])
+
+    def test_reorder_model_rebalances(self):
+        out = StringIO()
+        call_command("reorder_model", "tests.PlaylistEntry", verbosity=1, stdout=out)
+        self.assertLayout(
+            [(0, i) for i in range(4)] + [(2, i) for i in range(4)] + [(4, 0), (4, 1)]
+        )
+        self.assertNames([str(i) for i in range(10)])
+        self.assertIn(
+            "changing bucket and order of tests.PlaylistEntry (5) to (2, 0)",
+            out.getvalue(),
+        )
+
+
+class MoveSignalTests(TestCase):
+    def setUp(self):
+        self.items = [Item.objects.create(name=str(i)) for i in range(5)]
+        self.received = []
+        for signal in (pre_move, post_move):
+            signal.connect(self.receiver)
+            self.addCleanup(signal.disconnect, self.receiver)
+
+    def receiver(self, signal, **kwargs):
+        self.received.append((signal, kwargs))
+
+    def assertSignals(self, pks, positions, shifted, sender=Item, wrt=None):
+        wrt = {} if wrt is None else wrt
+        self.assertEqual(
+            self.received,
+            [
+                (
+                    pre_move,
+                    {"sender": sender, "wrt": wrt, "pks": pks, "using": "default"},
+                ),
+                (
+                    post_move,
+                    {
+                        "sender": sender,
+                        "wrt": wrt,
+                        "pks": pks,
+                        "positions": positions,
+                        "shifted": shifted,
+                        "using": "default",
+                    },
+                ),
+            ],
+        )
+
+    def test_to(self):
+        item = self.items[4]
+        item.to(1)
+        self.assertSignals([item.pk], {item.pk: (4, 1)}, [((1, 4), 1)])
+
+    def test_up_and_swap(self):
+        first, second = self.items[:2]
+        second.up()
+        self.assertSignals(
+            [second.pk, first.pk], {second.pk: (1, 0), first.pk: (0, 1)}, []
+        )
+        self.received.clear()
+        second.up()
+        self.assertEqual(self.received, [])
+
+    def test_reorder(self):
+        a, b, c = self.items[1:4]
+        Item.objects.reorder([c.pk, b.pk, a.pk])
+        self.assertSignals([c.pk, a.pk], {c.pk: (3, 1), a.pk: (1, 3)}, [])
+
+    def test_set_positions(self):
+        a, b = self.items[0], self.items[3]
+        Item.objects.set_positions({a.pk: 2, b.pk: 4})
+        self.assertSignals(
+            [a.pk, b.pk], {a.pk: (0, 2), b.pk: (3, 4)}, [((1, 3), -1), ((4, 5), -1)]
+        )
+
+    def test_nothing_moved(self):
+        a, b = self.items[:2]
+        Item.objects.set_positions({a.pk: 0})
+        Item.objects.move_block([a.pk, b.pk], 0)
+        playlist = Playlist.objects.create()
+        entry = PlaylistEntry.objects.create(playlist=playlist)
+        PlaylistEntry.objects.set_positions({entry.pk: 0})
+        self.assertEqual(self.received, [])
+
+    def test_groups(self):
+        q1, q2 = Question.objects.create(), Question.objects.create()
+        user = TestUser.objects.create()
+        answers = [q.answers.create(user=user) for q in (q1, q2, q1, q2)]
+        self.received.clear()
+        Answer.objects.move_block([answers[2].pk, answers[3].pk], 0)
+        posts = [kwargs for signal, kwargs in self.received if signal is post_move]
+        self.assertEqual(
+            [(kwargs["wrt"], kwargs["positions"]) for kwargs in posts],
+            [
+                ({"question": q1.pk, "user": user.pk}, {answers[2].pk: (1, 0)}),
+                ({"question": q2.pk, "user": user.pk}, {answers[3].pk: (1, 0)}),
+            ],
+        )
+
+    def test_bucketed(self):
+        playlist = Playlist.objects.create()
+        with mock.patch.object(PlaylistEntry, "bucket_capacity", 4):
+            entries = [
+                PlaylistEntry.objects.create(playlist=playlist, name=str(i))
+                for i in range(6)
+            ]
+            self.received.clear()
+            entries[5].to(0)
+        self.assertSignals(
+            [entries[5].pk],
+            {entries[5].pk: (5, 0)},
+            [((0, 5), 1)],
+            sender=PlaylistEntry,
+            wrt={"playlist": playlist.pk},
+        )
+        self.received.clear()
+        PlaylistEntry.objects.reorder([entries[4].pk, entries[0].pk])
+        self.assertEqual(
+            self.received[1][1]["positions"],
+            {entries[4].pk: (5, 1), entries[0].pk: (1, 5)},
+        )
+
+
+@override_settings(DATABASE_ROUTERS=["tests.utils.ReplicaRouter"])
+class ReadRoutingTests(TestCase):
+    # the replica is left empty, so reads routed to it find nothing
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.items = [Item.objects.create(name=str(i)) for i in range(4)]
+
+    def assertNames(self, names):
+        self.assertEqual(
+            list(Item.objects.using("default").values_list("name", flat=True)), names
+        )
+
+    def test_reads_are_routed(self):
+        i0, i1, i2, i3 = self.items
+        self.assertEqual([i.order for i in self.items], [0, 1, 2, 3])
+        self.assertIsNone(i1.previous())
+        self.assertIsNone(i1.next())
+        self.assertIsNone(i1.get_ordering_queryset().get_max_order())
+        self.assertEqual(i1.previous(using="default"), i0)
+        self.assertEqual(i1.next(using="default"), i2)
+        self.assertEqual(i1.get_ordering_queryset(using="default").get_max_order(), 3)
+
+    def test_moves_read_from_writer(self):
+        i0, i1, i2, i3 = self.items
+        i1.up()
+        self.assertNames(["1", "0", "2", "3"])
+        i1.down()
+        self.assertNames(["0", "1", "2", "3"])
+        i0.bottom()
+        self.assertNames(["1", "2", "3", "0"])
+        Item.objects.using("default").get(pk=i3.pk).top()
+        self.assertNames(["3", "1", "2", "0"])
+        i0.refresh_from_db(using="default")
+        i0.above(Item.objects.using("default").get(pk=i2.pk))
+        self.assertNames(["3", "1", "0", "2"])
+        Item.objects.using("default").get(pk=i1.pk).delete()
+        self.assertNames(["3", "0", "2"])
+
+    def test_queryset_moves_read_from_writer(self):
+        i0, i1, i2, i3 = self.items
+        Item.objects.reorder([i3.pk, i1.pk])
+        self.assertNames(["0", "3", "2", "1"])
+        Item.objects.set_positions({i0.pk: 3})
+        self.assertNames(["3", "2", "1", "0"])
+        Item.objects.move_block([i1.pk, i0.pk], 0)
+        self.assertNames(["1", "0", "3", "2"])
+        Item.objects.bulk_create([Item(name="4")])
+        self.assertNames(["1", "0", "3", "2", "4"])
+
+    def test_bucketed(self):
+        playlist = Playlist.objects.create()
+        e0, e1, e2 = [playlist.entries.create(name=str(i)) for i in range(3)]
+        self.assertIsNone(e1.previous())
+        e2.up()
+        e0.bottom()
+        self.assertEqual(
+            list(PlaylistEntry.objects.using("default").values_list("name", flat=True)),
+            ["2", "1", "0"],
+        )
+        self.assertEqual(e0.get_position(using="default"), 2)
+
+    @override_settings(DATABASE_ROUTERS=[])
+    def test_instance_database(self):
+        r0, r1 = [Item.objects.using("replica").create(name=str(i)) for i in range(2)]
+        self.assertEqual((r0.order, r1.order), (0, 1))
+        self.assertEqual(r1.previous(), r0)
+        r1.up()
+        self.assertEqual(
+            list(Item.objects.using("replica").values_list("name", flat=True)),
+            ["1", "0"],
+        )
+        self.assertNames(["0", "1", "2", "3"])
+
+
+class OrderingChangeLogTests(TestCase):
+    def setUp(self):
+        self.items = [LoggedItem.objects.create(name=str(i)) for i in range(5)]
+
+    def replay(self, lists, changes):
+        # apply the changes to the {group: [pk, ...]} lists
+        for change in changes:
+            pks = lists.setdefault(change.group, [])
+            moved = change.positions
+            placed = {new: pk for pk, (old, new) in moved.items() if new is not None}
+            others = iter(pk for pk in pks if pk not in moved)
+            size = len([pk for pk in pks if pk not in moved]) + len(placed)
+            pks[:] = [placed[i] if i in placed else next(others) for i in range(size)]
+        return lists
+
+    def test_insert_move_and_delete(self):
+        i0, i1, i2, i3, i4 = self.items
+        changes = list(OrderingChange.objects.after(model=LoggedItem))
+        self.assertEqual([c.action for c in changes], ["insert"] * 5)
+        self.assertEqual(changes[2].positions, {i2.pk: (None, 2)})
+        self.assertEqual(changes[2].shifted, [((2, None), 1)])
+        cursor = changes[-1].pk
+
+        i3.to(0)
+        i1.refresh_from_db()
+        pk = i1.pk
+        i1.delete()
+        change, removal = OrderingChange.objects.after(cursor)
+        self.assertEqual(change.action, OrderingChange.MOVE)
+        self.assertEqual(change.model, "tests.LoggedItem")
+        self.assertEqual(change.wrt, {})
+        self.assertEqual(change.positions, {i3.pk: (3, 0)})
+        self.assertEqual(change.shifted, [((0, 3), 1)])
+        self.assertEqual(removal.action, OrderingChange.DELETE)
+        self.assertEqual(removal.positions, {pk: (2, None)})
+        self.assertEqual(removal.shifted, [((3, None), -1)])
+
+    def test_replay(self):
+        lists = self.replay({}, OrderingChange.objects.after())
+        cursor = OrderingChange.objects.last().pk
+        i0, i1, i2, i3, i4 = self.items
+        i4.up()
+        LoggedItem.objects.filter(pk__in=[i0.pk, i3.pk]).delete()
+        LoggedItem.objects.create(name="5")
+        LoggedItem.objects.get(pk=i2.pk).top()
+        LoggedItem.objects.reorder([i4.pk, i1.pk])
+        self.replay(lists, OrderingChange.objects.after(cursor))
+        self.assertEqual(
+            list(lists.values()),
+            [list(LoggedItem.objects.values_list("pk", flat=True))],
+        )
+
+    def test_replay_bucketed(self):
+        p0, p1 = Playlist.objects.create(), Playlist.objects.create()
+        entries = [p0.logged_entries.create() for i in range(20)]
+        lists = self.replay({}, OrderingChange.objects.after(model=LoggedEntry))
+        cursor = OrderingChange.objects.last().pk
+        entries[15].to(2)
+        LoggedEntry.objects.get(pk=entries[3].pk).delete()
+        LoggedEntry.objects.filter(pk__in=[entries[0].pk, entries[9].pk]).delete()
+        entry = LoggedEntry.objects.get(pk=entries[12].pk)
+        entry.playlist = p1
+        entry.save()
+        self.replay(lists, OrderingChange.objects.after(cursor))
+        self.assertEqual(
+            sorted(lists.values(), key=len),
+            [
+                list(p1.logged_entries.values_list("pk", flat=True)),
+                list(p0.logged_entries.values_list("pk", flat=True)),
+            ],
+        )
+
+    def test_change_of_group(self):
+        p0, p1 = Playlist.objects.create(), Playlist.objects.create()
+        e0, e1, e2 = [p0.logged_entries.create() for i in range(3)]
+        p1.logged_entries.create()
+        cursor = OrderingChange.objects.last().pk
+        e1.playlist = p1
+        e1.save()
+        removal, insert = OrderingChange.objects.after(cursor, model=LoggedEntry)
+        self.assertEqual(removal.wrt, {"playlist": p0.pk})
+        self.assertEqual(removal.positions, {e1.pk: (1, None)})
+        self.assertEqual(insert.wrt, {"playlist": p1.pk})
+        self.assertEqual(insert.positions, {e1.pk: (None, 1)})
+        self.assertEqual(
+            list(
+                OrderingChange.objects.after(
+                    model=LoggedEntry, wrt={"playlist": p1.pk}
+                ).values_list("action", flat=True)
+            ),
+            ["insert", "insert"],
+        )
+
+    def test_bulk_create(self):
+        p0, p1 = Playlist.objects.create(), Playlist.objects.create()
+        p0.logged_entries.create()
+        lists = self.replay({}, OrderingChange.objects.after(model=LoggedEntry))
+        cursor = OrderingChange.objects.last().pk
+        entries = LoggedEntry.objects.bulk_create(
+            [LoggedEntry(playlist=p) for p in (p0, p1, p0)]
+        )
+        inserts = list(OrderingChange.objects.after(cursor))
+        if entries[0].pk is None:
+            # the database does not return the pks of bulk created rows
+            self.assertEqual(inserts, [])
+            return
+        self.assertEqual([c.action for c in inserts], ["insert"] * 2)
+        self.assertEqual(inserts[0].wrt, {"playlist": p0.pk})
+        self.assertEqual(
+            inserts[0].positions, {entries[0].pk: (None, 1), entries[2].pk: (None, 2)}
+        )
+        self.assertEqual(inserts[0].shifted, [((1, None), 2)])
+        self.assertEqual(inserts[1].positions, {entries[1].pk: (None, 0)})
+        self.replay(lists, inserts)
+        self.assertEqual(
+            sorted(lists.values(), key=len),
+            [
+                list(p1.logged_entries.values_list("pk", flat=True)),
+                list(p0.logged_entries.values_list("pk", flat=True)),
+            ],
+        )
+        cursor = inserts[-1].pk
+        LoggedItem.objects.bulk_create([LoggedItem(name="5")])
+        (insert,) = OrderingChange.objects.after(cursor)
+        self.assertEqual(insert.positions, {LoggedItem.objects.last().pk: (None, 5)})
+
+    def test_bulk_create_without_pks(self):
+        cursor = OrderingChange.objects.last().pk
+        with mock.patch.object(
+            models.QuerySet, "bulk_create", side_effect=lambda objs, *a, **kw: objs
+        ):
+            LoggedItem.objects.bulk_create([LoggedItem(name="5"), LoggedItem(name="6")])
+        self.assertFalse(OrderingChange.objects.after(cursor).exists())
+
+    def test_order_class_path(self):
+        question = LoggedQuestion.objects.create(question="q0")
+        answer = LoggedOpenQuestion.objects.create(question="q1", answer="a")
+        cursor = OrderingChange.objects.last().pk
+        answer.to(0)
+        LoggedQuestion.objects.get(pk=question.pk).to(0)
+        changes = list(OrderingChange.objects.after(cursor))
+        self.assertEqual([c.action for c in changes], ["move"] * 2)
+        self.assertEqual({c.model for c in changes}, {"tests.LoggedQuestion"})
+
+    def test_not_logged(self):
+        Item.objects.create(name="0")
+        Item.objects.create(name="1").to(0)
+        self.assertEqual(OrderingChange.objects.count(), 5)
+        # models not logging their changes have no receivers
+        self.assertFalse(post_move.has_listeners(Item))
+
+
+class OrderingChangeLogTransactionTests(TransactionTestCase):
+    def test_logged_in_the_transaction_of_the_change(self):
+        items = [LoggedItem.objects.create(name=str(i)) for i in range(3)]
+        with mock.patch.object(OrderingChange, "log", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                items[2].to(0)
+            with self.assertRaises(RuntimeError):
+                LoggedItem.objects.get(pk=items[0].pk).delete()
+        # the changes were rolled back with the failed log
+        self.assertEqual(
+            list(LoggedItem.objects.values_list("name", "order")),
+            [("0", 0), ("1", 1), ("2", 2)],
+        )
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        for i in range(4):
+            Item.objects.create(name=str(i))
+        self.events = []
+        instrumentation.add_listener(self.events.append)
+        self.addCleanup(instrumentation.remove_listener, self.events.append)
+
+    def test_to(self):
+        Item.objects.get(name="3").to(1)
+        self.assertEqual(len(self.events), 1)
+        event = self.events[0]
+        self.assertEqual(event.operation, "to")
+        self.assertEqual(event.model, Item)
+        self.assertEqual(event.wrt, {})
+        self.assertEqual(event.rows, 2)
+        self.assertEqual(event.queries, 2)
+        self.assertGreaterEqual(event.duration, 0)
+
+    def test_nested_operations_are_not_reported(self):
+        Item.objects.get(name="0").down()
+        self.assertEqual([e.operation for e in self.events], ["down"])
+        self.assertEqual(self.events[0].queries, 3)
+
+    def test_wrt(self):
+        pizza = Pizza.objects.create(name="Margherita")
+        topping = Topping.objects.create(name="Basil")
+        PizzaToppingsThroughModel.objects.create(pizza=pizza, topping=topping)
+        self.assertEqual(self.events[-1].operation, "save")
+        self.assertEqual(self.events[-1].wrt, {"pizza": pizza.pk})
+
+    def test_bulk_create(self):
+        Item.objects.bulk_create([Item(name="4"), Item(name="5")])
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0].operation, "bulk_create")
+        self.assertEqual(self.events[0].rows, 2)
+        self.assertIsNone(self.events[0].wrt)
+
+    def test_delete_compaction(self):
+        parent = CascadedParentModel.objects.create()
+        CascadedOrderedModel.objects.create(parent=parent)
+        CascadedOrderedModel.objects.create(parent=CascadedParentModel.objects.create())
+        del self.events[:]
+        parent.delete()
+        self.assertEqual(
+            [(e.operation, e.rows) for e in self.events], [("delete_compaction", 1)]
+        )
+
+    def test_no_listener(self):
+        instrumentation.remove_listener(self.events.append)
+        Item.objects.get(name="3").to(1)
+        self.assertEqual(self.events, [])
+
+    def test_stats_collector(self):
+        stats = instrumentation.StatsCollector()
+        instrumentation.add_listener(stats)
+        self.addCleanup(instrumentation.remove_listener, stats)
+        Item.objects.get(name="3").to(0)
+        Item.objects.get(name="3").to(2)
+        Item.objects.get(name="2").delete()
+
+        dump = stats.dump(percentiles=(50, 99))
+        self.assertEqual(set(dump), {"tests.Item"})
+        self.assertEqual(set(dump["tests.Item"]), {"to", "delete"})
+        summary = dump["tests.Item"]["to"]
+        self.assertEqual(summary["count"], 2)
+        self.assertEqual(summary["rows"], 5)
+        self.assertEqual(summary["queries"], 4)
+        self.assertLessEqual(summary["p50"], summary["p99"])
+        self.assertEqual(summary["p99"], summary["max"])
+
+        stats.reset()
+        self.assertEqual(stats.dump(), {})
+
+
+class OrderingQueriesTests(TestCase):
+    def setUp(self):
+        for i in range(4):
+            Item.objects.create(name=str(i))
+
+    def test_within_budget(self):
+        with assertOrderingQueries(Item, max=2, rows=2) as context:
+            Item.objects.get(name="3").to(1)
+        self.assertEqual(context.queries, 2)
+        self.assertEqual(context.rows, 2)
+        self.assertEqual(
+            context.by_operation(), {"to": {"calls": 1, "queries": 2, "rows": 2}}
+        )
+
+    def test_over_budget(self):
+        with self.assertRaisesRegex(
+            AssertionError,
+            "4 ordering queries executed, at most 2 expected\n"
+            "  to: 1 call\\(s\\), 2 queries, 3 rows\n"
+            "  save: 1 call\\(s\\), 2 queries, 0 rows",
+        ):
+            with assertOrderingQueries(max=2):
+                Item.objects.get(name="3").to(0)
+                Item.objects.create(name="4")
+
+    def test_rows_over_budget(self):
+        with self.assertRaisesRegex(AssertionError, "3 rows shifted"):
+            with assertOrderingQueries(Item, rows=2):
+                Item.objects.get(name="3").to(0)
+
+    def test_only_ordering_queries_of_model_counted(self):
+        with assertOrderingQueries(Item, max=0) as context:
+            list(Item.objects.all())
+            Topping.objects.create(name="Ham")
+            CustomItem.objects.create(pkid="a", name="a")
+        self.assertEqual(context.events, [])
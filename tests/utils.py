@@ -39,3 +39,13 @@ def assertNumQueries(self, num, func=None, *args, using=DEFAULT_DB_ALIAS, **kwar
 
     with context:
         func(*args, **kwargs)
+
+
+class ReplicaRouter:
+    """Route reads to the "replica" database and writes to "default"."""
+
+    def db_for_read(self, model, **hints):
+        return "replica"
+
+    def db_for_write(self, model, **hints):
+        return "default"